@@ -9,7 +9,7 @@ from alembic import context
 
 # Import Base and all models
 from app.database import Base
-from app.models import Profile, LinkPage, Link, Lead, Event, Subscription
+from app.models import Profile, LinkPage, Link, Lead, LeadSubmission, Event, EventRollup, VisitorSketch, Subscription
 from app.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,140 @@
+"""partition events by month and add event rollups
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 09:00:00
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of the current month; app.retention keeps this
+# window rolling forward after the migration has run.
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_month_partition(month: date) -> None:
+    upper = _add_months(month, 1)
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS events_p{month:%Y%m} PARTITION OF events "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+
+
+def _create_event_indexes() -> None:
+    op.create_index(op.f('ix_events_created_at'), 'events', ['created_at'], unique=False)
+    op.create_index(op.f('ix_events_owner_id'), 'events', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_events_page_id'), 'events', ['page_id'], unique=False)
+    op.create_index(op.f('ix_events_type'), 'events', ['type'], unique=False)
+
+
+def _drop_event_indexes(table_name: str) -> None:
+    op.drop_index(op.f('ix_events_created_at'), table_name=table_name)
+    op.drop_index(op.f('ix_events_owner_id'), table_name=table_name)
+    op.drop_index(op.f('ix_events_type'), table_name=table_name)
+
+
+def upgrade() -> None:
+    # Create event_rollups table
+    op.create_table('event_rollups',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.Column('page_id', sa.UUID(), nullable=True),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['profiles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['page_id'], ['link_pages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_event_rollups_day'), 'event_rollups', ['day'], unique=False)
+    op.create_index(op.f('ix_event_rollups_owner_id'), 'event_rollups', ['owner_id'], unique=False)
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite has no declarative partitioning; app.retention falls back
+        # to batched deletes there.
+        return
+
+    # Swap the plain events table for one range-partitioned on created_at.
+    # The primary key has to include the partition key.
+    _drop_event_indexes('events')
+    op.rename_table('events', 'events_legacy')
+    op.execute('ALTER TABLE events_legacy RENAME CONSTRAINT events_pkey TO events_legacy_pkey')
+
+    op.execute("""
+        CREATE TABLE events (
+            id UUID NOT NULL,
+            owner_id UUID NOT NULL REFERENCES profiles (id) ON DELETE CASCADE,
+            page_id UUID REFERENCES link_pages (id) ON DELETE CASCADE,
+            type VARCHAR(50) NOT NULL,
+            meta JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    _create_event_indexes()
+
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM events_legacy')).scalar()
+    current = datetime.utcnow().date().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+    while month <= _add_months(current, PARTITIONS_AHEAD):
+        _create_month_partition(month)
+        month = _add_months(month, 1)
+    # Catches rows outside every monthly range so inserts never fail if the
+    # maintenance job falls behind.
+    op.execute('CREATE TABLE events_default PARTITION OF events DEFAULT')
+
+    op.execute("""
+        INSERT INTO events (id, owner_id, page_id, type, meta, created_at)
+        SELECT id, owner_id, page_id, type, meta, COALESCE(created_at, now() AT TIME ZONE 'utc')
+        FROM events_legacy
+    """)
+    op.drop_table('events_legacy')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.rename_table('events', 'events_partitioned')
+        op.drop_index(op.f('ix_events_page_id'), table_name='events_partitioned')
+        _drop_event_indexes('events_partitioned')
+
+        op.create_table('events',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('owner_id', sa.UUID(), nullable=False),
+        sa.Column('page_id', sa.UUID(), nullable=True),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('meta', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['profiles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['page_id'], ['link_pages.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.execute("""
+            INSERT INTO events (id, owner_id, page_id, type, meta, created_at)
+            SELECT id, owner_id, page_id, type, meta, created_at
+            FROM events_partitioned
+        """)
+        # Dropping the parent drops every partition with it
+        op.execute('DROP TABLE events_partitioned')
+        op.create_index(op.f('ix_events_created_at'), 'events', ['created_at'], unique=False)
+        op.create_index(op.f('ix_events_owner_id'), 'events', ['owner_id'], unique=False)
+        op.create_index(op.f('ix_events_type'), 'events', ['type'], unique=False)
+
+    op.drop_index(op.f('ix_event_rollups_owner_id'), table_name='event_rollups')
+    op.drop_index(op.f('ix_event_rollups_day'), table_name='event_rollups')
+    op.drop_table('event_rollups')
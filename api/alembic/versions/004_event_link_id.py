@@ -0,0 +1,44 @@
+"""add typed link_id to events
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('link_id', sa.UUID(), nullable=True))
+    op.add_column('event_rollups', sa.Column('link_id', sa.UUID(), nullable=True))
+
+    # Copy meta["link_id"] into the new column in one statement; env.py runs
+    # the whole upgrade in a single transaction, so batches would not help
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        link_id_from_meta = "(meta->>'link_id')::uuid"
+        has_meta_link = "meta->>'link_id' IS NOT NULL"
+    else:
+        # UUIDs are stored as 32-character hex strings on SQLite
+        link_id_from_meta = "replace(json_extract(meta, '$.link_id'), '-', '')"
+        has_meta_link = "json_extract(meta, '$.link_id') IS NOT NULL"
+
+    bind.execute(sa.text(f"""
+        UPDATE events SET link_id = {link_id_from_meta}
+        WHERE type = 'link_click' AND {has_meta_link}
+    """))
+
+    op.create_index('ix_events_link_id_created_at', 'events', ['link_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_link_id_created_at', table_name='events')
+    op.drop_column('event_rollups', 'link_id')
+    op.drop_column('events', 'link_id')
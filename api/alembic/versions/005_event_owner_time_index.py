@@ -0,0 +1,23 @@
+"""index events by owner and time
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves the bucketed analytics queries and the dashboard 30-day counts
+    op.create_index('ix_events_owner_id_created_at', 'events', ['owner_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_owner_id_created_at', table_name='events')
@@ -0,0 +1,26 @@
+"""add profiles.updated_at for incremental static export
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('profiles', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE profiles SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+    op.create_index(op.f('ix_profiles_updated_at'), 'profiles', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_profiles_updated_at'), table_name='profiles')
+    op.drop_column('profiles', 'updated_at')
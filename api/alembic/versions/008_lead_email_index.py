@@ -0,0 +1,24 @@
+"""index leads by owner and lower-cased email
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Duplicate checks during bulk lead import
+    op.create_index('ix_leads_owner_id_lower_email', 'leads', ['owner_id', sa.text('lower(email)')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_owner_id_lower_email', table_name='leads')
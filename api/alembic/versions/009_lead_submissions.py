@@ -0,0 +1,54 @@
+"""normalized lead emails, submission counts and history
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('leads', sa.Column('email_normalized', sa.String(length=255), nullable=True))
+    op.add_column('leads', sa.Column('submission_count', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('leads', sa.Column('last_submitted_at', sa.DateTime(), nullable=True))
+    op.create_table('lead_submissions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('lead_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lead_submissions_lead_id'), 'lead_submissions', ['lead_id'], unique=False)
+
+    # One statement per backfill, like 004
+    bind = op.get_bind()
+    bind.execute(sa.text("UPDATE leads SET email_normalized = lower(trim(email)), last_submitted_at = created_at"))
+    # Every existing lead becomes its own first submission (reusing its id)
+    bind.execute(sa.text("""
+        INSERT INTO lead_submissions (id, lead_id, name, message, created_at)
+        SELECT id, id, name, message, created_at FROM leads
+    """))
+
+    op.drop_index('ix_leads_owner_id_lower_email', table_name='leads')
+    # Not unique yet: 010 merges existing duplicates first (see app/lead_dedupe.py)
+    op.create_index('ix_leads_owner_id_email_normalized', 'leads', ['owner_id', 'email_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_owner_id_email_normalized', table_name='leads')
+    op.create_index('ix_leads_owner_id_lower_email', 'leads', ['owner_id', sa.text('lower(email)')], unique=False)
+    op.drop_index(op.f('ix_lead_submissions_lead_id'), table_name='lead_submissions')
+    op.drop_table('lead_submissions')
+    op.drop_column('leads', 'last_submitted_at')
+    op.drop_column('leads', 'submission_count')
+    op.drop_column('leads', 'email_normalized')
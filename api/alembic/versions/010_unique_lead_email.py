@@ -0,0 +1,85 @@
+"""one lead per normalized email per owner
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 18:00:01
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+# The tables as of this revision; app.models may have moved on
+leads = sa.table(
+    'leads',
+    sa.column('id', sa.UUID()),
+    sa.column('owner_id', sa.UUID()),
+    sa.column('name', sa.String()),
+    sa.column('email', sa.String()),
+    sa.column('email_normalized', sa.String()),
+    sa.column('message', sa.Text()),
+    sa.column('submission_count', sa.Integer()),
+    sa.column('created_at', sa.DateTime()),
+    sa.column('last_submitted_at', sa.DateTime()),
+)
+lead_submissions = sa.table('lead_submissions', sa.column('lead_id', sa.UUID()))
+
+
+def merge_duplicates(bind) -> int:
+    """Fold each (owner, normalized email) group into its oldest lead, as
+    app.lead_dedupe does: latest name, email and message, summed submission
+    count, every submission. Returns the number of leads removed."""
+    groups = bind.execute(
+        sa.select(leads.c.owner_id, leads.c.email_normalized)
+        .where(leads.c.email_normalized.is_not(None))
+        .group_by(leads.c.owner_id, leads.c.email_normalized)
+        .having(sa.func.count() > 1)
+    ).all()
+    removed = 0
+    for owner_id, email_normalized in groups:
+        rows = bind.execute(
+            sa.select(leads.c.id, leads.c.name, leads.c.email, leads.c.message, leads.c.submission_count,
+                      leads.c.created_at, leads.c.last_submitted_at)
+            .where(leads.c.owner_id == owner_id, leads.c.email_normalized == email_normalized)
+            .order_by(leads.c.created_at, leads.c.id)
+        ).all()
+        keep, duplicates = rows[0], [row.id for row in rows[1:]]
+        by_recency = sorted(rows, key=lambda row: row.last_submitted_at or row.created_at or datetime.min)
+        latest = by_recency[-1]
+        bind.execute(lead_submissions.update().where(lead_submissions.c.lead_id.in_(duplicates))
+                     .values(lead_id=keep.id))
+        bind.execute(leads.update().where(leads.c.id == keep.id).values(
+            name=latest.name,
+            email=latest.email,
+            message=next((row.message for row in reversed(by_recency) if row.message), None),
+            submission_count=sum(row.submission_count or 1 for row in rows),
+            last_submitted_at=latest.last_submitted_at or latest.created_at,
+        ))
+        bind.execute(leads.delete().where(leads.c.id.in_(duplicates)))
+        removed += len(duplicates)
+    return removed
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Duplicates from before 009 would fail the unique index
+    if removed := merge_duplicates(bind):
+        print(f"Merged duplicate leads, removed {removed}")
+    if bind.dialect.name == 'postgresql':
+        # SQLite would need a table rebuild; the column is always set by the app
+        op.alter_column('leads', 'email_normalized', nullable=False)
+    op.drop_index('ix_leads_owner_id_email_normalized', table_name='leads')
+    op.create_index('uq_leads_owner_id_email_normalized', 'leads', ['owner_id', 'email_normalized'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_leads_owner_id_email_normalized', table_name='leads')
+    op.create_index('ix_leads_owner_id_email_normalized', 'leads', ['owner_id', 'email_normalized'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('leads', 'email_normalized', nullable=True)
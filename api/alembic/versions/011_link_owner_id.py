@@ -0,0 +1,38 @@
+"""denormalize links.owner_id for single-statement ownership checks
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('links', sa.Column('owner_id', sa.UUID(), nullable=True))
+
+    # One statement, like 004
+    bind = op.get_bind()
+    bind.execute(sa.text("""
+        UPDATE links SET owner_id = (SELECT owner_id FROM link_pages WHERE link_pages.id = links.page_id)
+    """))
+
+    if bind.dialect.name == 'postgresql':
+        # SQLite would need a table rebuild; the column is always set by the app
+        op.alter_column('links', 'owner_id', nullable=False)
+        op.create_foreign_key('links_owner_id_fkey', 'links', 'profiles', ['owner_id'], ['id'], ondelete='CASCADE')
+    op.create_index(op.f('ix_links_owner_id'), 'links', ['owner_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_links_owner_id'), table_name='links')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('links_owner_id_fkey', 'links', type_='foreignkey')
+    op.drop_column('links', 'owner_id')
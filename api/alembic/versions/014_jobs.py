@@ -0,0 +1,47 @@
+"""add jobs for the background job runner
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-20 01:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('queue', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('dedupe_key', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dedupe_key')
+    )
+    # Workers only scan queued jobs, in claim order
+    op.create_index('ix_jobs_due', 'jobs', ['queue', sa.text('priority DESC'), 'run_at'], unique=False,
+                    postgresql_where=sa.text("status = 'queued'"), sqlite_where=sa.text("status = 'queued'"))
+    op.create_index('ix_jobs_running', 'jobs', ['locked_at'], unique=False,
+                    postgresql_where=sa.text("status = 'running'"), sqlite_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_running', table_name='jobs')
+    op.drop_index('ix_jobs_due', table_name='jobs')
+    op.drop_table('jobs')
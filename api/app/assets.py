@@ -0,0 +1,154 @@
+"""Fingerprinted, precompressed static assets.
+
+Build step (run at image build, see Dockerfile):
+
+    python -m app.assets
+
+copies every file under app/static into app/static/dist with a content hash in
+its name (css/style.css -> css/style.3f2a9c1b.css), writes .gz and .br
+variants next to compressible files and records the mapping in
+dist/manifest.json. Templates resolve URLs through `asset_url`, which falls
+back to the plain /static path when no build has been run (development).
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from markupsafe import Markup
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants are still produced
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{8}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def fingerprinted_name(relative_path: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:8]
+    stem, dot, suffix = relative_path.rpartition(".")
+    if not dot:
+        return f"{relative_path}.{digest}"
+    return f"{stem}.{digest}.{suffix}"
+
+
+def _write_compressed(path: Path, content: bytes):
+    gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gzipped) < len(content):
+        path.with_name(path.name + ".gz").write_bytes(gzipped)
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            path.with_name(path.name + ".br").write_bytes(compressed)
+
+
+def build(static_dir: Path = STATIC_DIR, dist_dir: Path = DIST_DIR) -> dict[str, str]:
+    if dist_dir.exists():
+        shutil.rmtree(dist_dir)
+    manifest = {}
+    for source in sorted(static_dir.rglob("*")):
+        if not source.is_file() or dist_dir in source.parents:
+            continue
+        relative_path = source.relative_to(static_dir).as_posix()
+        content = source.read_bytes()
+        target_name = fingerprinted_name(relative_path, content)
+        target = dist_dir / target_name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        if source.suffix in COMPRESSIBLE_SUFFIXES:
+            _write_compressed(target, content)
+        manifest[relative_path] = target_name
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    (dist_dir / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> dict[str, str]:
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(path: str) -> str:
+    """URL for a file under app/static, fingerprinted when a build exists."""
+    built = load_manifest().get(path)
+    if built:
+        return f"/static/dist/{built}"
+    return f"/static/{path}"
+
+
+@lru_cache(maxsize=32)
+def inline_asset(path: str) -> Markup:
+    """Contents of a static file for inlining into a <style> or <script> tag."""
+    return Markup((STATIC_DIR / path).read_text())
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles that serves precompressed variants and immutable caching
+    for fingerprinted files; everything else must revalidate via ETag."""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        response = None
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                variant_stat = os.stat(full_path + suffix)
+            except FileNotFoundError:
+                continue
+            response = FileResponse(
+                full_path + suffix,
+                status_code=status_code,
+                stat_result=variant_stat,
+                media_type=mimetypes.guess_type(full_path)[0] or "application/octet-stream",
+            )
+            response.headers["Content-Encoding"] = encoding
+            break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        if FINGERPRINT_RE.search(full_path):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    manifest = build()
+    print(f"Built {len(manifest)} static assets into {DIST_DIR}")
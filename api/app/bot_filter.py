@@ -0,0 +1,68 @@
+import re
+from functools import lru_cache
+from typing import Optional
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.rate_limit import get_client_ip
+from app.shared_state import create_shared_state
+
+# Link-preview crawlers, mail/link scanners, uptime monitors and HTTP libraries.
+# Matched anywhere in the lower-cased User-Agent. "bot" alone would catch
+# phones such as CUBOT, so only its crawler forms count: a versioned
+# "...bot/", a "compatible; ...bot" token, a "+http" contact URL (no browser
+# sends one) or a known name.
+BOT_USER_AGENT_PATTERNS = [
+    r"bot/", r"compatible; ?[^;)]*bot\b", r"\+https?://", r"slackbot", r"telegrambot", r"discordbot",
+    r"crawl", r"spider", r"slurp", r"scanner", r"preview",
+    r"facebookexternalhit", r"facebookcatalog", r"whatsapp/", r"skypeuripreview",
+    r"embedly", r"quora link preview", r"iframely", r"outbrain", r"vkshare",
+    r"google-inspectiontool", r"google-read-aloud", r"googleother", r"feedfetcher", r"mediapartners",
+    r"headlesschrome", r"phantomjs", r"lighthouse", r"pingdom", r"uptime", r"statuscake", r"site24x7",
+    r"newrelicpinger", r"datadogsynthetics", r"checkly", r"freshping",
+    r"barracuda", r"proofpoint", r"mimecast", r"safelinks", r"ms office", r"microsoft office",
+    r"curl/", r"wget/", r"python-requests", r"python-urllib", r"python-httpx", r"aiohttp",
+    r"go-http-client", r"okhttp", r"java/", r"apache-httpclient", r"libwww-perl", r"node-fetch",
+    r"axios/", r"scrapy", r"httpclient",
+]
+BOT_USER_AGENT_RE = re.compile("|".join(BOT_USER_AGENT_PATTERNS))
+
+burst_state = create_shared_state(settings.BOT_BURST_STATE_BACKEND)
+
+PREFETCH_HEADERS = {
+    "purpose": ("prefetch", "preview"),
+    "sec-purpose": ("prefetch", "prerender"),
+    "x-purpose": ("prefetch", "preview"),
+    "x-moz": ("prefetch",),
+}
+
+
+@lru_cache(maxsize=4096)
+def is_bot_user_agent(user_agent: str) -> bool:
+    if not user_agent:
+        return True
+    # Lower-casing once is much cheaper than an IGNORECASE scan of every pattern
+    return BOT_USER_AGENT_RE.search(user_agent.lower()) is not None
+
+
+async def classify_request(request: Request, db: AsyncSession | None) -> Optional[str]:
+    """Return why a request looks automated ("head", "prefetch", "user_agent",
+    "burst"), or None for traffic that should be recorded."""
+    if request.method == "HEAD":
+        return "head"
+
+    headers = request.headers
+    for header, values in PREFETCH_HEADERS.items():
+        value = headers.get(header, "").lower()
+        if value and any(marker in value for marker in values):
+            return "prefetch"
+
+    if is_bot_user_agent(headers.get("user-agent", "")):
+        return "user_agent"
+
+    # Per worker by default (BOT_BURST_STATE_BACKEND): a burst spread over N
+    # workers may need up to N times the requests, which is fine for a filter
+    key = f"burst:{get_client_ip(request)}"
+    if await burst_state.hit(db, key, settings.BOT_BURST_MAX_REQUESTS, settings.BOT_BURST_WINDOW_SECONDS):
+        return "burst"
+    return None
@@ -0,0 +1,199 @@
+"""Messages between the workers of a deployment.
+
+Each transport takes JSON-serialisable items with send() and hands items
+sent by other workers to `on_receive(item)`. A worker never receives its
+own items. Delivery is best effort: items sent while a peer is down or
+falling behind are lost, so receivers must be able to recover (caches keep
+a TTL, live dashboards reload on reconnect).
+
+- PostgresBroadcast: LISTEN/NOTIFY, works across hosts.
+- LocalBroadcast: Unix datagram sockets in one directory, one per worker;
+  for several workers on one host without Postgres.
+- NullBroadcast: a single worker; sends nowhere.
+"""
+import asyncio
+import json
+import os
+import socket
+import tempfile
+from pathlib import Path
+from uuid import uuid4
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7000
+# Linux accepts larger datagrams, but the receive buffer holds fewer of them
+MAX_DATAGRAM_BYTES = 60000
+
+
+class NullBroadcast:
+    name = "none"
+
+    def __init__(self, on_receive=None):
+        self.on_receive = on_receive
+        self.dropped = 0
+
+    def send(self, item):
+        pass
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class PostgresBroadcast:
+    """Relays items through LISTEN/NOTIFY on two dedicated autocommit
+    connections (one listening, one notifying). Items are packed into as
+    few NOTIFYs as fit under MAX_NOTIFY_BYTES."""
+
+    name = "postgres"
+
+    def __init__(self, database_url: str, channel: str, on_receive):
+        # SQLAlchemy URL -> libpq conninfo
+        self.conninfo = database_url.replace("postgresql+psycopg://", "postgresql://", 1)
+        self.channel = channel
+        self.on_receive = on_receive
+        self.origin = f"{os.getpid()}-{uuid4().hex[:8]}"
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.dropped = 0
+        self._tasks: list[asyncio.Task] = []
+
+    def send(self, item):
+        self.outbox.put_nowait(item)
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._notify())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _connect(self):
+        import psycopg
+        return await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+
+    async def _listen(self):
+        while True:
+            try:
+                async with await self._connect() as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    async for notify in conn.notifies():
+                        payload = json.loads(notify.payload)
+                        if payload["origin"] == self.origin:
+                            continue
+                        for item in payload["items"]:
+                            self.on_receive(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"LISTEN {self.channel} failed, reconnecting: {e}")
+                await asyncio.sleep(1)
+
+    def _packed(self, items: list) -> list[str]:
+        payloads, batch, size = [], [], 0
+        for item in items:
+            encoded = json.dumps(item)
+            if batch and size + len(encoded) > MAX_NOTIFY_BYTES:
+                payloads.append(json.dumps({"origin": self.origin, "items": batch}))
+                batch, size = [], 0
+            batch.append(item)
+            size += len(encoded)
+        if batch:
+            payloads.append(json.dumps({"origin": self.origin, "items": batch}))
+        return payloads
+
+    async def _notify(self):
+        conn = None
+        while True:
+            items = [await self.outbox.get()]
+            while not self.outbox.empty():
+                items.append(self.outbox.get_nowait())
+            try:
+                conn = conn or await self._connect()
+                for payload in self._packed(items):
+                    await conn.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"NOTIFY {self.channel} failed, dropping {len(items)} items: {e}")
+                self.dropped += len(items)
+                conn = None
+
+
+def default_socket_dir(channel: str) -> Path:
+    """Shared by the workers of one gunicorn (or uvicorn --workers) master."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return Path(base) / f"linkcrm-{channel}-{os.getppid()}"
+
+
+class LocalBroadcast:
+    """One Unix datagram socket per worker in `directory`; send() writes the
+    item to every other socket there. Sockets left behind by dead workers
+    are removed when a send to them is refused."""
+
+    name = "local"
+
+    def __init__(self, directory: Path, on_receive):
+        self.directory = Path(directory)
+        self.on_receive = on_receive
+        self.path = self.directory / f"{os.getpid()}-{uuid4().hex[:8]}.sock"
+        self.dropped = 0
+        self._sock: socket.socket | None = None
+
+    async def start(self):
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self.path))
+        self._sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._readable)
+
+    async def stop(self):
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        self.path.unlink(missing_ok=True)
+        try:
+            self.directory.rmdir()
+        except OSError:
+            pass
+
+    def _readable(self):
+        while True:
+            try:
+                data = self._sock.recv(MAX_DATAGRAM_BYTES)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                self.on_receive(json.loads(data))
+            except Exception as e:
+                print(f"Broadcast from a peer failed: {e}")
+
+    def peers(self) -> list[str]:
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return []
+        with entries:
+            return [entry.path for entry in entries if entry.name.endswith(".sock") and entry.path != str(self.path)]
+
+    def send(self, item):
+        if self._sock is None:
+            return
+        data = json.dumps(item).encode()
+        if len(data) > MAX_DATAGRAM_BYTES:
+            print(f"Broadcast item of {len(data)} bytes is too large; dropped")
+            self.dropped += 1
+            return
+        for peer in self.peers():
+            try:
+                self._sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                Path(peer).unlink(missing_ok=True)
+            except BlockingIOError:
+                # The peer's receive buffer is full: it is stalled or far behind
+                self.dropped += 1
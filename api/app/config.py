@@ -7,11 +7,32 @@ class Settings(BaseSettings):
     ENV: str = "production"
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
+    
+    # Runtime profile, see app/gunicorn_conf.py. 0 workers = from CPU quota
+    GUNICORN_WORKERS: int = 0
+    GUNICORN_WORKERS_PER_CPU: float = 1.0
+    GUNICORN_MAX_WORKERS: int = 0
+    GUNICORN_PRELOAD: bool = True
+    GUNICORN_KEEPALIVE: int = 75
+    GUNICORN_TIMEOUT: int = 120
+    GUNICORN_GRACEFUL_TIMEOUT: int = 30
+    GUNICORN_MAX_REQUESTS: int = 10000
+    GUNICORN_MAX_REQUESTS_JITTER: int = 1000
+    UVICORN_LOOP: str = "auto"
+    UVICORN_HTTP: str = "auto"
     SERVER_URL: str = "http://localhost:8000"
     
     DATABASE_URL: str = "sqlite+aiosqlite:///./dev.db"
     SQL_ECHO: bool = False
     
+    # SQLite only, see app/database.py
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_WRITE_LOCK: bool = True
+    
     SECRET_KEY: str = "change_me_long_random_secret_key_minimum_32_characters"
     SESSION_COOKIE_NAME: str = "session"
     SESSION_EXPIRES_DAYS: int = 30
@@ -25,6 +46,61 @@ class Settings(BaseSettings):
     LEMONSQUEEZY_WEBHOOK_SECRET: str = ""
     LEMONSQUEEZY_CHECKOUT_STARTER: str = ""
     LEMONSQUEEZY_CHECKOUT_PRO: str = ""
+    
+    EVENTS_RETENTION_DAYS: int = 395
+    EVENTS_ARCHIVE_DIR: str = ""
+    EVENTS_PURGE_BATCH_SIZE: int = 5000
+    EVENTS_PARTITIONS_AHEAD: int = 3
+    
+    VISITOR_SKETCH_FLUSH_SECONDS: int = 60
+    
+    # Background jobs, see app/jobs.py. Queues are name:concurrency
+    JOB_QUEUES: str = "default:4,email:4,webhooks:8,maintenance:1"
+    JOB_WORKER_IN_APP: bool = True
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_LOCK_TIMEOUT_SECONDS: float = 600.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_SECONDS: float = 5.0
+    JOB_BACKOFF_MAX_SECONDS: float = 3600.0
+    # 0 leaves events maintenance to cron (python -m app.retention)
+    EVENTS_MAINTENANCE_EVERY_SECONDS: int = 86400
+    
+    # Lead webhooks, see app/webhooks.py
+    WEBHOOK_MAX_ENDPOINTS: int = 5
+    WEBHOOK_BATCH_SIZE: int = 100
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_BACKOFF_SECONDS: float = 2.0
+    WEBHOOK_BACKOFF_MAX_SECONDS: float = 600.0
+    WEBHOOK_CONCURRENCY_PER_HOST: int = 2
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_ALLOW_PRIVATE_HOSTS: bool = False
+    
+    # Dashboard live feed, see app/live.py
+    LIVE_FLUSH_SECONDS: float = 1.0
+    LIVE_HEARTBEAT_SECONDS: float = 15.0
+    LIVE_MAX_CONNECTIONS: int = 10000
+    LIVE_MAX_PENDING: int = 256
+    LIVE_POSTGRES_FANOUT: bool = False
+    
+    # Cache invalidation between workers, see app/invalidation.py
+    INVALIDATION_TRANSPORT: str = "auto"
+    INVALIDATION_SOCKET_DIR: str = ""
+    PUBLIC_CACHE_SIZE: int = 10000
+    PUBLIC_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Where rate limit and bot burst counts live, see app/shared_state.py
+    SHARED_STATE_BACKEND: str = "auto"
+    # Burst detection is approximate anyway; "database" adds a write to every /r and /u hit
+    BOT_BURST_STATE_BACKEND: str = "memory"
+    BOT_BURST_MAX_REQUESTS: int = 20
+    BOT_BURST_WINDOW_SECONDS: int = 10
+    
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    
+    TEMPLATE_CACHE_DIR: str = ""
+    
+    STATIC_EXPORT_DIR: str = "./static_export"
+    STATIC_EXPORT_APP_URL: str = ""
 
 
 settings = Settings()
@@ -1,10 +1,13 @@
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from app.models import Event
+from sqlalchemy import select, func, literal_column
+from app.live import live_feed
+from app.models import Event, EventRollup, Link
 from app.schemas import EventCreate
 
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
 
 async def create_event(
     db: AsyncSession,
@@ -14,12 +17,13 @@ async def create_event(
     event = Event(
         owner_id=owner_id,
         page_id=data.page_id,
+        link_id=data.link_id,
         type=data.type,
         meta=data.meta
     )
     db.add(event)
-    await db.commit()
-    await db.refresh(event)
+    await db.flush()
+    live_feed.count_on_commit(db, owner_id, data.type)
     return event
 
 
@@ -43,3 +47,75 @@ async def get_link_clicks_count(db: AsyncSession, owner_id: UUID, days: int = 30
         .where(Event.created_at >= cutoff)
     )
     return result.scalar() or 0
+
+
+async def get_clicks_per_link(db: AsyncSession, owner_id: UUID, days: int = 30) -> dict[UUID, int]:
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    owner_links = select(Link.id).where(Link.owner_id == owner_id)
+    result = await db.execute(
+        select(Event.link_id, func.count(Event.id))
+        .where(Event.link_id.in_(owner_links))
+        .where(Event.created_at >= cutoff)
+        .group_by(Event.link_id)
+    )
+    return dict(result.all())
+
+
+def bucket_start(value: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _bucket_column(dialect_name: str, granularity: str):
+    if dialect_name == "postgresql":
+        # Inlined rather than bound so the SELECT and GROUP BY expressions match
+        return func.date_trunc(literal_column(f"'{granularity}'"), Event.created_at)
+    fmt = "%Y-%m-%d %H:00:00" if granularity == "hour" else "%Y-%m-%d 00:00:00"
+    return func.strftime(fmt, Event.created_at)
+
+
+async def get_event_series(
+    db: AsyncSession,
+    owner_id: UUID,
+    start: datetime,
+    end: datetime,
+    granularity: str = "day"
+) -> list[tuple[datetime, str, UUID | None, int]]:
+    """Event counts per (bucket, type, link_id) in [start, end), grouped in SQL.
+
+    Days already rolled up by the retention job are read from event_rollups;
+    hourly series only cover days still held as raw events.
+    """
+    series = []
+    if granularity == "day":
+        watermark = (await db.execute(select(func.max(EventRollup.day)))).scalar()
+        if watermark is not None and start.date() <= watermark:
+            last_rolled_up = min(watermark, (end - timedelta(days=1)).date())
+            result = await db.execute(
+                select(EventRollup.day, EventRollup.type, EventRollup.link_id, func.sum(EventRollup.count))
+                .where(EventRollup.owner_id == owner_id)
+                .where(EventRollup.day >= start.date())
+                .where(EventRollup.day <= last_rolled_up)
+                .group_by(EventRollup.day, EventRollup.type, EventRollup.link_id)
+            )
+            series.extend(
+                (datetime.combine(day, time.min), type_, link_id, int(count))
+                for day, type_, link_id, count in result
+            )
+            start = max(start, datetime.combine(watermark + timedelta(days=1), time.min))
+
+    if start < end:
+        bucket = _bucket_column(db.bind.dialect.name, granularity).label("bucket")
+        result = await db.execute(
+            select(bucket, Event.type, Event.link_id, func.count(Event.id))
+            .where(Event.owner_id == owner_id)
+            .where(Event.created_at >= start)
+            .where(Event.created_at < end)
+            .group_by(bucket, Event.type, Event.link_id)
+        )
+        series.extend(
+            (datetime.fromisoformat(value) if isinstance(value, str) else value, type_, link_id, count)
+            for value, type_, link_id, count in result
+        )
+    return series
@@ -1,40 +1,144 @@
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models import Lead
-from app.schemas import LeadCreate
+from sqlalchemy import func, insert, select, tuple_
+from app.database import dialect_insert
+from app.models import Lead, LeadSubmission
+from app.live import live_feed
+from app.schemas import LeadCreate, LeadOut
+from app.webhooks import queue_lead
 
 
-async def create_lead(db: AsyncSession, owner_id: UUID, data: LeadCreate) -> Lead:
-    lead = Lead(
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+async def submit_lead(db: AsyncSession, owner_id: UUID, data: LeadCreate) -> Lead:
+    """Create the owner's lead for this address, or merge a repeat submission
+    into it: latest name and message win, the count goes up, and every
+    submission is kept in lead_submissions. The owner's webhooks and live
+    dashboards get the lead once the transaction commits."""
+    now = datetime.utcnow()
+    upsert = dialect_insert(db, Lead).values(
+        id=uuid4(),
         owner_id=owner_id,
         name=data.name,
         email=data.email,
-        message=data.message
+        email_normalized=normalize_email(data.email),
+        message=data.message,
+        submission_count=1,
+        created_at=now,
+        last_submitted_at=now,
     )
-    db.add(lead)
-    await db.commit()
-    await db.refresh(lead)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[Lead.owner_id, Lead.email_normalized],
+        set_={
+            "name": upsert.excluded.name,
+            "email": upsert.excluded.email,
+            "message": func.coalesce(upsert.excluded.message, Lead.message),
+            "submission_count": Lead.submission_count + 1,
+            "last_submitted_at": upsert.excluded.last_submitted_at,
+        },
+    ).returning(Lead)
+    lead = (await db.execute(upsert, execution_options={"populate_existing": True})).scalar_one()
+    db.add(LeadSubmission(lead_id=lead.id, name=data.name, message=data.message, created_at=now))
+    await db.flush()
+    lead_json = LeadOut.model_validate(lead).model_dump(mode="json")
+    await queue_lead(db, owner_id, lead_json)
+    live_feed.publish_on_commit(db, owner_id, {"type": "lead", "lead": lead_json})
     return lead
 
 
-async def get_leads(
-    db: AsyncSession,
-    owner_id: UUID,
-    email_filter: str = None,
-    date_from: datetime = None,
-    date_to: datetime = None
-) -> list[Lead]:
-    query = select(Lead).where(Lead.owner_id == owner_id)
-    
+async def get_existing_emails(db: AsyncSession, owner_id: UUID, emails: list[str]) -> set[str]:
+    """The normalized addresses among `emails` that already have a lead."""
+    if not emails:
+        return set()
+    result = await db.execute(
+        select(Lead.email_normalized)
+        .where(Lead.owner_id == owner_id, Lead.email_normalized.in_(emails))
+    )
+    return set(result.scalars())
+
+
+async def bulk_create_leads(db: AsyncSession, owner_id: UUID, rows: list[dict]) -> int:
+    """Insert validated lead values (name, email, message, optional
+    created_at), one statement per table. Addresses the owner already has a
+    lead for, even ones committed a moment ago, are skipped; returns the
+    number of leads inserted."""
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    lead_rows, submissions = [], {}
+    for row in rows:
+        lead_id, created_at = uuid4(), row.get("created_at") or now
+        lead_rows.append({"id": lead_id, "owner_id": owner_id, "name": row["name"], "email": row["email"],
+                      "email_normalized": normalize_email(row["email"]), "message": row.get("message"),
+                      "submission_count": 1, "created_at": created_at, "last_submitted_at": created_at})
+        submissions[lead_id] = {"id": lead_id, "lead_id": lead_id, "name": row["name"],
+                                "message": row.get("message"), "created_at": created_at}
+    inserted = (await db.execute(
+        dialect_insert(db, Lead).values(lead_rows)
+        .on_conflict_do_nothing(index_elements=[Lead.owner_id, Lead.email_normalized])
+        .returning(Lead.id)
+    )).scalars().all()
+    if inserted:
+        await db.execute(insert(LeadSubmission), [submissions[lead_id] for lead_id in inserted])
+    await db.flush()
+    return len(inserted)
+
+
+def _filter_leads(query, email_filter: str = None, date_from: datetime = None, date_to: datetime = None):
     if email_filter:
         query = query.where(Lead.email.ilike(f"%{email_filter}%"))
     if date_from:
         query = query.where(Lead.created_at >= date_from)
     if date_to:
         query = query.where(Lead.created_at <= date_to)
-    
-    query = query.order_by(Lead.created_at.desc())
+    return query
+
+
+async def get_leads(
+    db: AsyncSession,
+    owner_id: UUID,
+    email_filter: str = None,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    limit: int = None
+) -> list[Lead]:
+    query = _filter_leads(select(Lead).where(Lead.owner_id == owner_id), email_filter, date_from, date_to)
+    query = query.order_by(Lead.created_at.desc()).limit(limit)
     result = await db.execute(query)
     return result.scalars().all()
+
+
+LEAD_ROW_COLUMNS = (
+    Lead.id, Lead.name, Lead.email, Lead.message, Lead.created_at, Lead.submission_count, Lead.last_submitted_at,
+)
+
+
+async def get_lead_rows(
+    db: AsyncSession,
+    owner_id: UUID,
+    limit: int,
+    after: tuple[datetime, UUID] | None = None,
+    email_filter: str = None,
+    date_from: datetime = None,
+    date_to: datetime = None
+) -> list[dict]:
+    """A page of leads as plain dicts (the LeadOut fields), newest first,
+    selected as columns so no ORM objects are built. `after` is the
+    (created_at, id) of the previous page's last lead."""
+    query = select(*LEAD_ROW_COLUMNS).where(Lead.owner_id == owner_id)
+    query = _filter_leads(query, email_filter, date_from, date_to)
+    if after is not None:
+        query = query.where(tuple_(Lead.created_at, Lead.id) < after)
+    query = query.order_by(Lead.created_at.desc(), Lead.id.desc()).limit(limit)
+    result = await db.execute(query)
+    return [dict(row) for row in result.mappings()]
+
+
+async def count_leads(db: AsyncSession, owner_id: UUID) -> int:
+    result = await db.execute(
+        select(func.count()).select_from(Lead).where(Lead.owner_id == owner_id)
+    )
+    return result.scalar_one()
@@ -1,11 +1,27 @@
-from uuid import UUID
+from datetime import datetime
+from typing import NamedTuple
+from uuid import UUID, uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from sqlalchemy.orm import selectinload
-from app.models import Link, LinkPage
+from sqlalchemy import case, delete, func, insert, select, update
+from app.cache import TTLCache
+from app.config import settings
+from app.invalidation import invalidation_bus
+from app.models import Link, LinkPage, Profile
 from app.schemas import LinkCreate, LinkUpdate
 
 
+class LinkTarget(NamedTuple):
+    url: str
+    owner_id: UUID
+    page_id: UUID
+
+
+# str(link_id) -> LinkTarget for /r/<link_id>; update_link and delete_link
+# drop entries in every worker
+link_targets = TTLCache(maxsize=settings.PUBLIC_CACHE_SIZE, ttl=settings.PUBLIC_CACHE_TTL_SECONDS)
+invalidation_bus.subscribe("link", link_targets.delete)
+
+
 async def get_link_page(db: AsyncSession, owner_id: UUID) -> LinkPage:
     result = await db.execute(
         select(LinkPage).where(LinkPage.owner_id == owner_id)
@@ -13,6 +29,25 @@ async def get_link_page(db: AsyncSession, owner_id: UUID) -> LinkPage:
     return result.scalar_one_or_none()
 
 
+async def get_link_page_by_id(db: AsyncSession, page_id: UUID) -> LinkPage:
+    result = await db.execute(
+        select(LinkPage).where(LinkPage.id == page_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def touch_profile(db: AsyncSession, owner_id: UUID):
+    """Mark the owner's public page as changed for the static export and
+    the page caches of every worker."""
+    await db.execute(
+        update(Profile)
+        .where(Profile.id == owner_id)
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    invalidation_bus.publish_on_commit(db, "page", owner_id)
+
+
 async def get_links(db: AsyncSession, page_id: UUID) -> list[Link]:
     result = await db.execute(
         select(Link)
@@ -22,63 +57,120 @@ async def get_links(db: AsyncSession, page_id: UUID) -> list[Link]:
     return result.scalars().all()
 
 
+LINK_ROW_COLUMNS = (Link.id, Link.title, Link.url, Link.is_active, Link.position, Link.clicks)
+
+
+async def get_link_rows(db: AsyncSession, owner_id: UUID) -> list[dict]:
+    """The owner's links as plain dicts (the LinkOut fields), in page order."""
+    result = await db.execute(
+        select(*LINK_ROW_COLUMNS)
+        .where(Link.owner_id == owner_id)
+        .order_by(Link.position)
+    )
+    return [dict(row) for row in result.mappings()]
+
+
 async def get_link(db: AsyncSession, link_id: UUID) -> Link:
     result = await db.execute(
-        select(Link)
-        .where(Link.id == link_id)
-        .options(selectinload(Link.page))
+        select(Link).where(Link.id == link_id)
     )
     return result.scalar_one_or_none()
 
 
-async def create_link(db: AsyncSession, page_id: UUID, data: LinkCreate) -> Link:
+async def get_link_target(db: AsyncSession, link_id: UUID) -> LinkTarget | None:
+    key = str(link_id)
+    target = link_targets.get(key)
+    if target is None:
+        generation = invalidation_bus.generation
+        result = await db.execute(select(Link.url, Link.owner_id, Link.page_id).where(Link.id == link_id))
+        row = result.one_or_none()
+        if row is None:
+            return None
+        target = LinkTarget(*row)
+        if invalidation_bus.generation == generation:
+            link_targets.set(key, target)
+    return target
+
+
+async def create_link(db: AsyncSession, link_page: LinkPage, data: LinkCreate) -> Link:
+    # Next position computed in the INSERT itself, which RETURNs the new row
+    next_position = select(func.coalesce(func.max(Link.position) + 1, 0)).where(Link.page_id == link_page.id)
     result = await db.execute(
-        select(Link).where(Link.page_id == page_id).order_by(Link.position.desc()).limit(1)
-    )
-    last_link = result.scalar_one_or_none()
-    next_position = (last_link.position + 1) if last_link else 0
-    
-    link = Link(
-        page_id=page_id,
-        title=data.title,
-        url=str(data.url),
-        position=next_position,
-        is_active=data.is_active
+        insert(Link)
+        .values(
+            id=uuid4(),
+            page_id=link_page.id,
+            owner_id=link_page.owner_id,
+            title=data.title,
+            url=str(data.url),
+            position=next_position.scalar_subquery(),
+            clicks=0,
+            is_active=data.is_active
+        )
+        .returning(Link)
     )
-    db.add(link)
-    await db.commit()
-    await db.refresh(link)
+    link = result.scalar_one()
+    await touch_profile(db, link_page.owner_id)
+    await db.flush()
     return link
 
 
-async def update_link(db: AsyncSession, link: Link, data: LinkUpdate) -> Link:
+# Writes below are scoped to the owner in their WHERE clause, so the
+# ownership check costs no extra query and other owners' links are untouched
+
+async def update_link(db: AsyncSession, owner_id: UUID, link_id: UUID, data: LinkUpdate) -> Link | None:
+    """Returns the updated link, or None if the owner has no such link (or
+    there was nothing to update)."""
     update_data = data.model_dump(exclude_unset=True)
+    if not update_data:
+        return None
     if "url" in update_data:
         update_data["url"] = str(update_data["url"])
-    
-    for key, value in update_data.items():
-        setattr(link, key, value)
-    
-    await db.commit()
-    await db.refresh(link)
-    return link
-
 
-async def delete_link(db: AsyncSession, link: Link):
-    await db.delete(link)
-    await db.commit()
+    result = await db.execute(
+        update(Link)
+        .where(Link.id == link_id, Link.owner_id == owner_id)
+        .values(**update_data)
+        .returning(Link)
+        .execution_options(populate_existing=True)
+    )
+    link = result.scalar_one_or_none()
+    if link is not None:
+        await touch_profile(db, owner_id)
+        invalidation_bus.publish_on_commit(db, "link", link_id)
+    await db.flush()
+    return link
 
 
-async def reorder_links(db: AsyncSession, link_ids: list[UUID]):
-    for position, link_id in enumerate(link_ids):
-        await db.execute(
-            update(Link).where(Link.id == link_id).values(position=position)
-        )
-    await db.commit()
+async def delete_link(db: AsyncSession, owner_id: UUID, link_id: UUID) -> bool:
+    result = await db.execute(
+        delete(Link).where(Link.id == link_id, Link.owner_id == owner_id)
+    )
+    deleted = result.rowcount > 0
+    if deleted:
+        await touch_profile(db, owner_id)
+        invalidation_bus.publish_on_commit(db, "link", link_id)
+    await db.flush()
+    return deleted
+
+
+async def reorder_links(db: AsyncSession, owner_id: UUID, link_ids: list[UUID]):
+    """One UPDATE for the whole new order; ids the owner doesn't own are ignored."""
+    if not link_ids:
+        return
+    result = await db.execute(
+        update(Link)
+        .where(Link.id.in_(link_ids), Link.owner_id == owner_id)
+        .values(position=case({link_id: position for position, link_id in enumerate(link_ids)}, value=Link.id))
+        .execution_options(synchronize_session="fetch")
+    )
+    if result.rowcount > 0:
+        await touch_profile(db, owner_id)
+    await db.flush()
 
 
 async def increment_link_clicks(db: AsyncSession, link_id: UUID):
     await db.execute(
         update(Link).where(Link.id == link_id).values(clicks=Link.clicks + 1)
     )
-    await db.commit()
+    await db.flush()
@@ -1,6 +1,7 @@
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.invalidation import invalidation_bus
 from app.models import Profile, LinkPage
 from app.schemas import ProfileUpdate
 
@@ -22,35 +23,29 @@ async def get_profile_by_handle(db: AsyncSession, handle: str) -> Profile:
 
 async def create_profile(db: AsyncSession, email: str, handle: str) -> Profile:
     profile = Profile(email=email, handle=handle, display_name=handle)
-    db.add(profile)
+    # Inserted with the profile in one flush; every default is client-side,
+    # so nothing needs reading back after the commit
+    db.add(LinkPage(owner=profile))
     await db.flush()
-
-    link_page = LinkPage(owner_id=profile.id)
-    db.add(link_page)
-
-    await db.commit()
-    await db.refresh(profile)
     return profile
 
 
 async def create_profile_with_password(db: AsyncSession, email: str, handle: str, password_hash: str) -> Profile:
     profile = Profile(email=email, handle=handle, display_name=handle, password_hash=password_hash)
-    db.add(profile)
+    # Inserted with the profile in one flush; every default is client-side,
+    # so nothing needs reading back after the commit
+    db.add(LinkPage(owner=profile))
     await db.flush()
-
-    link_page = LinkPage(owner_id=profile.id)
-    db.add(link_page)
-
-    await db.commit()
-    await db.refresh(profile)
     return profile
 
 
 async def update_profile(db: AsyncSession, profile: Profile, data: ProfileUpdate) -> Profile:
     update_data = data.model_dump(exclude_unset=True)
+    if update_data.get("handle") not in (None, profile.handle):
+        invalidation_bus.publish_on_commit(db, "handle", profile.handle)
     for key, value in update_data.items():
         setattr(profile, key, value)
     
-    await db.commit()
-    await db.refresh(profile)
+    invalidation_bus.publish_on_commit(db, "page", profile.id)
+    await db.flush()
     return profile
@@ -1,7 +1,8 @@
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.database import dialect_insert
 from app.models import Subscription
 
 
@@ -20,24 +21,18 @@ async def upsert_subscription(
     current_period_end: datetime = None,
     raw: dict = None
 ) -> Subscription:
-    subscription = await get_subscription(db, owner_id)
-    
-    if subscription:
-        subscription.status = status
-        subscription.plan = plan
-        subscription.current_period_end = current_period_end
-        subscription.raw = raw
-        subscription.updated_at = datetime.utcnow()
-    else:
-        subscription = Subscription(
-            owner_id=owner_id,
-            status=status,
-            plan=plan,
-            current_period_end=current_period_end,
-            raw=raw
-        )
-        db.add(subscription)
-    
-    await db.commit()
-    await db.refresh(subscription)
+    values = {
+        "status": status,
+        "plan": plan,
+        "current_period_end": current_period_end,
+        "raw": raw,
+        "updated_at": datetime.utcnow(),
+    }
+    upsert = dialect_insert(db, Subscription).values(id=uuid4(), owner_id=owner_id, **values)
+    result = await db.execute(
+        upsert.on_conflict_do_update(index_elements=[Subscription.owner_id], set_=values).returning(Subscription),
+        execution_options={"populate_existing": True},
+    )
+    subscription = result.scalar_one()
+    await db.flush()
     return subscription
@@ -0,0 +1,36 @@
+from uuid import UUID
+from datetime import date, datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.hll import HyperLogLog
+from app.models import VisitorSketch
+
+
+async def merge_visitor_sketch(db: AsyncSession, owner_id: UUID, day: date, sketch: HyperLogLog):
+    # Row lock on Postgres so concurrent workers merging the same owner-day
+    # don't overwrite each other's registers
+    result = await db.execute(
+        select(VisitorSketch)
+        .where(VisitorSketch.owner_id == owner_id)
+        .where(VisitorSketch.day == day)
+        .with_for_update()
+    )
+    stored = result.scalar_one_or_none()
+    if stored:
+        stored.registers = HyperLogLog.from_bytes(stored.registers).merge(sketch).to_bytes()
+    else:
+        db.add(VisitorSketch(owner_id=owner_id, day=day, registers=sketch.to_bytes()))
+
+
+async def get_unique_visitors_count(db: AsyncSession, owner_id: UUID, days: int = 30) -> int:
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    result = await db.execute(
+        select(VisitorSketch.registers)
+        .where(VisitorSketch.owner_id == owner_id)
+        .where(VisitorSketch.day >= since)
+    )
+    merged = None
+    for registers in result.scalars():
+        sketch = HyperLogLog.from_bytes(registers)
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged.count() if merged else 0
@@ -0,0 +1,64 @@
+import secrets
+from uuid import UUID, uuid4
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, select
+from app.models import WebhookEndpoint
+
+
+async def get_webhook_endpoints(db: AsyncSession, owner_id: UUID) -> list[WebhookEndpoint]:
+    result = await db.execute(
+        select(WebhookEndpoint)
+        .where(WebhookEndpoint.owner_id == owner_id)
+        .order_by(WebhookEndpoint.created_at)
+    )
+    return result.scalars().all()
+
+
+async def count_webhook_endpoints(db: AsyncSession, owner_id: UUID) -> int:
+    result = await db.execute(
+        select(func.count()).select_from(WebhookEndpoint).where(WebhookEndpoint.owner_id == owner_id)
+    )
+    return result.scalar_one()
+
+
+async def get_active_endpoints(db: AsyncSession, owner_ids: list[UUID]) -> list[WebhookEndpoint]:
+    result = await db.execute(
+        select(WebhookEndpoint)
+        .where(WebhookEndpoint.owner_id.in_(owner_ids), WebhookEndpoint.is_active.is_(True))
+    )
+    return result.scalars().all()
+
+
+async def get_active_endpoint(db: AsyncSession, endpoint_id: UUID) -> WebhookEndpoint | None:
+    result = await db.execute(
+        select(WebhookEndpoint)
+        .where(WebhookEndpoint.id == endpoint_id, WebhookEndpoint.is_active.is_(True))
+    )
+    return result.scalar_one_or_none()
+
+
+async def create_webhook_endpoint(db: AsyncSession, owner_id: UUID, url: str) -> WebhookEndpoint:
+    result = await db.execute(
+        insert(WebhookEndpoint)
+        .values(
+            id=uuid4(),
+            owner_id=owner_id,
+            url=url,
+            secret=secrets.token_urlsafe(32),
+            is_active=True,
+            created_at=datetime.utcnow()
+        )
+        .returning(WebhookEndpoint)
+    )
+    endpoint = result.scalar_one()
+    await db.flush()
+    return endpoint
+
+
+async def delete_webhook_endpoint(db: AsyncSession, owner_id: UUID, endpoint_id: UUID) -> bool:
+    result = await db.execute(
+        delete(WebhookEndpoint).where(WebhookEndpoint.id == endpoint_id, WebhookEndpoint.owner_id == owner_id)
+    )
+    await db.flush()
+    return result.rowcount > 0
@@ -1,5 +1,9 @@
+import asyncio
+import weakref
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
 from app.config import settings
 
 engine = create_async_engine(
@@ -7,10 +11,134 @@ engine = create_async_engine(
     echo=settings.SQL_ECHO,
 )
 
+
+def configure_sqlite(engine):
+    """Production pragmas for SQLite, set on every new connection: WAL so
+    readers never block the writer, NORMAL sync (durable at checkpoints, safe
+    under WAL), a busy timeout so writers from other processes wait instead of
+    failing with "database is locked", and a larger page cache and mmap."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.close()
+
+
+_writer_locks = weakref.WeakKeyDictionary()
+
+
+def _writer_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _writer_locks.get(loop)
+    if lock is None:
+        lock = _writer_locks[loop] = asyncio.Lock()
+    return lock
+
+
+class SerializedWriteSession(AsyncSession):
+    """SQLite allows one writer at a time. Sessions of this class take an
+    in-process lock before their first write (a DML statement, or a flush
+    with pending changes) and hold it until commit or rollback, so writers
+    in one worker queue up in order instead of contending for the database
+    lock. Reads never wait. The driver only opens a transaction at the first
+    write, so a queued writer never works from a stale snapshot.
+
+    A task holding the lock must not wait on a second session's write."""
+
+    _holds_writer_lock = False
+
+    async def _acquire_writer(self, statement=None):
+        if self._holds_writer_lock:
+            return
+        if getattr(statement, "is_dml", False) or self.new or self.deleted or self.identity_map.check_modified():
+            await _writer_lock().acquire()
+            self._holds_writer_lock = True
+
+    def _release_writer(self):
+        if self._holds_writer_lock:
+            self._holds_writer_lock = False
+            _writer_lock().release()
+
+    async def execute(self, statement, *args, **kwargs):
+        await self._acquire_writer(statement)
+        return await super().execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        await self._acquire_writer(statement)
+        return await super().scalar(statement, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        await self._acquire_writer()
+        return await super().get(*args, **kwargs)
+
+    async def flush(self, objects=None):
+        await self._acquire_writer()
+        return await super().flush(objects)
+
+    async def commit(self):
+        await self._acquire_writer()
+        try:
+            return await super().commit()
+        finally:
+            self._release_writer()
+
+    async def rollback(self):
+        try:
+            return await super().rollback()
+        finally:
+            self._release_writer()
+
+    async def close(self):
+        try:
+            return await super().close()
+        finally:
+            self._release_writer()
+
+
+is_sqlite = engine.dialect.name == "sqlite"
+if is_sqlite:
+    configure_sqlite(engine)
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=SerializedWriteSession if is_sqlite and settings.SQLITE_WRITE_LOCK else AsyncSession,
     expire_on_commit=False,
 )
 
 Base = declarative_base()
+
+ON_COMMIT_KEY = "on_commit"
+
+
+def on_commit(db: AsyncSession, callback):
+    """Call `callback()` once `db`'s transaction has committed; it is
+    dropped if the transaction rolls back instead. For side effects that
+    must only follow durable data (webhooks, live updates)."""
+    db.info.setdefault(ON_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session):
+    for callback in session.info.pop(ON_COMMIT_KEY, ()):
+        try:
+            callback()
+        except Exception as e:
+            print(f"on_commit callback failed: {e}")
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_on_commit(session, transaction):
+    # A committed transaction's callbacks have already run and been removed
+    if transaction.parent is None:
+        session.info.pop(ON_COMMIT_KEY, None)
+
+
+def dialect_insert(db: AsyncSession, model):
+    """INSERT with ON CONFLICT support for the session's database (Postgres
+    or SQLite)."""
+    return (postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert)(model)
@@ -9,8 +9,22 @@ from sqlalchemy import select
 
 
 async def get_db():
+    """One transaction per request. CRUD helpers only flush; the session
+    commits once after the endpoint returns and rolls back if it raised.
+    Endpoints commit early themselves only when a side effect, like an
+    email, must follow durable data.
+
+    The commit lands before the response is sent, so a redirect's next
+    request sees it and a failed commit becomes a 500, only because FastAPI
+    0.106-0.117 exits yield dependencies before sending. From 0.118 they
+    exit after the response, hence the pin in pyproject.toml."""
     async with AsyncSessionLocal() as session:
-        yield session
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
 
 
 async def get_current_user(
@@ -52,8 +66,32 @@ async def get_current_user_optional(
     return result.scalar_one_or_none()
 
 
+def bearer_token(request: Request) -> Optional[str]:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    return None
+
+
+async def get_api_user(
+    request: Request,
+    session: AsyncSession = Depends(get_db),
+    session_cookie: Optional[str] = Cookie(None, alias="session")
+) -> Profile:
+    """The session token as `Authorization: Bearer <token>` (apps and
+    integrations) or the browser's session cookie."""
+    return await get_current_user(session, bearer_token(request) or session_cookie)
+
+
+async def api_csrf_protect(request: Request):
+    # Browsers never attach a bearer token on their own, so only calls that
+    # get_api_user authenticates by cookie need the CSRF header
+    if not bearer_token(request):
+        await csrf_protect(request)
+
+
 async def csrf_protect(request: Request):
-    if request.method in ["POST", "PUT", "DELETE"]:
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
         token = None
 
         if request.headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
@@ -1,7 +1,5 @@
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from app.config import settings
+from app.jobs import job
 
 
 async def send_email(to_email: str, subject: str, text_body: str, html_body: str):
@@ -9,6 +7,11 @@ async def send_email(to_email: str, subject: str, text_body: str, html_body: str
         print(f"SMTP not configured. Email to {to_email}: {subject}")
         return
 
+    # Imported here: most workers never send mail
+    import aiosmtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     message = MIMEMultipart("alternative")
     message["From"] = settings.SMTP_FROM
     message["To"] = to_email
@@ -164,3 +167,13 @@ LinkCrm Team
     """
 
     await send_email(email, subject, text_body, html_body)
+
+
+@job("emails.lead_alert", queue="email")
+async def lead_alert_job(db, payload: dict):
+    await send_lead_alert(payload["to"], payload["lead"])
+
+
+@job("emails.password_reset", queue="email")
+async def password_reset_job(db, payload: dict):
+    await send_password_reset(payload["to"], payload["url"])
@@ -0,0 +1,96 @@
+"""Gunicorn runtime profile, driven by Settings.
+
+    gunicorn -c python:app.gunicorn_conf app.main:app
+
+Worker count follows the container's CPU quota (cgroup v2 or v1) unless
+GUNICORN_WORKERS is set. With GUNICORN_PRELOAD the app is imported once in
+the master and forked, so workers share its pages copy-on-write and
+respawns after GUNICORN_MAX_REQUESTS are cheap. Workers use uvloop and
+httptools when they are installed.
+"""
+import importlib.util
+import math
+import os
+from pathlib import Path
+from uvicorn.workers import UvicornWorker as _UvicornWorker
+from app.config import settings
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def cpu_quota(cgroup_root: Path = CGROUP_ROOT) -> float | None:
+    """CPUs granted by the cgroup CPU quota, or None when unlimited."""
+    try:
+        quota, period = (cgroup_root / "cpu.max").read_text().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((cgroup_root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((cgroup_root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cpus(cgroup_root: Path = CGROUP_ROOT) -> float:
+    cpus = float(len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+    quota = cpu_quota(cgroup_root)
+    return min(cpus, quota) if quota else cpus
+
+
+def worker_count(cgroup_root: Path = CGROUP_ROOT) -> int:
+    if settings.GUNICORN_WORKERS > 0:
+        return settings.GUNICORN_WORKERS
+    workers = max(2, math.ceil(available_cpus(cgroup_root) * settings.GUNICORN_WORKERS_PER_CPU))
+    if settings.GUNICORN_MAX_WORKERS > 0:
+        workers = min(workers, settings.GUNICORN_MAX_WORKERS)
+    return workers
+
+
+def _pick(setting: str, preferred: str, fallback: str) -> str:
+    if setting != "auto":
+        return setting
+    return preferred if importlib.util.find_spec(preferred) else fallback
+
+
+class UvicornWorker(_UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": _pick(settings.UVICORN_LOOP, "uvloop", "asyncio"),
+        "http": _pick(settings.UVICORN_HTTP, "httptools", "h11"),
+    }
+
+
+bind = f"{settings.APP_HOST}:{settings.APP_PORT}"
+workers = worker_count()
+worker_class = "app.gunicorn_conf.UvicornWorker"
+preload_app = settings.GUNICORN_PRELOAD
+keepalive = settings.GUNICORN_KEEPALIVE
+timeout = settings.GUNICORN_TIMEOUT
+graceful_timeout = settings.GUNICORN_GRACEFUL_TIMEOUT
+max_requests = settings.GUNICORN_MAX_REQUESTS
+max_requests_jitter = settings.GUNICORN_MAX_REQUESTS_JITTER
+# Heartbeat files on tmpfs; a disk-backed /tmp can stall workers under load
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def when_ready(server):
+    if preload_app:
+        # Parsed templates then live in the master and are shared by every fork
+        from app.templating import load_all, templates
+        load_all(templates.env)
+    server.log.info(
+        "%d workers, preload=%s, loop=%s, http=%s, keepalive=%ss, max_requests=%d",
+        workers, preload_app, UvicornWorker.CONFIG_KWARGS["loop"], UvicornWorker.CONFIG_KWARGS["http"],
+        keepalive, max_requests,
+    )
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Connections inherited from the master must not be shared across
+        # processes; drop them without closing the master's sockets
+        from app.database import engine
+        engine.sync_engine.dispose(close=False)
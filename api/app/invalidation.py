@@ -0,0 +1,114 @@
+"""Cross-worker invalidation of in-process caches.
+
+Caches subscribe a callback to a topic; writers publish the keys they
+changed. crud.profiles and crud.links publish with publish_on_commit, so
+keys are dropped only once the change is visible to other sessions.
+This worker's caches are invalidated immediately; other workers' caches
+are invalidated when the message arrives over INVALIDATION_TRANSPORT
+(app/broadcast.py):
+
+- "postgres": LISTEN/NOTIFY, for workers on several hosts
+- "local": Unix datagram sockets, for several workers on one host
+- "none": a single worker
+- "auto" (default): "postgres" on Postgres, otherwise "local"
+
+A reader that loads a value from the database may race an invalidation
+of it: note `generation` before the query and only cache the result if it
+is unchanged afterwards.
+
+Delivery is best effort, so every subscribed cache must also expire
+its entries (see app.cache.TTLCache); the TTL bounds how stale an entry
+can get if a message is lost. stats() reports messages sent and received,
+drops, and the delay between publishing in one worker and invalidating
+in another (wall clock, so across hosts it includes clock skew).
+
+Topics: "page" (owner_id; the public bio page), "handle" (a handle that
+moved or was released) and "link" (link_id).
+"""
+import time
+from collections import deque
+from app.broadcast import LocalBroadcast, NullBroadcast, PostgresBroadcast, default_socket_dir
+from app.config import settings
+from app.database import on_commit
+
+NOTIFY_CHANNEL = "linkcrm_invalidate"
+LATENCY_SAMPLES = 1000
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class InvalidationBus:
+    def __init__(self):
+        self.subscribers: dict[str, list] = {}
+        self.transport = NullBroadcast()
+        # Bumped by every invalidation applied in this worker
+        self.generation = 0
+        self.sent = 0
+        self.received = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def subscribe(self, topic: str, callback):
+        """`callback(key)` for every invalidated key of `topic`, in any worker."""
+        self.subscribers.setdefault(topic, []).append(callback)
+
+    def _apply(self, topic: str, keys: list[str]):
+        self.generation += 1
+        for callback in self.subscribers.get(topic, ()):
+            for key in keys:
+                try:
+                    callback(key)
+                except Exception as e:
+                    print(f"Invalidating {topic} {key} failed: {e}")
+
+    def publish(self, topic: str, *keys):
+        keys = [str(key) for key in keys]
+        self._apply(topic, keys)
+        self.transport.send({"topic": topic, "keys": keys, "sent_at": time.time()})
+        self.sent += 1
+
+    def publish_on_commit(self, db, topic: str, *keys):
+        on_commit(db, lambda: self.publish(topic, *keys))
+
+    def _receive(self, message: dict):
+        self.received += 1
+        self.latencies.append(max(0.0, time.time() - message["sent_at"]))
+        self._apply(message["topic"], message["keys"])
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        stats = {
+            "transport": self.transport.name,
+            "sent": self.sent,
+            "received": self.received,
+            "dropped": self.transport.dropped,
+        }
+        if latencies:
+            stats.update(
+                latency_p50_ms=round(_percentile(latencies, 0.5) * 1000, 2),
+                latency_p99_ms=round(_percentile(latencies, 0.99) * 1000, 2),
+                latency_max_ms=round(latencies[-1] * 1000, 2),
+            )
+        return stats
+
+    async def start(self, transport: str = settings.INVALIDATION_TRANSPORT, database_url: str = settings.DATABASE_URL):
+        if transport == "auto":
+            transport = "postgres" if database_url.startswith("postgresql") else "local"
+        if transport == "postgres":
+            self.transport = PostgresBroadcast(database_url, NOTIFY_CHANNEL, self._receive)
+        elif transport == "local":
+            directory = settings.INVALIDATION_SOCKET_DIR or default_socket_dir(NOTIFY_CHANNEL)
+            self.transport = LocalBroadcast(directory, self._receive)
+        elif transport == "none":
+            self.transport = NullBroadcast()
+        else:
+            raise ValueError(f"Unknown INVALIDATION_TRANSPORT {transport!r}")
+        await self.transport.start()
+
+    async def stop(self):
+        await self.transport.stop()
+        self.transport = NullBroadcast()
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,407 @@
+"""Background jobs stored in the database.
+
+Work that should not hold up a request (emails, webhook deliveries, the
+daily events maintenance) is a row in `jobs`, enqueued in the caller's
+transaction: a job exists exactly when the change behind it committed.
+
+Workers claim due jobs with FOR UPDATE SKIP LOCKED, so any number of
+them share the queues and never run a job twice at once. They run inside
+the app processes (JOB_WORKER_IN_APP) and/or as separate processes next
+to gunicorn:
+
+    python -m app.jobs                            # queues from JOB_QUEUES
+    python -m app.jobs --queues email:4,webhooks:8
+
+SQLite has no SKIP LOCKED. There the claiming UPDATE is atomic because
+SQLite has one writer at a time, which is enough for development.
+
+Handlers are registered with @job(name, queue=...) and called as
+`handler(db, payload)`, or `handler(db, payloads)` with `batch`. The
+handler's writes commit together with the job's removal.
+
+- Priority: higher runs first, then the earliest run_at.
+- Retries: an exception reschedules the job with exponential backoff and
+  full jitter until max_attempts, after which it stays in the table as
+  "failed" with its last error. Raise RetryJob(delay) to pick the delay.
+- Scheduling: enqueue(..., run_at=...) for one-off jobs. `every=` makes a
+  job periodic, run once per multiple of `every` seconds however many
+  workers there are (dedupe_key).
+- Concurrency: JOB_QUEUES sets concurrent handlers per queue, per worker.
+- A job still running after JOB_LOCK_TIMEOUT_SECONDS is presumed lost with
+  its worker and runs again (or fails, if that was its last attempt), so
+  handlers must tolerate a repeat.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import signal
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from uuid import uuid4
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal, dialect_insert, on_commit
+from app.models import Job
+
+# Modules whose @job handlers every worker loads
+HANDLER_MODULES = ("app.emails", "app.webhooks", "app.retention")
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class RetryJob(Exception):
+    """Raised by a handler to retry after `delay` seconds (still an attempt)."""
+
+    def __init__(self, reason: str, delay: float):
+        super().__init__(reason)
+        self.delay = delay
+
+
+@dataclass
+class JobSpec:
+    name: str
+    handler: Callable[..., Awaitable]
+    queue: str
+    max_attempts: int
+    backoff: float
+    backoff_max: float
+    batch: int | None
+    every: int | None
+
+
+handlers: dict[str, JobSpec] = {}
+
+
+def job(
+    name: str,
+    queue: str = "default",
+    max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+    backoff: float = settings.JOB_BACKOFF_SECONDS,
+    backoff_max: float = settings.JOB_BACKOFF_MAX_SECONDS,
+    batch: int | None = None,
+    every: int | None = None,
+):
+    def register(handler):
+        handlers[name] = JobSpec(name, handler, queue, max_attempts, backoff, backoff_max, batch, every)
+        return handler
+
+    return register
+
+
+def load_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def parse_queues(value: str) -> dict[str, int]:
+    """"email:4,webhooks:8" -> {"email": 4, "webhooks": 8}"""
+    queues = {}
+    for item in value.split(","):
+        name, _, concurrency = item.strip().partition(":")
+        if name:
+            queues[name] = int(concurrency or 1)
+    return queues
+
+
+# Wakes this process's workers when a job is committed, instead of
+# waiting for the next poll
+_wakeups: dict[str, set[asyncio.Event]] = {}
+
+
+def _wake(queue: str):
+    for event in _wakeups.get(queue, ()):
+        event.set()
+
+
+async def enqueue(
+    db: AsyncSession,
+    name: str,
+    payload: dict,
+    priority: int = 0,
+    run_at: datetime | None = None,
+    dedupe_key: str | None = None,
+):
+    """Add a job in `db`'s transaction. With `dedupe_key`, nothing is added
+    while a job with that key is still in the table."""
+    if name not in handlers:
+        load_handlers()
+    spec = handlers[name]
+    values = dict(
+        queue=spec.queue,
+        name=name,
+        payload=payload,
+        priority=priority,
+        status="queued",
+        run_at=run_at or datetime.utcnow(),
+        attempts=0,
+        max_attempts=spec.max_attempts,
+        dedupe_key=dedupe_key,
+        created_at=datetime.utcnow(),
+    )
+    if dedupe_key is None:
+        await db.execute(insert(Job).values(**values))
+    else:
+        await db.execute(dialect_insert(db, Job).values(**values).on_conflict_do_nothing(index_elements=["dedupe_key"]))
+    on_commit(db, lambda: _wake(spec.queue))
+
+
+async def schedule_periodic(db: AsyncSession, spec: JobSpec, now: datetime | None = None):
+    """Enqueue the next occurrence of a periodic job (at the next multiple of
+    `every` seconds), once across all workers."""
+    seconds = int(((now or datetime.utcnow()) - EPOCH).total_seconds())
+    next_run = EPOCH + timedelta(seconds=(seconds // spec.every + 1) * spec.every)
+    await enqueue(db, spec.name, {}, run_at=next_run, dedupe_key=f"{spec.name}@{next_run.isoformat()}")
+
+
+async def claim_jobs(db: AsyncSession, queue: str, limit: int, worker_id: str, name: str | None = None) -> list:
+    """Mark up to `limit` due jobs of `queue` (and `name`) as running; rows
+    of (id, name, payload, attempts, max_attempts)."""
+    now = datetime.utcnow()
+    due = select(Job.id).where(Job.queue == queue, Job.status == "queued", Job.run_at <= now)
+    if name is not None:
+        due = due.where(Job.name == name)
+    due = due.order_by(Job.priority.desc(), Job.run_at, Job.id).limit(limit).with_for_update(skip_locked=True)
+    result = await db.execute(
+        update(Job)
+        .where(Job.id.in_(due.scalar_subquery()))
+        .values(status="running", locked_at=now, locked_by=worker_id, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
+
+
+async def requeue_stale_jobs(db: AsyncSession, lock_timeout: float = settings.JOB_LOCK_TIMEOUT_SECONDS) -> int:
+    """Jobs whose worker stopped answering run again, unless that was their
+    last attempt: those are marked failed in the same UPDATE."""
+    out_of_attempts = Job.attempts >= Job.max_attempts
+    result = await db.execute(
+        update(Job)
+        .where(Job.status == "running", Job.locked_at < datetime.utcnow() - timedelta(seconds=lock_timeout))
+        .values(
+            status=case((out_of_attempts, "failed"), else_="queued"),
+            last_error=case((out_of_attempts, "Worker stopped responding"), else_=Job.last_error),
+            locked_at=None,
+            locked_by=None,
+        )
+        .returning(Job.name, Job.status)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    for name in {name for name, status in rows if status == "failed"}:
+        spec = handlers.get(name)
+        if spec is not None and spec.every:
+            # A failed occurrence doesn't cancel the schedule
+            await schedule_periodic(db, spec)
+    return len(rows)
+
+
+async def get_job_counts(db: AsyncSession) -> dict:
+    """{(queue, status): count} over the whole table."""
+    result = await db.execute(select(Job.queue, Job.status, func.count()).group_by(Job.queue, Job.status))
+    return {(queue, status): count for queue, status, count in result.all()}
+
+
+def name_is_batched(name: str) -> bool:
+    spec = handlers.get(name)
+    return spec is not None and bool(spec.batch)
+
+
+class JobWorker:
+    """Runs handlers for `queues` ({name: concurrency}) until stopped."""
+
+    def __init__(
+        self,
+        queues: dict[str, int],
+        session_factory=None,
+        poll_interval: float = settings.JOB_POLL_SECONDS,
+        lock_timeout: float = settings.JOB_LOCK_TIMEOUT_SECONDS,
+    ):
+        self.queues = queues
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.worker_id = f"{os.uname().nodename}-{os.getpid()}-{uuid4().hex[:6]}"
+        self.completed = 0
+        self.failed = 0
+        self._running: set[asyncio.Task] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        load_handlers()
+        async with self.session_factory() as db:
+            await requeue_stale_jobs(db, self.lock_timeout)
+            for spec in handlers.values():
+                if spec.every and spec.queue in self.queues:
+                    await schedule_periodic(db, spec)
+            await db.commit()
+        self._tasks = [asyncio.create_task(self._run_queue(queue, concurrency))
+                       for queue, concurrency in self.queues.items()]
+        self._tasks.append(asyncio.create_task(self._requeue_stale()))
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop claiming and give running handlers `timeout` seconds; jobs cut
+        short are requeued after the lock timeout."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._running:
+            _, unfinished = await asyncio.wait(self._running, timeout=timeout)
+            for task in unfinished:
+                task.cancel()
+
+    async def run_until_idle(self):
+        """Run until no job in this worker's queues is due (tests, benchmarks)."""
+        load_handlers()
+        while True:
+            claimed = 0
+            for queue, concurrency in self.queues.items():
+                claimed += await self._claim_and_start(queue, concurrency)
+            if self._running:
+                await asyncio.wait(self._running)
+            elif not claimed:
+                return
+
+    async def _claim_and_start(self, queue: str, concurrency: int) -> int:
+        free = concurrency - sum(1 for task in self._running if task.get_name() == queue)
+        if free <= 0:
+            return 0
+        async with self.session_factory() as db:
+            rows = await claim_jobs(db, queue, free, self.worker_id)
+            # A batch handler takes the rest of its batch in the same slot
+            for name in {row.name for row in rows if name_is_batched(row.name)}:
+                claimed = sum(1 for row in rows if row.name == name)
+                rows += await claim_jobs(db, queue, handlers[name].batch - claimed, self.worker_id, name)
+            await db.commit()
+        batches: dict[str, list] = {}
+        for row in rows:
+            if name_is_batched(row.name):
+                batches.setdefault(row.name, []).append(row)
+            else:
+                self._start(queue, handlers.get(row.name), row.name, [row])
+        for name, jobs in batches.items():
+            self._start(queue, handlers[name], name, jobs)
+        return len(rows)
+
+    def _start(self, queue: str, spec: JobSpec | None, name: str, jobs: list):
+        task = asyncio.create_task(self._execute(spec, name, jobs), name=queue)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_queue(self, queue: str, concurrency: int):
+        wakeup = asyncio.Event()
+        _wakeups.setdefault(queue, set()).add(wakeup)
+        try:
+            while True:
+                try:
+                    claimed = await self._claim_and_start(queue, concurrency)
+                except Exception as e:
+                    print(f"Claiming {queue} jobs failed: {e}")
+                    claimed = 0
+                if claimed:
+                    # Claim again as soon as a handler frees a slot
+                    running = [task for task in self._running if task.get_name() == queue]
+                    if len(running) >= concurrency:
+                        await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            _wakeups[queue].discard(wakeup)
+
+    async def _requeue_stale(self):
+        while True:
+            await asyncio.sleep(max(self.lock_timeout / 4, self.poll_interval))
+            try:
+                async with self.session_factory() as db:
+                    if await requeue_stale_jobs(db, self.lock_timeout):
+                        await db.commit()
+            except Exception as e:
+                print(f"Requeueing stale jobs failed: {e}")
+
+    async def _execute(self, spec: JobSpec | None, name: str, jobs: list):
+        ids = [job.id for job in jobs]
+        error, retry_delay = None, None
+        async with self.session_factory() as db:
+            try:
+                if spec is None:
+                    raise LookupError(f"No handler for job {name!r}")
+                if spec.batch:
+                    await spec.handler(db, [job.payload for job in jobs])
+                else:
+                    await spec.handler(db, jobs[0].payload)
+                await db.execute(delete(Job).where(Job.id.in_(ids)))
+                if spec.every:
+                    await schedule_periodic(db, spec)
+                await db.commit()
+                self.completed += len(jobs)
+                return
+            except asyncio.CancelledError:
+                raise
+            except RetryJob as e:
+                error, retry_delay = e, e.delay
+            except Exception as e:
+                error = e
+            await db.rollback()
+            try:
+                await self._record_failure(db, spec, jobs, error, retry_delay)
+            except Exception as e:
+                # The jobs run again once their lock times out
+                print(f"Recording failure of job {name} {ids} failed: {e}")
+
+    async def _record_failure(self, db: AsyncSession, spec: JobSpec | None, jobs: list, error: Exception,
+                              retry_delay: float | None):
+        message = f"{type(error).__name__}: {error}"
+        for job in jobs:
+            if spec is None or job.attempts >= job.max_attempts:
+                values = dict(status="failed", locked_at=None, locked_by=None, last_error=message)
+                print(f"Job {job.name} {job.id} failed after {job.attempts} attempts: {message}")
+                self.failed += 1
+            else:
+                delay = random.uniform(0, min(spec.backoff_max, spec.backoff * 2 ** (job.attempts - 1)))
+                if retry_delay is not None:
+                    delay = min(spec.backoff_max, max(delay, retry_delay))
+                values = dict(status="queued", locked_at=None, locked_by=None, last_error=message,
+                              run_at=datetime.utcnow() + timedelta(seconds=delay))
+            await db.execute(update(Job).where(Job.id == job.id).values(**values))
+        if spec is not None and spec.every and any(job.attempts >= job.max_attempts for job in jobs):
+            # A failed occurrence doesn't cancel the schedule
+            await schedule_periodic(db, spec)
+        await db.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run background jobs.")
+    parser.add_argument("--queues", default=settings.JOB_QUEUES, help='e.g. "email:4,webhooks:8"')
+    args = parser.parse_args()
+
+    from app.database import engine
+    from app.webhooks import webhook_sender
+
+    worker = JobWorker(parse_queues(args.queues))
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    await worker.start()
+    print(f"Job worker {worker.worker_id} running queues {worker.queues}")
+    await stopping.wait()
+    await worker.stop()
+    await webhook_sender.stop()
+    await engine.dispose()
+    print(f"Job worker {worker.worker_id} stopped: {worker.completed} completed, {worker.failed} failed")
+
+
+if __name__ == "__main__":
+    # Handlers register with app.jobs, not with this __main__ copy of it
+    from app.jobs import main
+    asyncio.run(main())
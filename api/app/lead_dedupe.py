@@ -0,0 +1,106 @@
+"""Merge duplicate leads (same owner, same normalized email) into one.
+
+For leads collected before repeat submissions were merged. Migration 010
+merges any that remain (with its own frozen copy of this logic) before it
+makes the normalized email unique, in the migration's one transaction. On a
+large `leads` table, run this job between migration 009, which adds the
+normalized column, and 010 instead:
+
+    alembic upgrade 009 && python -m app.lead_dedupe && alembic upgrade head
+
+Duplicate groups are found and merged DEDUPE_BATCH_SIZE at a time, each
+batch in its own transaction, so memory and lock time stay bounded however
+large `leads` is. The oldest lead of a group survives with the latest name,
+email and message, the summed submission count and every submission.
+"""
+import asyncio
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import delete, func, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.models import Lead, LeadSubmission
+
+DEDUPE_BATCH_SIZE = 500
+
+
+async def normalize_missing(engine: AsyncEngine, batch_size: int) -> int:
+    """Fill email_normalized for rows written by app versions predating it."""
+    statement = text("""
+        UPDATE leads SET email_normalized = lower(trim(email)), last_submitted_at = created_at
+        WHERE id IN (SELECT id FROM leads WHERE email_normalized IS NULL LIMIT :limit)
+    """)
+    total = 0
+    while True:
+        async with engine.begin() as conn:
+            updated = (await conn.execute(statement, {"limit": batch_size})).rowcount
+        total += updated
+        if updated < batch_size:
+            return total
+
+
+async def find_duplicate_groups(conn: AsyncConnection, after: tuple | None, limit: int) -> list[tuple[UUID, str]]:
+    query = (
+        select(Lead.owner_id, Lead.email_normalized)
+        .where(Lead.email_normalized.is_not(None))
+        .group_by(Lead.owner_id, Lead.email_normalized)
+        .having(func.count() > 1)
+        .order_by(Lead.owner_id, Lead.email_normalized)
+        .limit(limit)
+    )
+    if after:
+        query = query.where(tuple_(Lead.owner_id, Lead.email_normalized) > tuple_(*after))
+    return [tuple(row) for row in await conn.execute(query)]
+
+
+async def merge_group(conn: AsyncConnection, owner_id: UUID, email_normalized: str) -> int:
+    """Fold the group into its oldest lead; returns the number of leads removed."""
+    rows = (await conn.execute(
+        select(Lead.id, Lead.name, Lead.email, Lead.message, Lead.submission_count, Lead.created_at,
+               Lead.last_submitted_at)
+        .where(Lead.owner_id == owner_id, Lead.email_normalized == email_normalized)
+        .order_by(Lead.created_at, Lead.id)
+    )).all()
+    if len(rows) < 2:
+        return 0
+    keep, duplicates = rows[0], [row.id for row in rows[1:]]
+    by_recency = sorted(rows, key=lambda row: row.last_submitted_at or row.created_at or datetime.min)
+    latest = by_recency[-1]
+    await conn.execute(update(LeadSubmission).where(LeadSubmission.lead_id.in_(duplicates)).values(lead_id=keep.id))
+    await conn.execute(update(Lead).where(Lead.id == keep.id).values(
+        name=latest.name,
+        email=latest.email,
+        message=next((row.message for row in reversed(by_recency) if row.message), None),
+        submission_count=sum(row.submission_count or 1 for row in rows),
+        last_submitted_at=latest.last_submitted_at or latest.created_at,
+    ))
+    await conn.execute(delete(Lead).where(Lead.id.in_(duplicates)))
+    return len(duplicates)
+
+
+async def dedupe_leads(engine: AsyncEngine, batch_size: int = DEDUPE_BATCH_SIZE) -> dict:
+    stats = {"normalized": await normalize_missing(engine, batch_size * 20), "groups": 0, "removed": 0}
+    after = None
+    while True:
+        async with engine.begin() as conn:
+            groups = await find_duplicate_groups(conn, after, batch_size)
+            for owner_id, email_normalized in groups:
+                stats["removed"] += await merge_group(conn, owner_id, email_normalized)
+        stats["groups"] += len(groups)
+        if len(groups) < batch_size:
+            return stats
+        after = groups[-1]
+
+
+async def main():
+    from app.database import engine
+
+    stats = await dedupe_leads(engine)
+    await engine.dispose()
+    print(
+        f"Lead dedupe: normalized {stats['normalized']} emails, merged {stats['groups']} duplicate groups, "
+        f"removed {stats['removed']} leads"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
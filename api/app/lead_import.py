@@ -0,0 +1,209 @@
+"""Bulk lead import from CSV or JSON uploads.
+
+The upload is parsed as it arrives, so memory stays bounded by one batch
+whatever the file size. Rows are validated with LeadCreate, deduplicated by
+email (case-insensitive) against the owner's existing leads and earlier
+rows, and inserted IMPORT_BATCH_SIZE at a time, committing each batch (the
+import runs in its own session, not the request's).
+`import_leads` yields progress updates and per-row errors as it goes.
+
+CSV needs a header row; columns are matched by name (see COLUMN_ALIASES),
+so our own export imports as is. JSON may be an array of objects or one
+object per line (NDJSON).
+"""
+import codecs
+import csv
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator
+from uuid import UUID
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import leads
+from app.schemas import LeadCreate
+
+IMPORT_BATCH_SIZE = 1000
+# A single record (CSV row or JSON object) larger than this is malformed
+MAX_RECORD_CHARS = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+
+COLUMN_ALIASES = {
+    "name": "name", "full name": "name", "full_name": "name", "contact": "name",
+    "first name": "first_name", "first_name": "first_name", "firstname": "first_name",
+    "last name": "last_name", "last_name": "last_name", "lastname": "last_name",
+    "email": "email", "e-mail": "email", "email address": "email", "email_address": "email",
+    "message": "message", "notes": "message", "note": "message",
+    "created at": "created_at", "created_at": "created_at", "date": "created_at",
+}
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be parsed any further."""
+
+
+async def _decode(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        async for chunk in chunks:
+            if text := decoder.decode(chunk):
+                yield text
+        if text := decoder.decode(b"", final=True):
+            yield text
+    except UnicodeDecodeError:
+        raise ImportFormatError("The file is not UTF-8 encoded")
+
+
+async def csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict]]:
+    """(row number, row) for each data row; the header is row 1."""
+    buffer, pending, quotes = "", [], 0
+    header, row_number = None, 0
+
+    def complete_records(lines: list[str]) -> list[str]:
+        # A line ends a record once the quotes seen since the record began
+        # balance; escaped quotes ("") come in pairs and keep the parity
+        nonlocal pending, quotes
+        records = []
+        for line in lines:
+            pending.append(line)
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                records.append("\n".join(pending))
+                pending, quotes = [], 0
+        if sum(map(len, pending)) > MAX_RECORD_CHARS:
+            raise ImportFormatError(f"Unterminated quoted field after row {row_number}")
+        return records
+
+    async def lines():
+        nonlocal buffer
+        async for text in _decode(chunks):
+            *complete, buffer = (buffer + text).split("\n")
+            if len(buffer) > MAX_RECORD_CHARS:
+                raise ImportFormatError(f"Line too long after row {row_number}")
+            yield complete
+        yield [buffer] if buffer else []
+        if pending:
+            raise ImportFormatError(f"Unterminated quoted field after row {row_number}")
+
+    async for batch in lines():
+        for values in csv.reader(complete_records(batch)):
+            row_number += 1
+            if header is None:
+                header = [COLUMN_ALIASES.get(value.strip().lower()) for value in values]
+                if "email" not in header:
+                    raise ImportFormatError("The header row has no email column")
+                continue
+            if not any(value.strip() for value in values):
+                continue
+            yield row_number, {key: value for key, value in zip(header, values) if key}
+    if header is None:
+        raise ImportFormatError("The file is empty")
+
+
+async def json_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict]]:
+    """(position, object) for each object of a JSON array or NDJSON stream."""
+    decoder = json.JSONDecoder()
+    buffer, count = "", 0
+
+    async def texts():
+        async for text in _decode(chunks):
+            yield text, False
+        yield "", True
+
+    async for text, final in texts():
+        buffer += text
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n[],":
+                position += 1
+            if position == len(buffer):
+                break
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as exc:
+                if final:
+                    raise ImportFormatError(f"Invalid JSON after record {count}: {exc.msg}")
+                break  # incomplete; wait for more
+            count += 1
+            if isinstance(record, dict):
+                yield count, {COLUMN_ALIASES[key.strip().lower()]: value for key, value in record.items()
+                              if key.strip().lower() in COLUMN_ALIASES}
+            else:
+                yield count, {"_invalid": "expected an object"}
+        buffer = buffer[position:]
+        if len(buffer) > MAX_RECORD_CHARS:
+            raise ImportFormatError(f"Record {count + 1} is too large")
+
+
+def validate_record(record: dict) -> tuple[dict | None, str | None]:
+    """(lead values, None) or (None, error message)."""
+    if "_invalid" in record:
+        return None, record["_invalid"]
+    name = record.get("name") or " ".join(
+        str(part).strip() for part in (record.get("first_name"), record.get("last_name")) if part
+    )
+    try:
+        data = LeadCreate(name=str(name or "").strip(), email=str(record.get("email") or "").strip(),
+                          message=str(record.get("message") or "").strip() or None)
+    except ValidationError as exc:
+        return None, "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+    values = data.model_dump()
+    if created_at := record.get("created_at"):
+        try:
+            parsed = datetime.fromisoformat(str(created_at).strip())
+        except ValueError:
+            return None, f"created_at: not an ISO date ({created_at})"
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        values["created_at"] = parsed
+    return values, None
+
+
+async def _insert_batch(db: AsyncSession, owner_id: UUID, batch: list[dict], stats: dict):
+    unique = {}
+    for values in batch:
+        unique.setdefault(leads.normalize_email(values["email"]), values)
+    existing = await leads.get_existing_emails(db, owner_id, list(unique))
+    new = [values for email, values in unique.items() if email not in existing]
+    # Leads submitted or imported since the lookup are skipped by the insert
+    imported = await leads.bulk_create_leads(db, owner_id, new)
+    await db.commit()
+    stats["imported"] += imported
+    stats["duplicates"] += len(batch) - imported
+
+
+async def import_leads(db: AsyncSession, owner_id: UUID, records: AsyncIterator[tuple[int, dict]]) -> AsyncIterator[dict]:
+    """Import `records`, yielding {"type": "error"} for rejected rows (the
+    first MAX_REPORTED_ERRORS of them), {"type": "progress"} after each batch
+    and finally {"type": "done"} or, when the file is malformed or a batch
+    cannot be saved, {"type": "failed"}. Batches already committed stay
+    imported."""
+    stats = {"rows": 0, "imported": 0, "duplicates": 0, "errors": 0}
+    batch = []
+    try:
+        try:
+            async for row_number, record in records:
+                stats["rows"] += 1
+                values, error = validate_record(record)
+                if error:
+                    stats["errors"] += 1
+                    if stats["errors"] <= MAX_REPORTED_ERRORS:
+                        yield {"type": "error", "row": row_number, "error": error}
+                    continue
+                batch.append(values)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await _insert_batch(db, owner_id, batch, stats)
+                    batch = []
+                    yield {"type": "progress", **stats}
+            await _insert_batch(db, owner_id, batch, stats)
+        except ImportFormatError as exc:
+            if batch:
+                await _insert_batch(db, owner_id, batch, stats)
+            yield {"type": "failed", "error": str(exc), **stats}
+            return
+    except SQLAlchemyError as exc:
+        await db.rollback()
+        print(f"Lead import for {owner_id} failed: {exc}")
+        yield {"type": "failed", "error": "A batch of leads could not be saved", **stats}
+        return
+    yield {"type": "done", **stats}
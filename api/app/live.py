@@ -0,0 +1,166 @@
+"""Live dashboard updates over server-sent events.
+
+Committed leads and page view / click events are published to an
+in-process feed (crud.leads.submit_lead, crud.events.create_event via
+on_commit). Every open /dashboard/live stream for the owner receives them.
+Leads go out as they arrive. Views and clicks are summed and sent as
+`counts` deltas once per LIVE_FLUSH_SECONDS, so a busy page produces one
+message a second instead of one per hit.
+
+An idle connection costs a Subscriber (a short deque and an Event) plus
+its response task; one feed-wide ticker sends keep-alive comments rather
+than a timer per connection. A subscriber that falls LIVE_MAX_PENDING
+messages behind gets `resync` and is closed, and the page reloads.
+
+With several workers, LIVE_POSTGRES_FANOUT relays every message through
+Postgres LISTEN/NOTIFY, so a stream sees events handled by any worker.
+"""
+import asyncio
+from collections import Counter, deque
+from uuid import UUID
+from app.broadcast import PostgresBroadcast
+from app.config import settings
+from app.database import on_commit
+from app.responses import dumps
+
+NOTIFY_CHANNEL = "linkcrm_live"
+
+
+def sse_message(message: dict) -> bytes:
+    return b"event: " + message["type"].encode() + b"\ndata: " + dumps(message) + b"\n\n"
+
+
+class Subscriber:
+    __slots__ = ("owner_id", "pending", "wakeup", "closed")
+
+    def __init__(self, owner_id: UUID):
+        self.owner_id = owner_id
+        self.pending: deque[bytes] = deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def push(self, data: bytes):
+        if len(self.pending) >= settings.LIVE_MAX_PENDING:
+            self.pending.clear()
+            self.pending.append(sse_message({"type": "resync"}))
+            self.closed = True
+        elif not self.closed:
+            self.pending.append(data)
+        self.wakeup.set()
+
+
+class LiveFeed:
+    def __init__(self, flush_interval: float, heartbeat_interval: float, max_subscribers: int):
+        self.flush_interval = flush_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.max_subscribers = max_subscribers
+        self.subscribers: dict[UUID, set[Subscriber]] = {}
+        self.subscriber_count = 0
+        self.counts: dict[UUID, Counter] = {}
+        self.fanout: PostgresBroadcast | None = None
+        self._task: asyncio.Task | None = None
+
+    def wants(self, owner_id: UUID) -> bool:
+        # With fan-out the owner may be watching through another worker
+        return self.fanout is not None or owner_id in self.subscribers
+
+    def publish_on_commit(self, db, owner_id: UUID, message: dict):
+        if self.wants(owner_id):
+            on_commit(db, lambda: self.publish(owner_id, message))
+
+    def count_on_commit(self, db, owner_id: UUID, event_type: str):
+        if self.wants(owner_id):
+            on_commit(db, lambda: self.counts.setdefault(owner_id, Counter()).update((event_type,)))
+
+    def publish(self, owner_id: UUID, message: dict):
+        self.deliver(owner_id, message)
+        if self.fanout is not None:
+            self.fanout.send([str(owner_id), message])
+
+    def deliver(self, owner_id: UUID, message: dict):
+        """To this worker's subscribers only."""
+        subscribers = self.subscribers.get(owner_id)
+        if subscribers:
+            data = sse_message(message)
+            for subscriber in subscribers:
+                subscriber.push(data)
+
+    def _receive(self, item):
+        owner_id, message = item
+        self.deliver(UUID(owner_id), message)
+
+    def flush_counts(self):
+        counts, self.counts = self.counts, {}
+        for owner_id, counter in counts.items():
+            self.publish(owner_id, {"type": "counts", **counter})
+
+    def subscribe(self, owner_id: UUID) -> Subscriber | None:
+        """None when this worker already holds max_subscribers streams."""
+        if self.subscriber_count >= self.max_subscribers:
+            return None
+        subscriber = Subscriber(owner_id)
+        self.subscribers.setdefault(owner_id, set()).add(subscriber)
+        self.subscriber_count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self.subscribers.get(subscriber.owner_id)
+        if subscribers is None or subscriber not in subscribers:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.subscribers[subscriber.owner_id]
+        self.subscriber_count -= 1
+
+    async def stream(self, subscriber: Subscriber):
+        """The SSE body for one subscriber; ends on resync or feed stop."""
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                await subscriber.wakeup.wait()
+                subscriber.wakeup.clear()
+                while subscriber.pending:
+                    yield subscriber.pending.popleft()
+                if subscriber.closed:
+                    return
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def _tick(self):
+        heartbeat = b": ping\n\n"
+        since_heartbeat = 0.0
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush_counts()
+            since_heartbeat += self.flush_interval
+            if since_heartbeat >= self.heartbeat_interval:
+                since_heartbeat = 0.0
+                for subscribers in self.subscribers.values():
+                    for subscriber in subscribers:
+                        subscriber.push(heartbeat)
+
+    async def start(self, database_url: str | None = None):
+        if database_url is not None:
+            self.fanout = PostgresBroadcast(database_url, NOTIFY_CHANNEL, self._receive)
+            await self.fanout.start()
+        self._task = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.fanout is not None:
+            await self.fanout.stop()
+            self.fanout = None
+        # End open streams so workers can shut down; clients reconnect elsewhere
+        for subscribers in self.subscribers.values():
+            for subscriber in subscribers:
+                subscriber.closed = True
+                subscriber.wakeup.set()
+
+
+live_feed = LiveFeed(
+    flush_interval=settings.LIVE_FLUSH_SECONDS,
+    heartbeat_interval=settings.LIVE_HEARTBEAT_SECONDS,
+    max_subscribers=settings.LIVE_MAX_CONNECTIONS,
+)
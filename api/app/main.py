@@ -1,10 +1,52 @@
+import os
+import time
+
+_import_started = time.perf_counter()
+_import_pid = os.getpid()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import health, public, auth, dashboard, links, leads, redirects, payments
-from app.routers import profile
+from app.routers import profile, analytics, api_v1
+from app.assets import AssetFiles
+from app.config import settings
+from app.database import engine
+from app.invalidation import invalidation_bus
+from app.jobs import JobWorker, parse_queues
+from app.live import live_feed
+from app.middleware import CompressionMiddleware
+from app.templating import load_all, templates
+from app.visitors import visitor_sketches
+from app.webhooks import webhook_sender
+
 
-app = FastAPI(title="LinkCrm", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # Load templates per worker before serving so no request pays for it
+    load_all(templates.env)
+    preloaded = " (preloaded in master)" if os.getpid() != _import_pid else ""
+    print(f"Worker {os.getpid()} ready: imports {_import_ms:.0f} ms{preloaded}, "
+          f"templates {(time.perf_counter() - started) * 1000:.0f} ms")
+    await invalidation_bus.start()
+    # Separate workers (python -m app.jobs) can take over with JOB_WORKER_IN_APP=false
+    job_worker = JobWorker(parse_queues(settings.JOB_QUEUES)) if settings.JOB_WORKER_IN_APP else None
+    if job_worker is not None:
+        await job_worker.start()
+    fanout = settings.LIVE_POSTGRES_FANOUT and engine.dialect.name == "postgresql"
+    await live_feed.start(settings.DATABASE_URL if fanout else None)
+    await visitor_sketches.start()
+    yield
+    await live_feed.stop()
+    if job_worker is not None:
+        await job_worker.stop()
+    await webhook_sender.stop()
+    await invalidation_bus.stop()
+    await visitor_sketches.stop()
+
+
+app = FastAPI(title="LinkCrm", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,15 +55,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", AssetFiles(directory="app/static"), name="static")
 
 app.include_router(health.router)
 app.include_router(public.router)
 app.include_router(auth.router)
 app.include_router(dashboard.router)
+app.include_router(analytics.router)
 app.include_router(profile.router)
 app.include_router(links.router)
 app.include_router(leads.router)
 app.include_router(redirects.router)
 app.include_router(payments.router)
+app.include_router(api_v1.router)
+
+_import_ms = (time.perf_counter() - _import_started) * 1000
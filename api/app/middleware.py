@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.assets import _accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): ignore W/ prefixes
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+class CompressionMiddleware:
+    """Compresses text responses and answers conditional GETs.
+
+    Single-message bodies (template renders, JSON) get a weak ETag computed
+    from the uncompressed body; a matching If-None-Match turns the response
+    into a 304. Streaming bodies such as the CSV export are compressed chunk
+    by chunk and never buffered. Responses that already carry a
+    Content-Encoding (precompressed static files) pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "POST"):
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, scope, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, send: Send):
+        self.middleware = middleware
+        self.send_downstream = send
+        request_headers = Headers(scope=scope)
+        self.is_get = scope["method"] == "GET"
+        self.if_none_match = request_headers.get("if-none-match")
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            self.encoding = "br"
+        elif "gzip" in accepted:
+            self.encoding = "gzip"
+        else:
+            self.encoding = None
+        self.start_message: Message | None = None
+        self.passthrough = False
+        self.compressor = None
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        status = self.start_message["status"]
+        content_type = headers.get("content-type", "")
+        return (
+            200 <= status < 300
+            and status != 204
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            # A compressor per open event stream costs far more than it saves
+            and not content_type.startswith("text/event-stream")
+        )
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send_downstream(message)
+            return
+
+        if self.passthrough:
+            await self.send_downstream(message)
+            return
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        if self.compressor is None:
+            if not self._eligible(headers):
+                self.passthrough = True
+                await self.send_downstream(self.start_message)
+                await self.send_downstream(message)
+                return
+            if not message.get("more_body", False):
+                await self._send_complete(headers, message.get("body", b""))
+                return
+            await self._start_stream(headers)
+
+        await self._send_stream_chunk(message)
+
+    async def _send_complete(self, headers: MutableHeaders, body: bytes):
+        status = self.start_message["status"]
+        if self.is_get and status == 200 and "etag" not in headers:
+            headers["ETag"] = 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        headers.add_vary_header("Accept-Encoding")
+
+        if self.is_get and self.if_none_match and "etag" in headers and _etag_matches(self.if_none_match, headers["etag"]):
+            not_modified = MutableHeaders()
+            for name in ("etag", "vary", "cache-control", "content-location", "expires"):
+                if name in headers:
+                    not_modified[name] = headers[name]
+            await self.send_downstream({"type": "http.response.start", "status": 304, "headers": not_modified.raw})
+            await self.send_downstream({"type": "http.response.body", "body": b""})
+            return
+
+        if self.encoding and len(body) >= self.middleware.minimum_size:
+            if self.encoding == "br":
+                body = brotli.compress(body, quality=self.middleware.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=self.middleware.gzip_level)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+
+        await self.send_downstream(self.start_message)
+        await self.send_downstream({"type": "http.response.body", "body": body})
+
+    async def _start_stream(self, headers: MutableHeaders):
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoding is None:
+            self.passthrough = True
+            await self.send_downstream(self.start_message)
+            return
+        if self.encoding == "br":
+            self.compressor = brotli.Compressor(quality=self.middleware.brotli_quality)
+        else:
+            self.compressor = zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        headers["Content-Encoding"] = self.encoding
+        del headers["Content-Length"]
+        await self.send_downstream(self.start_message)
+
+    async def _send_stream_chunk(self, message: Message):
+        if self.passthrough:
+            await self.send_downstream(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoding == "br":
+            chunk = self.compressor.process(body) + (self.compressor.flush() if more_body else self.compressor.finish())
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        await self.send_downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
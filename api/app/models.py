@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Boolean, Integer, ForeignKey, DateTime, JSON
+from sqlalchemy import BigInteger, Column, String, Text, Boolean, Integer, ForeignKey, Date, DateTime, JSON, Index, LargeBinary, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -19,6 +19,9 @@ class Profile(Base):
     email_notifications = Column(Boolean, default=True)
     plan = Column(String(50), default="free")
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped by profile edits and link changes; static export regenerates
+    # pages changed since its last run (see app/static_export.py)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     link_page = relationship("LinkPage", back_populates="owner", uselist=False, cascade="all, delete-orphan")
     leads = relationship("Lead", back_populates="owner", cascade="all, delete-orphan")
@@ -43,6 +46,8 @@ class Link(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     page_id = Column(UUID(as_uuid=True), ForeignKey("link_pages.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Copy of page.owner_id so ownership checks and per-owner queries need no join
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String(200), nullable=False)
     url = Column(Text, nullable=False)
     position = Column(Integer, nullable=False, default=0, index=True)
@@ -59,10 +64,34 @@ class Lead(Base):
     owner_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(200), nullable=False)
     email = Column(String(255), nullable=False)
+    # lower(trim(email)): repeat submissions from one address merge into one
+    # lead (see crud.leads.submit_lead and app/lead_dedupe.py)
+    email_normalized = Column(String(255), nullable=False)
     message = Column(Text)
+    submission_count = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_submitted_at = Column(DateTime, default=datetime.utcnow)
     
     owner = relationship("Profile", back_populates="leads")
+    submissions = relationship("LeadSubmission", back_populates="lead", cascade="all, delete-orphan",
+                               order_by="LeadSubmission.created_at")
+    
+    __table_args__ = (
+        Index("uq_leads_owner_id_email_normalized", "owner_id", "email_normalized", unique=True),
+    )
+
+
+class LeadSubmission(Base):
+    """Each time a lead submitted the form (or was imported)."""
+    __tablename__ = "lead_submissions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    lead_id = Column(UUID(as_uuid=True), ForeignKey("leads.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(200), nullable=False)
+    message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    lead = relationship("Lead", back_populates="submissions")
 
 
 class Event(Base):
@@ -72,11 +101,48 @@ class Event(Base):
     owner_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
     page_id = Column(UUID(as_uuid=True), ForeignKey("link_pages.id", ondelete="CASCADE"), index=True)
     type = Column(String(50), nullable=False, index=True)
+    # Set for link_click events. No foreign key: deleting a link must not
+    # rewrite its whole click history.
+    link_id = Column(UUID(as_uuid=True))
     meta = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Partition key on Postgres (monthly ranges, see migration 003)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     
     owner = relationship("Profile", back_populates="events")
     page = relationship("LinkPage", back_populates="events")
+    
+    __table_args__ = (
+        Index("ix_events_link_id_created_at", "link_id", "created_at"),
+        Index("ix_events_owner_id_created_at", "owner_id", "created_at"),
+    )
+
+
+class EventRollup(Base):
+    """Daily event counts kept after raw events age out of retention."""
+    __tablename__ = "event_rollups"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    page_id = Column(UUID(as_uuid=True), ForeignKey("link_pages.id", ondelete="CASCADE"))
+    link_id = Column(UUID(as_uuid=True))
+    type = Column(String(50), nullable=False)
+    day = Column(Date, nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class VisitorSketch(Base):
+    """Per-owner, per-day HyperLogLog of hashed visitor fingerprints (see app.hll)."""
+    __tablename__ = "visitor_sketches"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    registers = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("owner_id", "day", name="uq_visitor_sketches_owner_id_day"),
+    )
 
 
 class Subscription(Base):
@@ -92,3 +158,58 @@ class Subscription(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     owner = relationship("Profile", back_populates="subscription")
+
+
+class WebhookEndpoint(Base):
+    """Where new leads are POSTed (see app/webhooks.py)."""
+    __tablename__ = "webhook_endpoints"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    url = Column(Text, nullable=False)
+    # HMAC key for the signature header, shown to the owner once
+    secret = Column(String(100), nullable=False)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RateLimitCounter(Base):
+    """Hits per key in the current and previous fixed window, shared by every
+    app instance (see app/shared_state.py)."""
+    __tablename__ = "rate_limit_counters"
+    
+    key = Column(String(255), primary_key=True)
+    # Unix seconds, a multiple of the window length
+    window_start = Column(BigInteger, nullable=False)
+    hits = Column(Integer, nullable=False)
+    previous_hits = Column(Integer, nullable=False)
+
+
+class Job(Base):
+    """A unit of background work (see app/jobs.py); deleted once it succeeds."""
+    __tablename__ = "jobs"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    queue = Column(String(50), nullable=False)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    # Higher runs first
+    priority = Column(Integer, nullable=False, default=0)
+    # queued, running or failed (out of attempts, kept for inspection)
+    status = Column(String(20), nullable=False, default="queued")
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    locked_at = Column(DateTime)
+    locked_by = Column(String(100))
+    last_error = Column(Text)
+    # At most one job per key, e.g. one per periodic occurrence
+    dedupe_key = Column(String(200), unique=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_jobs_due", "queue", priority.desc(), "run_at",
+              postgresql_where=text("status = 'queued'"), sqlite_where=text("status = 'queued'")),
+        Index("ix_jobs_running", "locked_at",
+              postgresql_where=text("status = 'running'"), sqlite_where=text("status = 'running'")),
+    )
@@ -1,28 +1,21 @@
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
-from typing import Dict
 from fastapi import Request, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.shared_state import shared_state
 
 
 class RateLimiter:
-    def __init__(self):
-        self.requests: Dict[str, deque] = defaultdict(deque)
+    """Per-key request limits, counted in app.shared_state so every worker
+    and node enforces the same limit."""
 
-    def check_rate_limit(self, key: str, max_requests: int, window_seconds: int):
-        now = datetime.utcnow()
-        cutoff = now - timedelta(seconds=window_seconds)
+    def __init__(self, state):
+        self.state = state
 
-        request_times = self.requests[key]
-        while request_times and request_times[0] < cutoff:
-            request_times.popleft()
-
-        if len(request_times) >= max_requests:
+    async def check_rate_limit(self, db: AsyncSession, key: str, max_requests: int, window_seconds: int):
+        if await self.state.hit(db, key, max_requests, window_seconds):
             raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
-        request_times.append(now)
-
 
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(shared_state)
 
 
 def get_client_ip(request: Request) -> str:
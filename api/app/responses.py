@@ -0,0 +1,33 @@
+import json
+from datetime import date, datetime
+from uuid import UUID
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder produces the same JSON, slower
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """JSON for plain dicts and lists that may hold UUIDs and datetimes."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """Renders content that is already JSON-shaped (row mappings, model_dump()
+    output) without FastAPI's jsonable_encoder pass or response_model
+    validation: return it directly from the endpoint."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,266 @@
+"""Event partition maintenance and retention.
+
+Runs once a day as the periodic "events.maintenance" job (app/jobs.py,
+every EVENTS_MAINTENANCE_EVERY_SECONDS), or from cron or a scheduled
+container with EVENTS_MAINTENANCE_EVERY_SECONDS=0:
+
+    python -m app.retention
+
+On Postgres `events` is range-partitioned by month (migration 003): the job
+creates upcoming partitions, rolls expired days up into `event_rollups` and
+drops whole partitions once they fall out of the retention window. Other
+databases get the same rollups followed by deletes in bounded batches.
+"""
+import asyncio
+import csv
+import gzip
+import os
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import DateTime, column, delete, func, insert, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.config import settings
+from app.jobs import job
+from app.models import Event, EventRollup
+
+EXPORT_COLUMNS = ["id", "owner_id", "page_id", "link_id", "type", "meta", "created_at"]
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"events_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> date | None:
+    if not name.startswith("events_p") or len(name) != 14:
+        return None
+    try:
+        return datetime.strptime(name[len("events_p"):], "%Y%m").date()
+    except ValueError:
+        return None
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = 'events' AND relkind = 'p'")
+    )
+    return result.scalar() is not None
+
+
+async def list_partitions(conn: AsyncConnection) -> list[str]:
+    result = await conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'events'
+        ORDER BY child.relname
+    """))
+    return list(result.scalars())
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int, today: date | None = None) -> dict[str, int]:
+    """Create monthly partitions from the current month up to `months_ahead`;
+    returns {created partition: rows moved into it}.
+
+    Events for a month with no partition yet land in events_default, and
+    Postgres refuses to create a partition while the default one holds rows
+    in its range. Those rows are moved into the new partition, with the
+    default partition detached meanwhile, so a run that comes late still
+    succeeds."""
+    current = (today or datetime.utcnow().date()).replace(day=1)
+    existing = set(await list_partitions(conn))
+    created = {}
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        create = text(f"CREATE TABLE {name} PARTITION OF events FOR VALUES FROM ('{start}') TO ('{end}')")
+        in_range = f"created_at >= '{start}' AND created_at < '{end}'"
+        stranded = "events_default" in existing and (
+            await conn.execute(text(f"SELECT 1 FROM events_default WHERE {in_range} LIMIT 1"))
+        ).first() is not None
+        if not stranded:
+            await conn.execute(create)
+            created[name] = 0
+        else:
+            await conn.execute(text("ALTER TABLE events DETACH PARTITION events_default"))
+            await conn.execute(create)
+            moved = await conn.execute(text(f"INSERT INTO {name} SELECT * FROM events_default WHERE {in_range}"))
+            await conn.execute(text(f"DELETE FROM events_default WHERE {in_range}"))
+            await conn.execute(text("ALTER TABLE events ATTACH PARTITION events_default DEFAULT"))
+            created[name] = moved.rowcount
+    return created
+
+
+async def rollup_events(conn: AsyncConnection, until: date) -> int:
+    """Aggregate every not-yet-rolled-up day before `until` into event_rollups.
+
+    Days are rolled up exactly once: the latest rollup day is the watermark,
+    so re-running after a partial purge never recounts a half-deleted day.
+    """
+    last_day = (await conn.execute(select(func.max(EventRollup.day)))).scalar()
+    if last_day is not None:
+        day = last_day + timedelta(days=1)
+    else:
+        first_event = (await conn.execute(select(func.min(Event.created_at)))).scalar()
+        if first_event is None:
+            return 0
+        day = first_event.date()
+
+    rows_written = 0
+    while day < until:
+        start = datetime.combine(day, time.min)
+        result = await conn.execute(
+            select(Event.owner_id, Event.page_id, Event.link_id, Event.type, func.count(Event.id))
+            .where(Event.created_at >= start)
+            .where(Event.created_at < start + timedelta(days=1))
+            .group_by(Event.owner_id, Event.page_id, Event.link_id, Event.type)
+        )
+        rows = [
+            {"owner_id": owner_id, "page_id": page_id, "link_id": link_id, "type": type_, "day": day, "count": count}
+            for owner_id, page_id, link_id, type_, count in result
+        ]
+        if rows:
+            await conn.execute(insert(EventRollup), rows)
+            rows_written += len(rows)
+        day += timedelta(days=1)
+    return rows_written
+
+
+async def export_events(conn: AsyncConnection, query, path: str) -> int:
+    """Stream the rows of `query` into a gzipped CSV file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = 0
+    with gzip.open(path, "wt", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(EXPORT_COLUMNS)
+        result = await conn.stream(query)
+        async for row in result:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+async def delete_events_before(engine: AsyncEngine, cutoff: datetime, batch_size: int, table_name: str = "events") -> int:
+    """Delete events older than `cutoff`, one short transaction per batch."""
+    events = table(table_name, column("id", Event.id.type), column("created_at", DateTime))
+    deleted = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                delete(events).where(
+                    events.c.id.in_(
+                        select(events.c.id).where(events.c.created_at < cutoff).limit(batch_size)
+                    )
+                )
+            )
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def purge_events(
+    engine: AsyncEngine,
+    retention_days: int | None = None,
+    archive_dir: str | None = None,
+    batch_size: int | None = None,
+    today: date | None = None,
+) -> dict:
+    retention_days = settings.EVENTS_RETENTION_DAYS if retention_days is None else retention_days
+    archive_dir = settings.EVENTS_ARCHIVE_DIR if archive_dir is None else archive_dir
+    batch_size = batch_size or settings.EVENTS_PURGE_BATCH_SIZE
+    if retention_days < 30:
+        raise ValueError("Event retention must cover the 30-day dashboard window")
+
+    cutoff_day = (today or datetime.utcnow().date()) - timedelta(days=retention_days)
+    cutoff = datetime.combine(cutoff_day, time.min)
+    stats = {"rollup_rows": 0, "dropped_partitions": [], "deleted_rows": 0, "exported_rows": 0}
+
+    async with engine.begin() as conn:
+        stats["rollup_rows"] = await rollup_events(conn, cutoff_day)
+        partitioned = await is_partitioned(conn)
+        partitions = await list_partitions(conn) if partitioned else []
+
+    if partitioned:
+        for name in partitions:
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > cutoff_day:
+                continue
+            async with engine.begin() as conn:
+                if archive_dir:
+                    stats["exported_rows"] += await export_events(
+                        conn,
+                        text(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM {name}"),
+                        os.path.join(archive_dir, f"{name}.csv.gz"),
+                    )
+                await conn.execute(text(f"DROP TABLE {name}"))
+            stats["dropped_partitions"].append(name)
+        # Whatever landed in the default partition is trimmed row by row
+        stats["deleted_rows"] = await delete_events_before(engine, cutoff, batch_size, table_name="events_default")
+        return stats
+
+    if archive_dir:
+        async with engine.connect() as conn:
+            stats["exported_rows"] = await export_events(
+                conn,
+                select(*(getattr(Event, column) for column in EXPORT_COLUMNS)).where(Event.created_at < cutoff),
+                os.path.join(archive_dir, f"events-before-{cutoff_day.isoformat()}.csv.gz"),
+            )
+    stats["deleted_rows"] = await delete_events_before(engine, cutoff, batch_size)
+    return stats
+
+
+async def run_maintenance(engine: AsyncEngine) -> dict:
+    async with engine.begin() as conn:
+        created = await ensure_partitions(conn, settings.EVENTS_PARTITIONS_AHEAD) if await is_partitioned(conn) else {}
+    stats = await purge_events(engine)
+    stats["created_partitions"] = list(created)
+    stats["moved_default_rows"] = sum(created.values())
+    return stats
+
+
+async def run_scheduled_maintenance(engine: AsyncEngine) -> dict | None:
+    """run_maintenance() plus idle counter cleanup, or None when another
+    node is already at it."""
+    from app.shared_state import cluster_lock, purge_counters
+
+    # Every node may schedule the job; one run at a time does the work
+    async with cluster_lock(engine, "linkcrm-retention") as acquired:
+        if not acquired:
+            print("Events maintenance is already running on another node")
+            return None
+        stats = await run_maintenance(engine)
+        stats["purged_counters"] = await purge_counters(engine)
+    print(
+        f"Events maintenance: created {len(stats['created_partitions'])} partitions "
+        f"(moved {stats['moved_default_rows']} rows out of events_default), "
+        f"rolled up {stats['rollup_rows']} rows, dropped {len(stats['dropped_partitions'])} partitions, "
+        f"deleted {stats['deleted_rows']} rows, exported {stats['exported_rows']} rows, "
+        f"purged {stats['purged_counters']} idle rate limit counters"
+    )
+    return stats
+
+
+@job("events.maintenance", queue="maintenance", max_attempts=3,
+     every=settings.EVENTS_MAINTENANCE_EVERY_SECONDS or None)
+async def maintenance_job(db, payload: dict):
+    await run_scheduled_maintenance(db.bind)
+
+
+async def main():
+    from app.database import engine
+
+    await run_scheduled_maintenance(engine)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
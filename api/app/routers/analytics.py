@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.deps import get_db, get_current_user
+from app.models import Profile
+from app.crud import events, links
+from app.cache import TTLCache
+
+router = APIRouter(prefix="/dashboard/analytics", tags=["analytics"])
+
+MAX_BUCKETS = 2000
+
+# Rows for closed buckets keyed by (owner, start, closed_until, granularity).
+# Closed buckets never change; once the open bucket closes, closed_until moves
+# on and requests miss into a fresh entry while the old one ages out.
+series_cache = TTLCache(maxsize=2048, ttl=3600)
+
+
+async def _closed_series(db: AsyncSession, owner_id, start: datetime, closed_until: datetime, granularity: str) -> list:
+    if start >= closed_until:
+        return []
+    key = (owner_id, start, closed_until, granularity)
+    rows = series_cache.get(key)
+    if rows is None:
+        rows = await events.get_event_series(db, owner_id, start, closed_until, granularity)
+        series_cache.set(key, rows)
+    return rows
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("")
+async def analytics_series(
+    start: datetime = Query(None),
+    end: datetime = Query(None),
+    granularity: str = Query("day"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_current_user)
+):
+    if granularity not in events.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+    step = events.GRANULARITIES[granularity]
+
+    start, end = _as_utc(start), _as_utc(end)
+    # The bucket containing `end` is included, so the range is [start, end + step)
+    now = datetime.utcnow()
+    end = events.bucket_start(end or now, granularity) + step
+    start = events.bucket_start(start or end - timedelta(days=30), granularity)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / step > MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range exceeds {MAX_BUCKETS} buckets")
+
+    link_page = await links.get_link_page(db, current_user.id)
+    if link_page is None:
+        raise HTTPException(status_code=404, detail="Link page not found")
+
+    open_start = events.bucket_start(now, granularity)
+    closed_until = min(end, max(start, open_start))
+    rows = list(await _closed_series(db, current_user.id, start, closed_until, granularity))
+    if end > closed_until:
+        rows += await events.get_event_series(db, current_user.id, closed_until, end, granularity)
+
+    buckets = {}
+    bucket = start
+    while bucket < end:
+        buckets[bucket] = {"start": bucket.isoformat(), "page_views": 0, "clicks": 0, "link_clicks": {}}
+        bucket += step
+    for bucket, type_, link_id, count in rows:
+        entry = buckets.get(bucket)
+        if entry is None:
+            continue
+        if type_ == "page_view":
+            entry["page_views"] += count
+        elif type_ == "link_click":
+            entry["clicks"] += count
+            if link_id is not None:
+                entry["link_clicks"][str(link_id)] = entry["link_clicks"].get(str(link_id), 0) + count
+
+    return {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "links": [{"id": str(link.id), "title": link.title} for link in await links.get_links(db, link_page.id)],
+        "buckets": list(buckets.values()),
+    }
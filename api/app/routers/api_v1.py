@@ -0,0 +1,176 @@
+"""JSON API for apps and integrations.
+
+List endpoints select plain columns and hand the rows straight to
+FastJSONResponse (orjson when installed), skipping ORM objects,
+jsonable_encoder and response validation; `response_model` only documents
+the shape. Single objects go through their schema's model_dump().
+"""
+from datetime import datetime
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.crud import events, leads, links, visitors, webhooks
+from app.deps import get_db, get_api_user, api_csrf_protect
+from app.models import Profile
+from app.responses import FastJSONResponse
+from app.routers.links import get_link_limit
+from app.schemas import (
+    LeadPage, LinkCreate, LinkOut, LinkReorder, LinkUpdate, StatsOut,
+    WebhookEndpointCreate, WebhookEndpointCreated, WebhookEndpointOut,
+)
+from app.webhooks import check_endpoint_url
+
+router = APIRouter(prefix="/api/v1", tags=["api"], default_response_class=FastJSONResponse)
+
+MAX_PAGE_SIZE = 10000
+
+
+def _link_json(link) -> dict:
+    return LinkOut.model_validate(link).model_dump(mode="json")
+
+
+def _parse_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, lead_id = cursor.split("_")
+        return datetime.fromisoformat(created_at), UUID(lead_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/links", response_model=list[LinkOut])
+async def list_links(
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    return FastJSONResponse(await links.get_link_rows(db, current_user.id))
+
+
+@router.post("/links", response_model=LinkOut, status_code=201, dependencies=[Depends(api_csrf_protect)])
+async def create_link(
+    data: LinkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    link_page = await links.get_link_page(db, current_user.id)
+    link_limit = get_link_limit(current_user.plan)
+    if link_limit is not None and len(await links.get_links(db, link_page.id)) >= link_limit:
+        raise HTTPException(status_code=403, detail=f"The {current_user.plan} plan allows {link_limit} links")
+    link = await links.create_link(db, link_page, data)
+    return FastJSONResponse(_link_json(link), status_code=201)
+
+
+@router.post("/links/reorder", status_code=204, dependencies=[Depends(api_csrf_protect)])
+async def reorder_links(
+    data: LinkReorder,
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    await links.reorder_links(db, current_user.id, data.link_ids)
+    return Response(status_code=204)
+
+
+@router.patch("/links/{link_id}", response_model=LinkOut, dependencies=[Depends(api_csrf_protect)])
+async def update_link(
+    link_id: UUID,
+    data: LinkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    if data.model_fields_set:
+        link = await links.update_link(db, current_user.id, link_id, data)
+    else:
+        link = await links.get_link(db, link_id)
+        link = link if link and link.owner_id == current_user.id else None
+    if link is None:
+        raise HTTPException(status_code=404, detail="Link not found")
+    return FastJSONResponse(_link_json(link))
+
+
+@router.delete("/links/{link_id}", status_code=204, dependencies=[Depends(api_csrf_protect)])
+async def delete_link(
+    link_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    if not await links.delete_link(db, current_user.id, link_id):
+        raise HTTPException(status_code=404, detail="Link not found")
+    return Response(status_code=204)
+
+
+@router.get("/leads", response_model=LeadPage)
+async def list_leads(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    email: str = Query(None),
+    date_from: datetime = Query(None),
+    date_to: datetime = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    after = _parse_cursor(cursor) if cursor else None
+    rows = await leads.get_lead_rows(db, current_user.id, limit, after, email, date_from, date_to)
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = f"{last['created_at'].isoformat()}_{last['id']}"
+    return FastJSONResponse({"leads": rows, "next_cursor": next_cursor})
+
+
+@router.get("/stats", response_model=StatsOut)
+async def stats(
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    clicks_per_link = await events.get_clicks_per_link(db, current_user.id, days)
+    return FastJSONResponse({
+        "days": days,
+        "page_views": await events.get_page_views_count(db, current_user.id, days),
+        "link_clicks": await events.get_link_clicks_count(db, current_user.id, days),
+        "unique_visitors": await visitors.get_unique_visitors_count(db, current_user.id, days),
+        "leads": await leads.count_leads(db, current_user.id),
+        "clicks_per_link": {str(link_id): count for link_id, count in clicks_per_link.items()},
+    })
+
+
+@router.get("/webhooks", response_model=list[WebhookEndpointOut])
+async def list_webhooks(
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    endpoints = await webhooks.get_webhook_endpoints(db, current_user.id)
+    return FastJSONResponse([WebhookEndpointOut.model_validate(e).model_dump(mode="json") for e in endpoints])
+
+
+@router.post("/webhooks", response_model=WebhookEndpointCreated, status_code=201,
+             dependencies=[Depends(api_csrf_protect)])
+async def create_webhook(
+    data: WebhookEndpointCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    """New leads are POSTed to the URL, signed with the returned secret
+    (see app/webhooks.py). Pro plan only."""
+    if current_user.plan != "pro":
+        raise HTTPException(status_code=403, detail="Webhooks are available on the pro plan")
+    url = str(data.url)
+    try:
+        await check_endpoint_url(url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if await webhooks.count_webhook_endpoints(db, current_user.id) >= settings.WEBHOOK_MAX_ENDPOINTS:
+        raise HTTPException(status_code=403, detail=f"At most {settings.WEBHOOK_MAX_ENDPOINTS} webhooks")
+    endpoint = await webhooks.create_webhook_endpoint(db, current_user.id, url)
+    return FastJSONResponse(WebhookEndpointCreated.model_validate(endpoint).model_dump(mode="json"), status_code=201)
+
+
+@router.delete("/webhooks/{endpoint_id}", status_code=204, dependencies=[Depends(api_csrf_protect)])
+async def delete_webhook(
+    endpoint_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Profile = Depends(get_api_user)
+):
+    if not await webhooks.delete_webhook_endpoint(db, current_user.id, endpoint_id):
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    return Response(status_code=204)
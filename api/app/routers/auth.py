@@ -1,7 +1,6 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, Request, Response, Form, HTTPException, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db
 from app.crud import profiles
@@ -14,11 +13,11 @@ from app.security import (
     create_password_reset_token,
     verify_password_reset_token,
 )
-from app.emails import send_password_reset
+from app.jobs import enqueue
 from app.config import settings
+from app.templating import templates
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/login", response_class=HTMLResponse)
@@ -106,7 +105,8 @@ async def forgot_password(
     if profile and profile.password_hash:
         token = create_password_reset_token(profile.email)
         reset_url = f"{settings.SERVER_URL}/auth/reset-password?token={token}"
-        await send_password_reset(profile.email, reset_url)
+        # Queued ahead of other mail; the response no longer waits on SMTP
+        await enqueue(db, "emails.password_reset", {"to": profile.email, "url": reset_url}, priority=10)
     return RedirectResponse(url="/auth/forgot-password?status=sent", status_code=303)
 
 
@@ -157,7 +157,6 @@ async def reset_password(
         )
 
     profile.password_hash = hash_password(password)
-    await db.commit()
 
     session_token = create_session_token(str(profile.id))
     redirect = RedirectResponse(url="/dashboard", status_code=303)
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from typing import Optional
+from fastapi import APIRouter, Cookie, Depends, Request, Form
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
 from app.deps import get_db, get_current_user, csrf_protect
 from app.models import Profile
-from app.crud import events, leads, profiles
+from app.crud import events, leads, profiles, visitors
+from app.live import live_feed
 from app.security import generate_csrf_token
 from app.config import settings
+from app.templating import templates
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("", response_class=HTMLResponse)
@@ -20,7 +22,8 @@ async def dashboard_home(
 ):
     page_views = await events.get_page_views_count(db, current_user.id)
     link_clicks = await events.get_link_clicks_count(db, current_user.id)
-    recent_leads = await leads.get_leads(db, current_user.id)
+    unique_visitors = await visitors.get_unique_visitors_count(db, current_user.id)
+    recent_leads = await leads.get_leads(db, current_user.id, limit=5)
 
     # Determine upgrade URL based on current plan
     upgrade_url = None
@@ -34,12 +37,33 @@ async def dashboard_home(
         "current_user": current_user,
         "page_views": page_views,
         "link_clicks": link_clicks,
-        "recent_leads": recent_leads[:5],
+        "unique_visitors": unique_visitors,
+        "recent_leads": recent_leads,
         "upgrade_url": upgrade_url,
         "csrf_token": generate_csrf_token()
     })
 
 
+@router.get("/live")
+async def live_updates(session_cookie: Optional[str] = Cookie(None, alias="session")):
+    """Server-sent events for the dashboard: `lead` when a lead comes in,
+    `counts` with new page views and clicks (see app/live.py).
+
+    Authenticates with its own short session rather than get_db: a yield
+    dependency may stay open until the response finishes (FastAPI 0.118+),
+    and a stream would hold a pooled connection for as long as it is open."""
+    async with AsyncSessionLocal() as db:
+        current_user = await get_current_user(db, session_cookie)
+    subscriber = live_feed.subscribe(current_user.id)
+    if subscriber is None:
+        return Response(status_code=503, headers={"Retry-After": "30"})
+    return StreamingResponse(
+        live_feed.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/switch-plan", dependencies=[Depends(csrf_protect)])
 async def switch_plan(
     plan: str = Form(...),
@@ -51,6 +75,5 @@ async def switch_plan(
         return RedirectResponse(url="/dashboard?error=invalid_plan", status_code=303)
 
     current_user.plan = plan
-    await db.commit()
 
     return RedirectResponse(url="/dashboard?success=plan_changed", status_code=303)
\ No newline at end of file
@@ -1,4 +1,9 @@
-from fastapi import APIRouter
+import os
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.deps import get_db
+from app.invalidation import invalidation_bus
+from app.jobs import get_job_counts
 
 router = APIRouter()
 
@@ -6,3 +11,18 @@ router = APIRouter()
 @router.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@router.get("/health/invalidation")
+async def invalidation_stats():
+    """This worker's cache invalidation traffic and delivery latency."""
+    return {"worker": os.getpid(), **invalidation_bus.stats()}
+
+
+@router.get("/health/jobs")
+async def job_stats(db: AsyncSession = Depends(get_db)):
+    """Background jobs per queue and status, across all workers."""
+    queues: dict[str, dict] = {}
+    for (queue, status), count in (await get_job_counts(db)).items():
+        queues.setdefault(queue, {})[status] = count
+    return {"queues": queues}
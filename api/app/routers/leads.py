@@ -1,17 +1,20 @@
 import csv
 import io
+import json
 from datetime import datetime
-from fastapi import APIRouter, Depends, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from fastapi.responses import HTMLResponse, StreamingResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.deps import get_db, get_current_user
+from starlette.requests import ClientDisconnect
+from app.database import AsyncSessionLocal
+from app.deps import get_db, get_current_user, csrf_protect
 from app.models import Profile
 from app.crud import leads
+from app import lead_import
 from app.security import generate_csrf_token
+from app.templating import templates
 
 router = APIRouter(prefix="/dashboard/leads", tags=["leads"])
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("", response_class=HTMLResponse)
@@ -45,14 +48,16 @@ async def export_leads(
     
     output = io.StringIO()
     writer = csv.writer(output)
-    writer.writerow(["Name", "Email", "Message", "Created At"])
+    writer.writerow(["Name", "Email", "Message", "Created At", "Submissions", "Last Submitted At"])
     
     for lead in all_leads:
         writer.writerow([
             lead.name,
             lead.email,
             lead.message or "",
-            lead.created_at.isoformat()
+            lead.created_at.isoformat(),
+            lead.submission_count,
+            lead.last_submitted_at.isoformat() if lead.last_submitted_at else ""
         ])
     
     output.seek(0)
@@ -61,4 +66,41 @@ async def export_leads(
         iter([output.getvalue()]),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=leads.csv"}
-    )
\ No newline at end of file
+    )
+
+
+class UploadProgressResponse(StreamingResponse):
+    """Streams while the request body is still being read. StreamingResponse
+    would otherwise listen for disconnects on `receive` (on servers older
+    than ASGI spec 2.4) and swallow the upload's body messages."""
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+
+@router.post("/import", dependencies=[Depends(csrf_protect)])
+async def import_leads(
+    request: Request,
+    current_user: Profile = Depends(get_current_user)
+):
+    """Import leads from the raw request body (text/csv, application/json or
+    application/x-ndjson), answering with one JSON progress object per line."""
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        records = lead_import.csv_records(request.stream())
+    elif "json" in content_type:
+        records = lead_import.json_records(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail="Upload a CSV or JSON file")
+    owner_id = current_user.id
+
+    async def progress():
+        # Own session: the request's is closed before the response streams
+        async with AsyncSessionLocal() as db:
+            async for update in lead_import.import_leads(db, owner_id, records):
+                yield json.dumps(update) + "\n"
+
+    return UploadProgressResponse(progress(), media_type="application/x-ndjson")
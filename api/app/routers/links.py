@@ -1,16 +1,15 @@
 from uuid import UUID
 from fastapi import APIRouter, Depends, Request, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db, get_current_user, csrf_protect
 from app.models import Profile
 from app.schemas import LinkCreate, LinkUpdate, LinkReorder
 from app.crud import links
 from app.security import generate_csrf_token
+from app.templating import templates
 
 router = APIRouter(prefix="/dashboard/links", tags=["links"])
-templates = Jinja2Templates(directory="app/templates")
 
 # Plan limits
 PLAN_LIMITS = {
@@ -64,7 +63,7 @@ async def create_link(
         )
 
     link_data = LinkCreate(title=title, url=url)
-    await links.create_link(db, link_page.id, link_data)
+    await links.create_link(db, link_page, link_data)
 
     return RedirectResponse(url="/dashboard/links?success=created", status_code=303)
 
@@ -75,7 +74,7 @@ async def reorder_links_route(
     db: AsyncSession = Depends(get_db),
     current_user: Profile = Depends(get_current_user)
 ):
-    await links.reorder_links(db, data.link_ids)
+    await links.reorder_links(db, current_user.id, data.link_ids)
     return {"message": "Links reordered"}
 
 
@@ -88,10 +87,6 @@ async def update_link_route(
     db: AsyncSession = Depends(get_db),
     current_user: Profile = Depends(get_current_user)
 ):
-    link = await links.get_link(db, link_id)
-    if not link or link.page.owner_id != current_user.id:
-        return RedirectResponse(url="/dashboard/links", status_code=303)
-    
     update_data = LinkUpdate()
     if title:
         update_data.title = title
@@ -100,7 +95,7 @@ async def update_link_route(
     if is_active is not None:
         update_data.is_active = is_active
     
-    await links.update_link(db, link, update_data)
+    await links.update_link(db, current_user.id, link_id, update_data)
     
     return RedirectResponse(url="/dashboard/links", status_code=303)
 
@@ -111,8 +106,6 @@ async def delete_link_route(
     db: AsyncSession = Depends(get_db),
     current_user: Profile = Depends(get_current_user)
 ):
-    link = await links.get_link(db, link_id)
-    if link and link.page.owner_id == current_user.id:
-        await links.delete_link(db, link)
+    await links.delete_link(db, current_user.id, link_id)
     
     return RedirectResponse(url="/dashboard/links", status_code=303)
\ No newline at end of file
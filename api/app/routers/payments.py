@@ -17,7 +17,7 @@ async def lemonsqueezy_webhook(
     db: AsyncSession = Depends(get_db)
 ):
     client_ip = get_client_ip(request)
-    rate_limiter.check_rate_limit(f"webhook:{client_ip}", max_requests=30, window_seconds=60)
+    await rate_limiter.check_rate_limit(db, f"webhook:{client_ip}", max_requests=30, window_seconds=60)
     
     signature = request.headers.get("X-Signature")
     if not signature or not settings.LEMONSQUEEZY_WEBHOOK_SECRET:
@@ -71,6 +71,5 @@ async def lemonsqueezy_webhook(
     )
     
     profile.plan = plan if status == "active" else "free"
-    await db.commit()
     
     return {"status": "processed"}
\ No newline at end of file
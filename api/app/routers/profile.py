@@ -1,15 +1,14 @@
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db, get_current_user, csrf_protect
 from app.models import Profile
 from app.schemas import ProfileUpdate
 from app.crud import profiles
 from app.security import generate_csrf_token
+from app.templating import templates
 
 router = APIRouter(prefix="/dashboard/profile", tags=["profile"])
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("", response_class=HTMLResponse)
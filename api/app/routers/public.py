@@ -1,16 +1,29 @@
-from fastapi import APIRouter, Depends, Request
+from uuid import UUID
+from fastapi import APIRouter, Depends, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db, get_current_user_optional
 from app.models import Profile
 from app.schemas import LeadCreate, EventCreate
 from app.crud import profiles, links, leads, events
-from app.emails import send_lead_alert
+from app.jobs import enqueue
 from app.rate_limit import rate_limiter, get_client_ip
+from app.visitors import visitor_sketches
+from app.bot_filter import classify_request
+from app.templating import templates
+from app.cache import TTLCache
+from app.config import settings
+from app.invalidation import invalidation_bus
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+# The public page of a handle: handle -> (owner_id, page_id), and
+# str(owner_id) -> rendered HTML. Profile and link writes drop entries in
+# every worker through the invalidation bus.
+page_owners = TTLCache(maxsize=settings.PUBLIC_CACHE_SIZE, ttl=settings.PUBLIC_CACHE_TTL_SECONDS)
+rendered_pages = TTLCache(maxsize=settings.PUBLIC_CACHE_SIZE, ttl=settings.PUBLIC_CACHE_TTL_SECONDS)
+invalidation_bus.subscribe("handle", page_owners.delete)
+invalidation_bus.subscribe("page", rendered_pages.delete)
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -21,30 +34,57 @@ async def landing(request: Request, current_user: Profile = Depends(get_current_
     })
 
 
+async def _record_page_view(db: AsyncSession, request: Request, owner_id, page_id):
+    if await classify_request(request, db) is not None:
+        return
+    await events.create_event(
+        db,
+        owner_id,
+        EventCreate(type="page_view", page_id=page_id)
+    )
+    
+    # Merged into the database by visitor_sketches' own task, not this request
+    visitor_sketches.add(owner_id, get_client_ip(request), request.headers.get("user-agent", ""))
+
+
 @router.get("/u/{handle}", response_class=HTMLResponse)
 async def public_page(
     handle: str,
     request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    profile = await profiles.get_profile_by_handle(db, handle)
-    if not profile:
-        return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
+    owner = page_owners.get(handle)
+    html = rendered_pages.get(str(owner[0])) if owner else None
+    if html is None:
+        generation = invalidation_bus.generation
+        profile = await profiles.get_profile_by_handle(db, handle)
+        if not profile:
+            return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
+        
+        link_page = await links.get_link_page(db, profile.id)
+        active_links = [link for link in await links.get_links(db, link_page.id) if link.is_active]
+        html = templates.env.get_template("public/page.html").render(profile=profile, links=active_links)
+        owner = (profile.id, link_page.id)
+        if invalidation_bus.generation == generation:
+            page_owners.set(handle, owner)
+            rendered_pages.set(str(profile.id), html)
     
-    link_page = await links.get_link_page(db, profile.id)
-    active_links = [link for link in await links.get_links(db, link_page.id) if link.is_active]
+    await _record_page_view(db, request, *owner)
     
-    await events.create_event(
-        db,
-        profile.id,
-        EventCreate(type="page_view", page_id=link_page.id)
-    )
-    
-    return templates.TemplateResponse("public/page.html", {
-        "request": request,
-        "profile": profile,
-        "links": active_links
-    })
+    return HTMLResponse(html)
+
+
+@router.post("/b/{page_id}", status_code=204)
+async def page_view_beacon(
+    page_id: UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Page views for statically exported bio pages, sent by navigator.sendBeacon."""
+    link_page = await links.get_link_page_by_id(db, page_id)
+    if link_page:
+        await _record_page_view(db, request, link_page.owner_id, link_page.id)
+    return Response(status_code=204)
 
 
 @router.post("/u/{handle}/lead")
@@ -54,7 +94,7 @@ async def submit_lead(
     db: AsyncSession = Depends(get_db)
 ):
     client_ip = get_client_ip(request)
-    rate_limiter.check_rate_limit(f"lead:{client_ip}", max_requests=5, window_seconds=300)
+    await rate_limiter.check_rate_limit(db, f"lead:{client_ip}", max_requests=5, window_seconds=300)
     
     profile = await profiles.get_profile_by_handle(db, handle)
     if not profile:
@@ -67,18 +107,13 @@ async def submit_lead(
         message=form.get("message", "")
     )
     
-    lead = await leads.create_lead(db, profile.id, lead_data)
-
+    lead = await leads.submit_lead(db, profile.id, lead_data)
     if profile.email_notifications:
-        try:
-            await send_lead_alert(profile.email, {
-                "name": lead.name,
-                "email": lead.email,
-                "message": lead.message
-            })
-        except Exception as e:
-            # Log the error but don't fail the lead submission
-            print(f"Failed to send lead notification email: {e}")
+        # Sent by a job worker once the lead commits
+        await enqueue(db, "emails.lead_alert", {
+            "to": profile.email,
+            "lead": {"name": lead.name, "email": lead.email, "message": lead.message},
+        })
 
     return templates.TemplateResponse("public/thankyou.html", {
         "request": request,
@@ -1,11 +1,12 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db
 from app.crud import links
 from app.schemas import EventCreate
 from app.crud import events
+from app.bot_filter import classify_request
 
 router = APIRouter()
 
@@ -13,18 +14,21 @@ router = APIRouter()
 @router.get("/r/{link_id}")
 async def redirect_link(
     link_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
-    link = await links.get_link(db, link_id)
+    link = await links.get_link_target(db, link_id)
     if not link:
         return RedirectResponse(url="/", status_code=303)
     
-    await links.increment_link_clicks(db, link_id)
-    
-    await events.create_event(
-        db,
-        link.page.owner_id,
-        EventCreate(type="link_click", page_id=link.page_id, meta={"link_id": str(link_id)})
-    )
+    # Crawlers still get redirected (previews need the target) but aren't counted
+    if await classify_request(request, db) is None:
+        await links.increment_link_clicks(db, link_id)
+        
+        await events.create_event(
+            db,
+            link.owner_id,
+            EventCreate(type="link_click", page_id=link.page_id, link_id=link_id)
+        )
     
     return RedirectResponse(url=link.url, status_code=302)
\ No newline at end of file
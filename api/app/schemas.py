@@ -75,11 +75,46 @@ class LeadOut(BaseModel):
     email: str
     message: Optional[str]
     created_at: datetime
+    submission_count: int
+    last_submitted_at: Optional[datetime]
     
     class Config:
         from_attributes = True
 
 
+class LeadPage(BaseModel):
+    leads: list[LeadOut]
+    next_cursor: Optional[str] = None
+
+
+class StatsOut(BaseModel):
+    days: int
+    page_views: int
+    link_clicks: int
+    unique_visitors: int
+    leads: int
+    clicks_per_link: dict[str, int]
+
+
+class WebhookEndpointCreate(BaseModel):
+    url: HttpUrl
+
+
+class WebhookEndpointOut(BaseModel):
+    id: UUID
+    url: str
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class WebhookEndpointCreated(WebhookEndpointOut):
+    # Only returned when the endpoint is created
+    secret: str
+
+
 class MagicLinkRequest(BaseModel):
     email: EmailStr
 
@@ -87,4 +122,5 @@ class MagicLinkRequest(BaseModel):
 class EventCreate(BaseModel):
     type: str
     page_id: Optional[UUID] = None
+    link_id: Optional[UUID] = None
     meta: Optional[dict] = None
@@ -0,0 +1,144 @@
+"""State that must agree across every worker and node.
+
+Rate limits (app.rate_limit) count hits per key with
+`await shared_state.hit(db, key, limit, window)`. SHARED_STATE_BACKEND picks
+where the counts live (bot burst detection in app.bot_filter has its own
+BOT_BURST_STATE_BACKEND, "memory" by default, to keep writes off public
+page hits):
+
+- "database": one row per key in rate_limit_counters, bumped by a single
+  upsert in the request's transaction, so every instance behind the load
+  balancer sees the same count. Limits use a sliding window estimated from
+  the current and previous fixed windows.
+- "memory": per process, exact sliding windows; right for one worker.
+- "auto" (default): "database" on Postgres, "memory" otherwise.
+
+Either way a hit is counted even when it goes over the limit, unless the
+request's transaction rolls back (a 429 does).
+
+cluster_lock() keeps scheduled jobs (app.retention) from running on two
+nodes at once.
+"""
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from sqlalchemy import case, delete, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.config import settings
+from app.database import dialect_insert
+from app.models import RateLimitCounter
+
+
+class SlidingWindowCounter:
+    """Flags keys that exceed `max_requests` tracked hits within `window_seconds`."""
+
+    def __init__(self, max_requests: int, window_seconds: float, max_tracked_keys: int = 50000):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.max_tracked_keys = max_tracked_keys
+        self.hits: Dict[str, deque] = defaultdict(deque)
+
+    def hit(self, key: str, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window_seconds
+        if len(self.hits) > self.max_tracked_keys and key not in self.hits:
+            self._prune(cutoff)
+
+        hit_times = self.hits[key]
+        while hit_times and hit_times[0] < cutoff:
+            hit_times.popleft()
+        hit_times.append(now)
+        # Keep at most one timestamp past the limit so memory per key stays bounded
+        if len(hit_times) > self.max_requests + 1:
+            hit_times.popleft()
+        return len(hit_times) > self.max_requests
+
+    def _prune(self, cutoff: float):
+        for key in [key for key, hit_times in self.hits.items() if not hit_times or hit_times[-1] < cutoff]:
+            del self.hits[key]
+
+
+class MemoryState:
+    name = "memory"
+
+    def __init__(self):
+        self.counters: Dict[tuple, SlidingWindowCounter] = {}
+
+    async def hit(self, db: AsyncSession | None, key: str, limit: int, window_seconds: float) -> bool:
+        """Count a hit on `key`; True when it is over `limit` per `window_seconds`."""
+        counter = self.counters.get((limit, window_seconds))
+        if counter is None:
+            counter = self.counters[(limit, window_seconds)] = SlidingWindowCounter(limit, window_seconds)
+        return counter.hit(key)
+
+
+class DatabaseState:
+    name = "database"
+
+    async def hit(self, db: AsyncSession, key: str, limit: int, window_seconds: float) -> bool:
+        """Count a hit on `key`; True when it is over `limit` per `window_seconds`."""
+        now = time.time()
+        window = max(1, int(window_seconds))
+        window_start = int(now) // window * window
+        counter = RateLimitCounter.__table__.c
+        statement = dialect_insert(db, RateLimitCounter).values(
+            key=key, window_start=window_start, hits=1, previous_hits=0
+        )
+        # SET expressions see the stored row, so this rolls the window
+        # forward and counts the hit in one statement
+        statement = statement.on_conflict_do_update(
+            index_elements=[counter.key],
+            set_={
+                "previous_hits": case(
+                    (counter.window_start == window_start, counter.previous_hits),
+                    (counter.window_start == window_start - window, counter.hits),
+                    else_=0,
+                ),
+                "hits": case((counter.window_start == window_start, counter.hits + 1), else_=1),
+                "window_start": window_start,
+            },
+        ).returning(counter.hits, counter.previous_hits)
+        hits, previous_hits = (await db.execute(statement)).one()
+        estimate = hits + previous_hits * (1 - (now - window_start) / window)
+        return estimate > limit
+
+
+def create_shared_state(backend: str = settings.SHARED_STATE_BACKEND, database_url: str = settings.DATABASE_URL):
+    if backend == "auto":
+        backend = "database" if database_url.startswith("postgresql") else "memory"
+    if backend == "database":
+        return DatabaseState()
+    if backend == "memory":
+        return MemoryState()
+    raise ValueError(f"Unknown SHARED_STATE_BACKEND {backend!r}")
+
+
+async def purge_counters(engine: AsyncEngine, older_than_seconds: int = 86400) -> int:
+    """Delete counters idle for `older_than_seconds`; longer than any window."""
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            delete(RateLimitCounter).where(RateLimitCounter.window_start < int(time.time()) - older_than_seconds)
+        )
+    return result.rowcount
+
+
+@asynccontextmanager
+async def cluster_lock(engine: AsyncEngine, name: str):
+    """Yields True in the one process across the deployment that holds
+    `name`, False everywhere else. A Postgres session advisory lock, so it
+    is released if the holder dies. Other databases serve a single host and
+    always yield True."""
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    async with engine.connect() as conn:
+        acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name})).scalar()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+
+
+shared_state = create_shared_state()
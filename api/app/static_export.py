@@ -0,0 +1,160 @@
+"""Static export of public bio pages.
+
+    python -m app.static_export            # profiles changed since the last run
+    python -m app.static_export --full     # every profile
+
+Renders public/page.html for each profile to STATIC_EXPORT_DIR/u/<handle>/index.html
+with .gz (and .br when brotli is installed) siblings, ready for nginx
+(`try_files $uri/index.html @app`, `gzip_static on`) or object storage. Links
+still go through /r/<link_id> and the page posts a beacon to /b/<page_id>, so
+clicks and page views keep being recorded by the app.
+
+Incremental runs regenerate profiles whose `updated_at` moved since the
+previous run, delete pages of removed profiles and old handles, and keep
+their state in <output>/.export-state.json.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.config import settings
+from app.models import LinkPage, Profile
+from app.templating import templates
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants are still produced
+    brotli = None
+
+STATE_FILE = ".export-state.json"
+BATCH_SIZE = 500
+SAFE_HANDLE_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+def page_dir(output_dir: Path, handle: str) -> Path:
+    return output_dir / "u" / handle
+
+
+def _write_atomic(path: Path, content: bytes):
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+
+
+def write_page(output_dir: Path, handle: str, html: str):
+    directory = page_dir(output_dir, handle)
+    directory.mkdir(parents=True, exist_ok=True)
+    content = html.encode()
+    _write_atomic(directory / "index.html", content)
+    _write_atomic(directory / "index.html.gz", gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_atomic(directory / "index.html.br", brotli.compress(content, quality=11))
+
+
+def remove_page(output_dir: Path, handle: str):
+    shutil.rmtree(page_dir(output_dir, handle), ignore_errors=True)
+
+
+def render_page(profile: Profile, app_url: str = "") -> str:
+    link_page = profile.link_page
+    active_links = [link for link in link_page.links if link.is_active]
+    return templates.env.get_template("public/page.html").render(
+        profile=profile,
+        links=active_links,
+        app_url=app_url,
+        beacon_url=f"{app_url}/b/{link_page.id}",
+    )
+
+
+def load_state(output_dir: Path) -> dict:
+    try:
+        return json.loads((output_dir / STATE_FILE).read_text())
+    except FileNotFoundError:
+        return {"exported_at": None, "handles": {}}
+
+
+def save_state(output_dir: Path, state: dict):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(output_dir / STATE_FILE, json.dumps(state, indent=2, sort_keys=True).encode())
+
+
+async def export_pages(db: AsyncSession, output_dir: Path, app_url: str = "", full: bool = False) -> dict:
+    """Render changed (or all, with `full`) profiles into `output_dir`.
+
+    Returns counts of rendered, removed and skipped pages.
+    """
+    state = load_state(output_dir)
+    # Taken before reading so edits made during the run are picked up next time
+    started_at = datetime.utcnow()
+    since = None if full or not state["exported_at"] else datetime.fromisoformat(state["exported_at"])
+
+    rows = (await db.execute(select(Profile.id, Profile.handle))).all()
+    current = {str(profile_id): handle for profile_id, handle in rows}
+    previous = state["handles"]
+    stats = {"rendered": 0, "removed": 0, "skipped": 0}
+
+    for profile_id, handle in previous.items():
+        if current.get(profile_id) != handle:
+            remove_page(output_dir, handle)
+            stats["removed"] += 1
+
+    if since is None:
+        changed_ids = [profile_id for profile_id, _ in rows]
+    else:
+        changed_ids = set((await db.execute(select(Profile.id).where(Profile.updated_at >= since))).scalars().all())
+        # A renamed profile needs its page under the new handle regardless
+        changed_ids.update(profile_id for profile_id, handle in rows
+                           if str(profile_id) in previous and previous[str(profile_id)] != handle)
+        changed_ids = list(changed_ids)
+
+    exported = {profile_id: handle for profile_id, handle in previous.items() if current.get(profile_id) == handle}
+    for start in range(0, len(changed_ids), BATCH_SIZE):
+        result = await db.execute(
+            select(Profile)
+            .where(Profile.id.in_(changed_ids[start:start + BATCH_SIZE]))
+            .options(selectinload(Profile.link_page).selectinload(LinkPage.links))
+            .execution_options(populate_existing=True)
+        )
+        for profile in result.scalars():
+            if profile.link_page is None or not SAFE_HANDLE_RE.match(profile.handle):
+                stats["skipped"] += 1
+                continue
+            write_page(output_dir, profile.handle, render_page(profile, app_url))
+            exported[str(profile.id)] = profile.handle
+            stats["rendered"] += 1
+
+    save_state(output_dir, {"exported_at": started_at.isoformat(), "handles": exported})
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Export public bio pages as static HTML")
+    parser.add_argument("--output", default=settings.STATIC_EXPORT_DIR)
+    parser.add_argument("--app-url", default=settings.STATIC_EXPORT_APP_URL,
+                        help="origin of the app when pages are served from elsewhere (default: same origin)")
+    parser.add_argument("--full", action="store_true", help="regenerate every profile")
+    args = parser.parse_args()
+
+    from app.database import AsyncSessionLocal, engine
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        stats = await export_pages(db, Path(args.output), app_url=args.app_url.rstrip("/"), full=args.full)
+    await engine.dispose()
+    print(f"Rendered {stats['rendered']}, removed {stats['removed']}, skipped {stats['skipped']} pages "
+          f"into {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
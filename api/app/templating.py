@@ -0,0 +1,61 @@
+"""The Jinja2 environment shared by every router.
+
+Parsed templates are cached in memory by the one environment and, as
+compiled bytecode, in TEMPLATE_CACHE_DIR so new workers skip parsing. The
+image build fills that cache ahead of time:
+
+    python -m app.templating
+"""
+import time
+from pathlib import Path
+import jinja2
+from fastapi.templating import Jinja2Templates
+from app.assets import asset_url, inline_asset
+from app.config import settings
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".template_cache"
+
+
+def _bytecode_cache(directory: Path) -> jinja2.FileSystemBytecodeCache | None:
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        print(f"Template bytecode cache disabled ({directory}): {e}")
+        return None
+    return jinja2.FileSystemBytecodeCache(str(directory))
+
+
+def create_environment(cache_dir: Path | None = None, auto_reload: bool | None = None) -> jinja2.Environment:
+    if cache_dir is None:
+        cache_dir = Path(settings.TEMPLATE_CACHE_DIR) if settings.TEMPLATE_CACHE_DIR else DEFAULT_CACHE_DIR
+    if auto_reload is None:
+        # Production templates only change with a new image
+        auto_reload = settings.ENV != "production"
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        auto_reload=auto_reload,
+        bytecode_cache=_bytecode_cache(cache_dir),
+    )
+    env.globals.update(asset_url=asset_url, inline_asset=inline_asset)
+    return env
+
+
+def load_all(env: jinja2.Environment) -> int:
+    """Load every template, compiling (and caching bytecode for) any that are
+    not cached yet. Returns the number of templates loaded."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+templates = Jinja2Templates(env=create_environment())
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    count = load_all(templates.env)
+    print(f"Compiled {count} templates in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"into {templates.env.bytecode_cache.directory if templates.env.bytecode_cache else 'memory only'}")
@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+from datetime import date, datetime
+from typing import Dict, Tuple
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.crud import visitors
+from app.database import AsyncSessionLocal
+from app.hll import HyperLogLog
+
+MAX_PENDING_SKETCHES = 1000
+
+
+class VisitorSketchBuffer:
+    """Collects unique-visitor sketches in memory and merges them into the database.
+
+    Visitors are identified by a keyed hash of IP and user agent; neither is
+    stored. Each worker's buffer is flushed by its own background task (see
+    start), every `flush_interval` seconds or sooner once MAX_PENDING_SKETCHES
+    are pending, so page views never wait on the merge. Sketch merges are
+    idempotent, so a failed flush is simply retried.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self.pending: Dict[Tuple[UUID, date], HyperLogLog] = {}
+        self._key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.session_factory = AsyncSessionLocal
+
+    def add(self, owner_id: UUID, ip: str, user_agent: str, day: date | None = None):
+        key = (owner_id, day or datetime.utcnow().date())
+        sketch = self.pending.get(key)
+        if sketch is None:
+            sketch = self.pending[key] = HyperLogLog()
+        sketch.add_hash(HyperLogLog.hash(f"{ip}|{user_agent}".encode(), key=self._key))
+        if len(self.pending) >= MAX_PENDING_SKETCHES:
+            self._wakeup.set()
+
+    async def flush(self, db: AsyncSession):
+        """Merge pending sketches in a savepoint of `db`'s transaction; the
+        caller commits. On failure only the savepoint rolls back."""
+        pending, self.pending = self.pending, {}
+        try:
+            async with db.begin_nested():
+                for (owner_id, day), sketch in pending.items():
+                    await visitors.merge_visitor_sketch(db, owner_id, day, sketch)
+        except Exception:
+            self._restore(pending)
+            raise
+
+    def _restore(self, pending: Dict[Tuple[UUID, date], HyperLogLog]):
+        for key, sketch in pending.items():
+            if key in self.pending:
+                self.pending[key].merge(sketch)
+            else:
+                self.pending[key] = sketch
+
+    async def flush_committed(self):
+        """Flush in a session of our own and commit it."""
+        pending = self.pending
+        async with self.session_factory() as db:
+            await self.flush(db)
+            try:
+                await db.commit()
+            except Exception:
+                self._restore(pending)
+                raise
+
+    async def _tick(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.pending:
+                continue
+            try:
+                await self.flush_committed()
+            except Exception as e:
+                # Sketches stay buffered and are retried on the next tick
+                print(f"Failed to flush visitor sketches: {e}")
+
+    async def start(self, session_factory=None):
+        if session_factory is not None:
+            self.session_factory = session_factory
+        self._task = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        """Stop the task and flush what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.pending:
+            await self.flush_committed()
+
+
+visitor_sketches = VisitorSketchBuffer(flush_interval=settings.VISITOR_SKETCH_FLUSH_SECONDS)
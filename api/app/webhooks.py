@@ -0,0 +1,196 @@
+"""Outbound lead webhooks.
+
+crud.leads.submit_lead enqueues a "webhooks.lead" job in the lead's
+transaction (see app/jobs.py), so submitting a lead never waits on a
+receiver and a committed lead survives restarts until it is delivered.
+Workers pick those jobs up in batches and turn them into one
+"webhooks.deliver" job per active endpoint, carrying that owner's leads.
+A delivery is signed with the endpoint's secret at send time and retried
+with exponential backoff by the job runner. Each receiving host gets a
+small concurrency cap per worker, and every delivery goes through one
+pooled httpx client.
+
+Endpoint hosts must resolve to public addresses only: checked when an
+endpoint is registered, and again for the address each delivery actually
+connects to (PublicHostBackend), so a name re-pointed at an internal
+address after registration (DNS rebinding) is refused too.
+
+Body: {"type": "leads.submitted", "leads": [LeadOut, ...]}
+Headers: X-LinkCrm-Timestamp (unix seconds) and X-LinkCrm-Signature,
+"sha256=" + hex HMAC-SHA256 of "<timestamp>.<body>" keyed by the secret.
+"""
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import socket
+import time
+from urllib.parse import urlsplit
+from uuid import UUID
+import httpcore
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.jobs import RetryJob, enqueue, job
+from app.responses import dumps
+
+# 4xx answers worth retrying; any other non-2xx below 500 drops the delivery
+RETRY_STATUSES = {408, 425, 429}
+
+
+async def resolve_public_addresses(host: str, port: int) -> list[str]:
+    """Addresses `host` resolves to; ValueError unless every one is public.
+    Also catches numeric forms like 2130706433 or 0x7f000001 and names
+    like 127.0.0.1.nip.io."""
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise ValueError(f"Webhook host {host} does not resolve")
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise ValueError("Webhook URL must be a public host")
+    return addresses
+
+
+async def check_endpoint_url(url: str):
+    """Raises ValueError unless `url` is an http(s) URL on a public host."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("Webhook URL must be an http(s) URL")
+    if settings.WEBHOOK_ALLOW_PRIVATE_HOSTS:
+        return
+    host = parts.hostname
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ValueError("Webhook URL must be a public host")
+    await resolve_public_addresses(host, parts.port or (443 if parts.scheme == "https" else 80))
+
+
+class PublicHostBackend(httpcore.AsyncNetworkBackend):
+    """Connects only to public addresses, and to the exact address that was
+    checked, so the answer can't change between the check and the connect."""
+
+    def __init__(self):
+        self.backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await resolve_public_addresses(host, port)
+        except ValueError as e:
+            raise httpcore.ConnectError(str(e))
+        error = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("Webhooks are only delivered over TCP")
+
+    async def sleep(self, seconds: float):
+        await self.backend.sleep(seconds)
+
+
+class PublicHostTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, limits: httpx.Limits):
+        super().__init__(limits=limits)
+        # httpx has no option for httpcore's network_backend, so the pool
+        # it built is swapped for one with the same settings that uses it
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=PublicHostBackend(),
+        )
+
+
+def signature_headers(secret: str, body: bytes, timestamp: int | None = None) -> dict:
+    timestamp = str(int(timestamp if timestamp is not None else time.time()))
+    digest = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return {"X-LinkCrm-Timestamp": timestamp, "X-LinkCrm-Signature": f"sha256={digest}"}
+
+
+async def queue_lead(db: AsyncSession, owner_id: UUID, lead: dict):
+    """Send `lead` (LeadOut fields) to the owner's webhooks once `db`'s
+    transaction commits."""
+    await enqueue(db, "webhooks.lead", {"owner_id": str(owner_id), "lead": lead})
+
+
+class WebhookSender:
+    """One pooled client and per-host concurrency caps for this process."""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport | None = None,
+        concurrency_per_host: int = settings.WEBHOOK_CONCURRENCY_PER_HOST,
+        timeout: float = settings.WEBHOOK_TIMEOUT_SECONDS,
+    ):
+        self.transport = transport
+        self.concurrency_per_host = concurrency_per_host
+        self.timeout = timeout
+        self.client: httpx.AsyncClient | None = None
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+
+    async def stop(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.concurrency_per_host)
+        return slot
+
+    async def post(self, url: str, secret: str, body: bytes) -> httpx.Response:
+        if self.client is None:
+            limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            transport = self.transport
+            if transport is None and not settings.WEBHOOK_ALLOW_PRIVATE_HOSTS:
+                transport = PublicHostTransport(limits)
+            self.client = httpx.AsyncClient(
+                transport=transport,
+                timeout=self.timeout,
+                limits=limits,
+                headers={"User-Agent": "LinkCrm-Webhooks/1.0", "Content-Type": "application/json"},
+            )
+        async with self._host_slot(url):
+            return await self.client.post(url, content=body, headers=signature_headers(secret, body))
+
+
+webhook_sender = WebhookSender()
+
+
+@job("webhooks.lead", queue="webhooks", batch=settings.WEBHOOK_BATCH_SIZE)
+async def fan_out_leads(db: AsyncSession, payloads: list[dict]):
+    """One delivery per active endpoint of the owners in this batch."""
+    from app.crud import webhooks
+    owner_ids = list({UUID(payload["owner_id"]) for payload in payloads})
+    for endpoint in await webhooks.get_active_endpoints(db, owner_ids):
+        leads = [payload["lead"] for payload in payloads if payload["owner_id"] == str(endpoint.owner_id)]
+        await enqueue(db, "webhooks.deliver", {"endpoint_id": str(endpoint.id), "leads": leads})
+
+
+@job("webhooks.deliver", queue="webhooks", max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+     backoff=settings.WEBHOOK_BACKOFF_SECONDS, backoff_max=settings.WEBHOOK_BACKOFF_MAX_SECONDS)
+async def deliver(db: AsyncSession, payload: dict):
+    from app.crud import webhooks
+    endpoint = await webhooks.get_active_endpoint(db, UUID(payload["endpoint_id"]))
+    # Don't hold a connection while waiting on the receiver
+    await db.commit()
+    if endpoint is None:
+        return
+    leads = payload["leads"]
+    body = dumps({"type": "leads.submitted", "leads": leads})
+    response = await webhook_sender.post(endpoint.url, endpoint.secret, body)
+    if response.is_success:
+        return
+    if response.status_code < 500 and response.status_code not in RETRY_STATUSES:
+        print(f"Webhook {endpoint.url} rejected {len(leads)} leads (HTTP {response.status_code}); not retrying")
+        return
+    retry_after = response.headers.get("retry-after", "")
+    raise RetryJob(f"HTTP {response.status_code}", float(retry_after) if retry_after.isdigit() else 0.0)
@@ -0,0 +1 @@
+"""Performance benchmarks. Run from the api/ directory, e.g. `python -m bench.event_link_clicks`."""
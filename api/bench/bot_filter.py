@@ -0,0 +1,79 @@
+"""Bot/prefetch classifier throughput.
+
+    python -m bench.bot_filter --iterations 200000
+
+Replays a mix of browser, crawler, prefetch and HEAD requests through
+app.bot_filter.classify_request, with burst counts in memory, and reports
+classifications per second.
+"""
+import argparse
+import asyncio
+import random
+import time
+from starlette.requests import Request
+from app.bot_filter import classify_request, is_bot_user_agent
+from app.config import settings
+from app.shared_state import MemoryState
+import app.bot_filter as bot_filter
+
+USER_AGENTS = [
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "Twitterbot/1.0",
+    "Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "WhatsApp/2.23.20.0",
+    "python-requests/2.31.0",
+]
+
+
+def make_request(user_agent: str, ip: str, method: str = "GET", extra_headers=()) -> Request:
+    headers = [(b"user-agent", user_agent.encode())] + [(k.encode(), v.encode()) for k, v in extra_headers]
+    return Request({
+        "type": "http", "method": method, "path": "/r/x", "headers": headers,
+        "client": (ip, 12345), "query_string": b"",
+    })
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--unique-user-agents", action="store_true",
+                        help="defeat the user-agent cache by appending a unique suffix")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    # Generous burst limits so the benchmark measures the full path, not early exits
+    settings.BOT_BURST_MAX_REQUESTS, settings.BOT_BURST_WINDOW_SECONDS = 1000, 1
+    bot_filter.burst_state = MemoryState()
+    requests = []
+    for i in range(10_000):
+        user_agent = rng.choice(USER_AGENTS)
+        if args.unique_user_agents:
+            user_agent = f"{user_agent} r{i}"
+        roll = rng.random()
+        if roll < 0.05:
+            requests.append(make_request(user_agent, f"10.0.{i % 200}.{i % 250}", method="HEAD"))
+        elif roll < 0.10:
+            requests.append(make_request(user_agent, f"10.0.{i % 200}.{i % 250}", extra_headers=[("sec-purpose", "prefetch")]))
+        else:
+            requests.append(make_request(user_agent, f"10.0.{i % 200}.{i % 250}"))
+
+    is_bot_user_agent.cache_clear()
+    reasons = {}
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        reason = await classify_request(requests[i % len(requests)], None)
+        reasons[reason] = reasons.get(reason, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.iterations / elapsed:,.0f} classifications/s ({elapsed * 1e6 / args.iterations:.2f} µs each)")
+    print("outcomes:", {str(k): v for k, v in sorted(reasons.items(), key=lambda item: -item[1])})
+    print("user-agent cache:", is_bot_user_agent.cache_info())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""Helpers shared by the benchmarks: load driving, latency summaries and a
+gunicorn process to point external load at."""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+import httpx
+
+BROWSER_USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1"
+
+
+def temp_database_url(name: str = "bench.db") -> str:
+    return f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), name)}"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def synthetic_ip(n: int) -> str:
+    """A distinct client address per request, so per-IP rate limits and the
+    bot burst filter see ordinary traffic rather than one hammering client."""
+    return f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run_load(
+    send: Callable[[int], Awaitable[int]],
+    concurrency: int,
+    requests: int | None = None,
+    duration: float | None = None,
+) -> dict:
+    """Call `send(n)` from `concurrency` tasks until `requests` calls or
+    `duration` seconds are done. `send` returns the HTTP status; 4xx/5xx and
+    exceptions count as errors."""
+    latencies, errors = [], 0
+    counter = iter(range(requests if requests is not None else sys.maxsize))
+    started = time.perf_counter()
+    deadline = started + duration if duration is not None else None
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            request_started = time.perf_counter()
+            try:
+                if await send(n) >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - request_started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def _wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError("gunicorn did not become ready")
+
+
+@contextmanager
+def gunicorn_server(database_url: str, overrides: dict | None = None):
+    """Run the app under gunicorn with app/gunicorn_conf.py; yields (base_url, pid)."""
+    port = free_port()
+    env = {**os.environ, **(overrides or {}), "APP_HOST": "127.0.0.1", "APP_PORT": str(port),
+           "DATABASE_URL": database_url}
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "python:app.gunicorn_conf", "app.main:app"],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url)
+        yield base_url, server.pid
+    finally:
+        server.terminate()
+        server.wait()
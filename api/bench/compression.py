@@ -0,0 +1,101 @@
+"""Bytes on the wire and requests/sec for /u/{handle} with and without
+CompressionMiddleware.
+
+    python -m bench.compression --requests 2000
+
+Seeds a temporary SQLite database with one bio page, then drives the app
+in-process through httpx's ASGI transport. Scenarios: the app without the
+middleware, clients accepting identity, gzip and br, and a repeat visit
+sending If-None-Match (304). Every request still renders the page and
+records a page view; the savings are on the wire.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+# Every request comes from one client address; keep the burst filter from
+# skipping the page-view write so each request does the real work.
+os.environ.setdefault("BOT_BURST_MAX_REQUESTS", "1000000000")
+
+import httpx
+from sqlalchemy import insert
+from app.database import Base, engine
+from app.main import app
+from app.middleware import CompressionMiddleware
+from app.models import Link, LinkPage, Profile
+
+COMPRESSION_MIDDLEWARE = next(m for m in app.user_middleware if m.cls is CompressionMiddleware)
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+
+async def seed(links: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        profile_id, page_id = uuid.uuid4(), uuid.uuid4()
+        await conn.execute(insert(Profile), [{
+            "id": profile_id, "email": "bench@example.com", "handle": "bench", "password_hash": "x",
+            "display_name": "Bench Realty", "bio": "Helping buyers and sellers since 2009.",
+        }])
+        await conn.execute(insert(LinkPage), [{"id": page_id, "owner_id": profile_id}])
+        await conn.execute(insert(Link), [
+            {"id": uuid.uuid4(), "page_id": page_id, "title": f"Listing {n}", "url": f"https://example.com/listing/{n}", "position": n}
+            for n in range(links)
+        ])
+
+
+def set_compression(enabled: bool):
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not CompressionMiddleware]
+    if enabled:
+        app.user_middleware.insert(0, COMPRESSION_MIDDLEWARE)
+    app.middleware_stack = None  # rebuilt on the next request
+
+
+async def run(client: httpx.AsyncClient, requests: int, headers: dict) -> tuple[float, int, int]:
+    wire_bytes = 0
+    status = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get("/u/bench", headers=headers)
+        status = response.status_code
+        # response.num_bytes_downloaded counts the encoded body
+        wire_bytes = response.num_bytes_downloaded
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, wire_bytes, status
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--links", type=int, default=12)
+    args = parser.parse_args()
+
+    await seed(args.links)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        base_headers = {"user-agent": BROWSER_USER_AGENT}
+        set_compression(True)
+        first = await client.get("/u/bench", headers={**base_headers, "accept-encoding": "br, gzip"})
+        etag = first.headers["etag"]
+
+        scenarios = [
+            ("no middleware", False, {"accept-encoding": "br, gzip"}),
+            ("identity", True, {"accept-encoding": "identity"}),
+            ("gzip", True, {"accept-encoding": "gzip"}),
+            ("br, gzip", True, {"accept-encoding": "br, gzip"}),
+            ("If-None-Match", True, {"accept-encoding": "br, gzip", "if-none-match": etag}),
+        ]
+        for name, enabled, headers in scenarios:
+            set_compression(enabled)
+            await run(client, 20, {**base_headers, **headers})
+            rps, wire_bytes, status = await run(client, args.requests, {**base_headers, **headers})
+            print(f"{name:>14}: {status} {wire_bytes:>6} body bytes, {rps:>7.0f} req/s")
+    set_compression(True)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""Clicks-per-link over 30 days: JSON `meta` extraction vs the typed `link_id` column.
+
+    python -m bench.event_link_clicks --events 10000000
+
+Seeds a fresh SQLite database (or --database-url) with synthetic events, then
+times both query shapes for one owner.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.database import Base
+from app.models import Event, Link, LinkPage, Profile
+from app.crud.events import get_clicks_per_link
+
+BATCH_SIZE = 20000
+
+
+async def seed(engine, events: int, owners: int, links_per_owner: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        pages = []
+        for i in range(owners):
+            profile_id, page_id = uuid.uuid4(), uuid.uuid4()
+            link_ids = [uuid.uuid4() for _ in range(links_per_owner)]
+            await conn.execute(insert(Profile), [{"id": profile_id, "email": f"bench{i}@example.com", "handle": f"bench{i}", "password_hash": "x"}])
+            await conn.execute(insert(LinkPage), [{"id": page_id, "owner_id": profile_id}])
+            await conn.execute(insert(Link), [
+                {"id": link_id, "page_id": page_id, "title": f"Link {n}", "url": "https://example.com", "position": n}
+                for n, link_id in enumerate(link_ids)
+            ])
+            pages.append((profile_id, page_id, link_ids))
+
+    for start in range(0, events, BATCH_SIZE):
+        rows = []
+        for _ in range(min(BATCH_SIZE, events - start)):
+            profile_id, page_id, link_ids = pages[rng.randrange(owners)]
+            created_at = now - timedelta(seconds=rng.randrange(90 * 86400))
+            if rng.random() < 0.5:
+                link_id = rng.choice(link_ids)
+                rows.append({"id": uuid.uuid4(), "owner_id": profile_id, "page_id": page_id, "type": "link_click",
+                             "link_id": link_id, "meta": {"link_id": str(link_id)}, "created_at": created_at})
+            else:
+                rows.append({"id": uuid.uuid4(), "owner_id": profile_id, "page_id": page_id, "type": "page_view",
+                             "link_id": None, "meta": None, "created_at": created_at})
+        async with engine.begin() as conn:
+            await conn.execute(insert(Event), rows)
+    return pages
+
+
+async def clicks_per_link_from_meta(db: AsyncSession, owner_id, days: int = 30):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    link_id = Event.meta["link_id"].as_string()
+    result = await db.execute(
+        select(link_id, func.count(Event.id))
+        .where(Event.owner_id == owner_id)
+        .where(Event.type == "link_click")
+        .where(Event.created_at >= cutoff)
+        .group_by(link_id)
+    )
+    return dict(result.all())
+
+
+async def timed(query, db, owner_ids, repeat: int) -> list[float]:
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        await query(db, owner_ids[i % len(owner_ids)])
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--owners", type=int, default=1000)
+    parser.add_argument("--links-per-owner", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(database_url)
+
+    started = time.perf_counter()
+    pages = await seed(engine, args.events, args.owners, args.links_per_owner)
+    print(f"seeded {args.events} events in {time.perf_counter() - started:.1f}s ({database_url})")
+
+    owner_ids = [profile_id for profile_id, _, _ in pages]
+    async with AsyncSession(engine) as db:
+        for name, query in [("meta JSON extract", clicks_per_link_from_meta), ("typed link_id", get_clicks_per_link)]:
+            await query(db, owner_ids[0])
+            samples = await timed(query, db, owner_ids, args.repeat)
+            print(f"{name:>18}: median {statistics.median(samples):.2f} ms, "
+                  f"p95 {statistics.quantiles(samples, n=20)[-1]:.2f} ms over {args.repeat} owners")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""Stale reads and invalidation latency across gunicorn workers.
+
+    python -m bench.invalidation
+    python -m bench.invalidation --workers 8 --rounds 200
+
+Seeds one profile, then repeatedly changes one of its link targets through
+the API and immediately follows /r/<link_id> on fresh connections, which
+land on any worker. A redirect to the previous URL is a stale read from
+some worker's link cache. Runs once per transport; "none" shows what every
+worker but the writer serves without the bus. Per-worker delivery latency
+comes from /health/invalidation.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from bench.common import gunicorn_server, temp_database_url
+
+
+async def run(transport: str, workers: int, rounds: int, reads: int) -> dict:
+    database_url = temp_database_url("invalidation.db")
+    os.environ["DATABASE_URL"] = database_url
+    from bench.seed import seed
+    from app.security import create_session_token
+
+    seed_engine = create_async_engine(database_url)
+    [profile] = await seed(seed_engine, profiles=1, events=0, leads=0)
+    await seed_engine.dispose()
+    headers = {"authorization": f"Bearer {create_session_token(str(profile.id))}"}
+    link_id = profile.link_ids[0]
+
+    overrides = {"GUNICORN_WORKERS": str(workers), "INVALIDATION_TRANSPORT": transport}
+    # No keep-alive: every request opens a connection and any worker may accept it
+    limits = httpx.Limits(max_keepalive_connections=0)
+    stale = total = 0
+    with gunicorn_server(database_url, overrides) as (base_url, _):
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            for n in range(rounds):
+                url = f"https://example.com/round/{n}"
+                response = await client.patch(f"/api/v1/links/{link_id}", json={"url": url}, headers=headers)
+                response.raise_for_status()
+                for _ in range(reads):
+                    response = await client.get(f"/r/{link_id}")
+                    stale += response.headers["location"] != url
+                    total += 1
+            stats = {}
+            for _ in range(workers * 10):
+                worker = (await client.get("/health/invalidation")).json()
+                stats[worker["worker"]] = worker
+    latencies = [worker["latency_p99_ms"] for worker in stats.values() if "latency_p99_ms" in worker]
+    return {"stale": stale, "reads": total, "p99_ms": max(latencies) if latencies else None}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=10, help="redirects followed after each change")
+    parser.add_argument("--transports", default="none,local")
+    args = parser.parse_args()
+
+    print(f"{'transport':>10} {'stale reads':>14} {'worst worker p99 ms':>20}")
+    for transport in args.transports.split(","):
+        result = await run(transport, args.workers, args.rounds, args.reads)
+        p99 = "-" if result["p99_ms"] is None else f"{result['p99_ms']:.2f}"
+        print(f"{transport:>10} {result['stale']:>6}/{result['reads']:<7} {p99:>20}")
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
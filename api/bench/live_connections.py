@@ -0,0 +1,86 @@
+"""Memory and latency of idle /dashboard/live streams on one worker.
+
+    python -m bench.live_connections
+    python -m bench.live_connections --connections 5000
+
+Opens N event streams for one seeded profile against a single gunicorn
+worker, reports the worker's RSS growth per connection, then submits a lead
+and times how long it takes to reach every stream.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from bench.common import gunicorn_server, temp_database_url
+
+
+def worker_rss_kb(master_pid: int) -> int:
+    children = Path(f"/proc/{master_pid}/task/{master_pid}/children").read_text().split()
+    total = 0
+    for pid in children:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                total += int(line.split()[1])
+    return total
+
+
+async def open_stream(client: httpx.AsyncClient, cookie: str, ready: asyncio.Event, received: list):
+    async with client.stream("GET", "/dashboard/live", headers={"cookie": cookie}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("retry:"):
+                ready.set()
+            elif line == "event: lead":
+                received.append(time.perf_counter())
+                return
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=2000)
+    args = parser.parse_args()
+
+    database_url = temp_database_url("live.db")
+    os.environ["DATABASE_URL"] = database_url
+    from bench.seed import seed
+    from app.security import create_session_token
+
+    seed_engine = create_async_engine(database_url)
+    [profile] = await seed(seed_engine, profiles=1, events=0, leads=0)
+    await seed_engine.dispose()
+    cookie = f"session={create_session_token(str(profile.id))}"
+
+    overrides = {"GUNICORN_WORKERS": "1", "LIVE_MAX_CONNECTIONS": str(args.connections)}
+    limits = httpx.Limits(max_connections=args.connections + 1, max_keepalive_connections=0)
+    with gunicorn_server(database_url, overrides) as (base_url, pid):
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            await client.get("/health")
+            baseline = worker_rss_kb(pid)
+            received: list[float] = []
+            streams = []
+            for _ in range(args.connections):
+                ready = asyncio.Event()
+                streams.append(asyncio.create_task(open_stream(client, cookie, ready, received)))
+                await ready.wait()
+            await asyncio.sleep(1)
+            loaded = worker_rss_kb(pid)
+
+            started = time.perf_counter()
+            response = await client.post(f"/u/{profile.handle}/lead", data={
+                "name": "Live Lead", "email": "live@example.net", "message": "Hello"})
+            response.raise_for_status()
+            await asyncio.wait_for(asyncio.gather(*streams), 30)
+
+    per_connection = (loaded - baseline) / args.connections
+    print(f"connections:        {args.connections}")
+    print(f"worker RSS:         {baseline / 1024:.1f} MB -> {loaded / 1024:.1f} MB "
+          f"({per_connection:.1f} KB per connection)")
+    print(f"lead to all streams: {(max(received) - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,90 @@
+"""Load test of gunicorn runtime profiles on the redirect and bio endpoints.
+
+    python -m bench.loadtest --duration 10 --concurrency 32
+    python -m bench.loadtest --database-url postgresql+psycopg://... --configs baseline,tuned
+
+Starts gunicorn with app/gunicorn_conf.py once per configuration (settings
+overridden through the environment), drives /r/{link_id} and /u/{handle}
+with a browser User-Agent so every hit is recorded, and reports requests/sec,
+latency percentiles, errors and the memory (PSS) of the master plus workers.
+SQLite serialises the per-request event writes across processes; use
+Postgres for numbers that reflect production.
+"""
+import argparse
+import asyncio
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from bench.common import BROWSER_USER_AGENT, gunicorn_server, run_load, temp_database_url
+from bench.seed import seed
+
+CONFIGS = {
+    # The previous Dockerfile command line
+    "baseline": {"GUNICORN_WORKERS": "2", "GUNICORN_PRELOAD": "false", "UVICORN_LOOP": "asyncio",
+                 "UVICORN_HTTP": "h11", "GUNICORN_KEEPALIVE": "2", "GUNICORN_MAX_REQUESTS": "0"},
+    "tuned": {},
+    "tuned-no-preload": {"GUNICORN_PRELOAD": "false"},
+    "tuned-4-workers": {"GUNICORN_WORKERS": "4"},
+}
+
+
+def _process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    try:
+        children = open(f"/proc/{pid}/task/{pid}/children").read().split()
+    except OSError:
+        return pids
+    for child in children:
+        pids += _process_tree(int(child))
+    return pids
+
+
+def memory_mb(pid: int) -> float | None:
+    """Proportional set size of a process tree; shared pages are split between sharers."""
+    total_kb = 0
+    for member in _process_tree(pid):
+        try:
+            for line in open(f"/proc/{member}/smaps_rollup"):
+                if line.startswith("Pss:"):
+                    total_kb += int(line.split()[1])
+        except OSError:
+            return None
+    return total_kb / 1024
+
+
+async def run_config(name: str, overrides: dict, database_url: str, targets: dict, args) -> None:
+    overrides = {**overrides, "BOT_BURST_MAX_REQUESTS": "1000000000"}
+    with gunicorn_server(database_url, overrides) as (base_url, pid):
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, headers={"user-agent": BROWSER_USER_AGENT},
+                                     follow_redirects=False, timeout=10) as client:
+            for label, path in targets.items():
+                async def send(n: int) -> int:
+                    return (await client.get(path)).status_code
+
+                await run_load(send, args.concurrency, duration=min(2.0, args.duration))  # warm-up
+                result = await run_load(send, args.concurrency, duration=args.duration)
+                memory = memory_mb(pid)
+                print(f"{name:>18} {label:>9}: {result['rps']:8.0f} req/s  p50 {result['p50_ms']:6.1f} ms  "
+                      f"p99 {result['p99_ms']:7.1f} ms  errors {result['errors']:>5}  "
+                      f"PSS {f'{memory:.1f} MB' if memory is not None else 'n/a'}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--configs", default="baseline,tuned", help=f"comma-separated, from {', '.join(CONFIGS)}")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    database_url = args.database_url or temp_database_url("loadtest.db")
+    engine = create_async_engine(database_url)
+    profile = (await seed(engine, profiles=1, events=0, leads=0))[0]
+    await engine.dispose()
+    targets = {"redirect": f"/r/{profile.link_ids[0]}", "bio": f"/u/{profile.handle}"}
+    for name in args.configs.split(","):
+        await run_config(name, CONFIGS[name], database_url, targets, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
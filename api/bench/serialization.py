@@ -0,0 +1,96 @@
+"""Fetch and JSON-encode one page of leads: ORM + response_model vs column rows + orjson.
+
+    python -m bench.serialization
+    python -m bench.serialization --leads 10000 --repeat 20
+
+Seeds one profile with --leads leads in a temporary SQLite file, then times
+the ways a JSON endpoint could fetch and serialize them, best of --repeat:
+
+    orm+validate   ORM objects, validated into LeadOut and dumped the way
+                   FastAPI's response_model path does, stdlib json
+    orm+dump_json  ORM objects through a pydantic TypeAdapter's dump_json
+    rows+json      column rows (crud.leads.get_lead_rows), stdlib json
+    rows+orjson    column rows, app.responses (what /api/v1/leads does)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from bench.common import temp_database_url
+
+
+async def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=10000, help="leads on the page")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    database_url = temp_database_url("serialization.db")
+    os.environ["DATABASE_URL"] = database_url
+    from app.crud import leads
+    from app.responses import _default, dumps, orjson
+    from app.schemas import LeadOut
+    from bench.seed import seed
+
+    engine = create_async_engine(database_url)
+    [profile] = await seed(engine, profiles=1, events=0, leads=args.leads)
+    leads_adapter = TypeAdapter(list[LeadOut])
+
+    def stdlib_json(content) -> bytes:
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    # name: (which fetch, encoder)
+    ways = {
+        "orm+validate": ("orm", lambda fetched: stdlib_json(
+            leads_adapter.dump_python(leads_adapter.validate_python(fetched), mode="json"))),
+        "orm+dump_json": ("orm", lambda fetched: leads_adapter.dump_json(leads_adapter.validate_python(fetched))),
+        "rows+json": ("rows", stdlib_json),
+    }
+    if orjson is not None:
+        ways["rows+orjson"] = ("rows", dumps)
+    else:
+        print("orjson is not installed (pip install -e '.[api]'); skipping rows+orjson", file=sys.stderr)
+
+    async with AsyncSession(engine) as db:
+        async def fetch_orm():
+            db.expunge_all()  # each run builds its objects afresh, as a request would
+            return await leads.get_leads(db, profile.id)
+
+        async def fetch_rows():
+            return await leads.get_lead_rows(db, profile.id, args.leads)
+
+        fetchers = {"orm": fetch_orm, "rows": fetch_rows}
+        fetched = {name: await fetch() for name, fetch in fetchers.items()}
+        assert len(fetched["rows"]) == args.leads
+
+        print(f"{args.leads} leads, best of {args.repeat}")
+        print(f"{'way':>14} {'fetch+encode ms':>16} {'encode ms':>10} {'KiB':>7}")
+        for name, (source, encode) in ways.items():
+            async def fetch_and_encode():
+                return encode(await fetchers[source]())
+
+            async def encode_only():
+                return encode(fetched[source])
+
+            total = await best_of(args.repeat, fetch_and_encode)
+            encoding = await best_of(args.repeat, encode_only)
+            size = len(encode(fetched[source])) / 1024
+            print(f"{name:>14} {total:16.1f} {encoding:10.1f} {size:7.0f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,70 @@
+"""Concurrent writes against SQLite under several gunicorn workers.
+
+    python -m bench.sqlite_concurrency
+    python -m bench.sqlite_concurrency --workers 8 --concurrency 64 --duration 20
+
+Runs the same mix of redirects and lead submissions (both write) against a
+fresh SQLite file with three engine profiles: the SQLite defaults, the
+production pragmas alone, and the pragmas plus the per-worker write lock
+(app/database.py). Errors are mostly "database is locked" 500s.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from bench.common import BROWSER_USER_AGENT, gunicorn_server, run_load, synthetic_ip, temp_database_url
+
+PROFILES = {
+    "defaults": {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_BUSY_TIMEOUT_MS": "5000",
+                 "SQLITE_CACHE_SIZE_KB": "2000", "SQLITE_MMAP_SIZE": "0", "SQLITE_WRITE_LOCK": "false"},
+    "pragmas": {"SQLITE_WRITE_LOCK": "false"},
+    "pragmas+lock": {"SQLITE_WRITE_LOCK": "true"},
+}
+
+
+def build_send(client: httpx.AsyncClient, profiles: list):
+    links = [link_id for p in profiles for link_id in p.link_ids]
+
+    async def send(n: int) -> int:
+        headers = {"user-agent": BROWSER_USER_AGENT, "x-forwarded-for": synthetic_ip(n)}
+        if n % 4 == 3:
+            profile = profiles[n % len(profiles)]
+            response = await client.post(f"/u/{profile.handle}/lead", headers=headers, data={
+                "name": f"Lead {n}", "email": f"lead{n % 500}@example.net", "message": "Interested in a showing."})
+        else:
+            response = await client.get(f"/r/{links[n % len(links)]}", headers=headers)
+        return response.status_code
+
+    return send
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per profile")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':>13} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name in args.profiles.split(","):
+        database_url = temp_database_url("concurrency.db")
+        os.environ["DATABASE_URL"] = database_url
+        from bench.seed import seed
+
+        seed_engine = create_async_engine(database_url)
+        profiles = await seed(seed_engine, profiles=20, events=0, leads=0)
+        await seed_engine.dispose()
+
+        overrides = {**PROFILES[name], "GUNICORN_WORKERS": str(args.workers)}
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        with gunicorn_server(database_url, overrides) as (base_url, _):
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                result = await run_load(build_send(client, profiles), args.concurrency, duration=args.duration)
+        print(f"{name:>13} {result['rps']:8.1f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} {result['errors']:7d}")
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
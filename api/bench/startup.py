@@ -0,0 +1,93 @@
+"""Worker startup: import-time profile of app.main and time-to-first-request.
+
+    python -m bench.startup --runs 5 --top 25
+
+The import report runs `python -X importtime -c "import app.main"` and lists
+the slowest modules by cumulative and self time. Time-to-first-request
+starts uvicorn in a fresh process (like a newly scaled-out container) and
+polls /health until it answers.
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _env(database_dir: str) -> dict:
+    return {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(database_dir, 'bench.db')}"}
+
+
+def import_profile(env: dict) -> list[tuple[int, int, str]]:
+    """(self_us, cumulative_us, module) for every module imported by app.main."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(env: dict, timeout: float = 30.0) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                connection.request("GET", "/health")
+                if connection.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("server did not answer /health in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as database_dir:
+        env = _env(database_dir)
+        rows = import_profile(env)
+        total = next(cumulative for _, cumulative, name in rows if name == "app.main")
+        print(f"import app.main: {total / 1000:.0f} ms, {len(rows)} modules")
+        print(f"\nslowest by cumulative time (top {args.top}):")
+        for self_us, cumulative_us, name in sorted(rows, key=lambda row: -row[1])[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}")
+        print("\napp modules:")
+        for self_us, cumulative_us, name in rows:
+            if name.startswith("app."):
+                print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        samples = [time_to_first_request(env) for _ in range(args.runs)]
+        print(f"\ntime to first request: median {statistics.median(samples) * 1000:.0f} ms, "
+              f"min {min(samples) * 1000:.0f} ms over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
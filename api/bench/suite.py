@@ -0,0 +1,176 @@
+"""Benchmark suite for the hot endpoints, with JSON results for comparing
+commits.
+
+    python -m bench.suite --output before.json
+    python -m bench.suite --output after.json --compare before.json
+    python -m bench.suite --mode http --database-url postgresql+psycopg://... --no-seed
+
+Seeds synthetic data (see bench/seed.py) unless --no-seed, then drives each
+scenario either in-process through httpx's ASGI transport (`asgi`, measures
+the app alone) or over TCP against gunicorn started with app/gunicorn_conf.py
+(`http`, includes the server and its workers). Every request carries a
+browser User-Agent and its own X-Forwarded-For address, so per-IP rate
+limits and the bot filter treat it as ordinary traffic.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+from bench.common import BROWSER_USER_AGENT, gunicorn_server, run_load, synthetic_ip, temp_database_url
+
+WEBHOOK_SECRET = "bench-webhook-secret"
+SCALES = {
+    "small": {"profiles": 100, "events": 100_000, "leads": 10_000},
+    "medium": {"profiles": 1_000, "events": 1_000_000, "leads": 100_000},
+    "large": {"profiles": 10_000, "events": 5_000_000, "leads": 1_000_000},
+}
+
+
+def webhook_body(profile, n: int) -> bytes:
+    return json.dumps({
+        "meta": {"event_name": "subscription_updated"},
+        "data": {"attributes": {
+            "user_email": profile.email,
+            "status": "active",
+            "variant_name": "Pro" if n % 2 else "Starter",
+            "renews_at": "2030-01-01T00:00:00Z",
+        }},
+    }).encode()
+
+
+def build_scenarios(profiles: list, session_token: str) -> dict:
+    """name -> function(n) returning the keyword arguments for client.request."""
+    links = [(p, link_id) for p in profiles for link_id in p.link_ids]
+    cookies = {"session": session_token}
+
+    def webhook(n):
+        body = webhook_body(profiles[n % len(profiles)], n)
+        signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        return {"method": "POST", "url": "/payments/lemonsqueezy/webhook", "content": body,
+                "headers": {"X-Signature": signature, "Content-Type": "application/json"}}
+
+    return {
+        "redirect": lambda n: {"method": "GET", "url": f"/r/{links[n % len(links)][1]}"},
+        "bio": lambda n: {"method": "GET", "url": f"/u/{profiles[n % len(profiles)].handle}"},
+        "dashboard": lambda n: {"method": "GET", "url": "/dashboard", "cookies": cookies},
+        "leads_export": lambda n: {"method": "GET", "url": "/dashboard/leads/export", "cookies": cookies},
+        "webhook": webhook,
+    }
+
+
+async def run_scenarios(client: httpx.AsyncClient, scenarios: dict, names: list[str], args) -> dict:
+    results = {}
+    for name in names:
+        make_request = scenarios[name]
+
+        async def send(n: int) -> int:
+            kwargs = make_request(n)
+            headers = {"user-agent": BROWSER_USER_AGENT, "x-forwarded-for": synthetic_ip(n), **kwargs.pop("headers", {})}
+            cookies = kwargs.pop("cookies", None)
+            if cookies:
+                # Per-request cookies are deprecated in httpx; send the header
+                headers["cookie"] = "; ".join(f"{key}={value}" for key, value in cookies.items())
+            response = await client.request(headers=headers, **kwargs)
+            return response.status_code
+
+        await run_load(send, args.concurrency, requests=max(1, args.requests // 10))  # warm-up
+        results[name] = await run_load(send, args.concurrency, requests=args.requests)
+        print(f"{name:>13}: {results[name]['rps']:8.1f} req/s  p50 {results[name]['p50_ms']:7.2f}  "
+              f"p95 {results[name]['p95_ms']:7.2f}  p99 {results[name]['p99_ms']:7.2f} ms  "
+              f"errors {results[name]['errors']}", file=sys.stderr)
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: dict, current: dict) -> list[str]:
+    lines = [f"{'scenario':>13}  {'req/s':>18}  {'p95 ms':>18}  (vs {previous.get('commit') or 'previous'})"]
+    for name, result in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if not old:
+            continue
+        rps_change = (result["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0.0
+        p95_change = (result["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        lines.append(f"{name:>13}  {old['rps']:7.1f} -> {result['rps']:7.1f}  {old['p95_ms']:7.2f} -> "
+                     f"{result['p95_ms']:7.2f}  ({rps_change:+.1f}% req/s, {p95_change:+.1f}% p95)")
+    return lines
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--no-seed", action="store_true", help="benchmark the data already in --database-url")
+    parser.add_argument("--mode", choices=["asgi", "http"], default="asgi")
+    parser.add_argument("--scenarios", default="redirect,bio,dashboard,leads_export,webhook")
+    parser.add_argument("--requests", type=int, default=2000, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON results to diff against")
+    args = parser.parse_args()
+
+    database_url = args.database_url or temp_database_url()
+    # Settings are read when app.config is first imported, here (asgi) or in
+    # gunicorn (http), so every app import below comes after this
+    os.environ.update({"DATABASE_URL": database_url, "LEMONSQUEEZY_WEBHOOK_SECRET": WEBHOOK_SECRET})
+    from app.security import create_session_token
+    from bench.seed import load_profiles, seed
+
+    engine = create_async_engine(database_url)
+    if not args.no_seed:
+        print(f"seeding {args.scale} dataset into {database_url}", file=sys.stderr)
+        await seed(engine, **SCALES[args.scale])
+    profiles = await load_profiles(engine)
+    await engine.dispose()
+
+    scenarios = build_scenarios(profiles, create_session_token(str(profiles[0].id)))
+    names = args.scenarios.split(",")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.mode == "asgi":
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            results = await run_scenarios(client, scenarios, names, args)
+    else:
+        with gunicorn_server(database_url) as (base_url, _):
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                results = await run_scenarios(client, scenarios, names, args)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": database_url.split(":", 1)[0],
+        "mode": args.mode,
+        "scale": "existing" if args.no_seed else args.scale,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        print("\n".join(compare(json.loads(Path(args.compare).read_text()), report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Per-worker cold start: app import time and first-request latency with and
+without the template bytecode cache.
+
+    python -m bench.templates --runs 5
+
+Each sample is a fresh interpreter, like a newly forked worker. Modes:
+
+    cold      empty TEMPLATE_CACHE_DIR, templates parsed on first request
+    bytecode  cache filled by `python -m app.templating` beforehand
+    preload   bytecode cache plus the startup load_all() the app lifespan runs
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PATHS = ["/", "/auth/login", "/auth/signup"]
+
+
+async def child(preload: bool) -> dict:
+    started = time.perf_counter()
+    import httpx
+    from app.main import app
+    from app.templating import load_all, templates
+    result = {"import_ms": (time.perf_counter() - started) * 1000, "preload_ms": 0.0}
+    if preload:
+        started = time.perf_counter()
+        load_all(templates.env)
+        result["preload_ms"] = (time.perf_counter() - started) * 1000
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        started = time.perf_counter()
+        for path in PATHS:
+            response = await client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        result["first_requests_ms"] = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        for path in PATHS:
+            await client.get(path)
+        result["warm_requests_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def sample(mode: str, cache_dir: str) -> dict:
+    env = {**os.environ, "TEMPLATE_CACHE_DIR": cache_dir, "ENV": "production",
+           "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(cache_dir, 'bench.db')}"}
+    output = subprocess.run(
+        [sys.executable, "-m", "bench.templates", "--child", mode],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=["cold", "bytecode", "preload"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import asyncio
+        print(json.dumps(asyncio.run(child(preload=args.child == "preload"))))
+        return
+
+    for mode in ["cold", "bytecode", "preload"]:
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                if mode != "cold":
+                    subprocess.run([sys.executable, "-m", "app.templating"], check=True, capture_output=True,
+                                   env={**os.environ, "TEMPLATE_CACHE_DIR": cache_dir})
+                samples.append(sample(mode, cache_dir))
+        medians = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+        print(f"{mode:>8}: import {medians['import_ms']:6.1f} ms, preload {medians['preload_ms']:5.1f} ms, "
+              f"first {len(PATHS)} requests {medians['first_requests_ms']:6.1f} ms, "
+              f"warm {medians['warm_requests_ms']:5.1f} ms (median of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
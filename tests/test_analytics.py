@@ -0,0 +1,70 @@
+from datetime import date, datetime
+import pytest
+from fastapi import HTTPException
+from app.models import Event, EventRollup, Link, LinkPage, Profile
+from app.crud.events import bucket_start, get_event_series
+from app.routers.analytics import analytics_series
+
+
+async def _owner(db):
+    profile = Profile(email="owner@example.com", handle="owner", password_hash="x")
+    db.add(profile)
+    await db.flush()
+    page = LinkPage(owner_id=profile.id)
+    db.add(page)
+    await db.flush()
+    link = Link(page_id=page.id, owner_id=profile.id, title="Shop", url="https://example.com")
+    db.add(link)
+    await db.flush()
+    return profile, page, link
+
+
+def test_bucket_start():
+    value = datetime(2026, 3, 4, 15, 42, 7, 123)
+    assert bucket_start(value, "hour") == datetime(2026, 3, 4, 15)
+    assert bucket_start(value, "day") == datetime(2026, 3, 4)
+
+
+@pytest.mark.asyncio
+async def test_hourly_series_is_grouped_in_sql(db):
+    profile, page, link = await _owner(db)
+    for minute in (1, 20, 59):
+        db.add(Event(owner_id=profile.id, page_id=page.id, type="link_click", link_id=link.id,
+                     created_at=datetime(2026, 3, 4, 10, minute)))
+    db.add(Event(owner_id=profile.id, page_id=page.id, type="page_view", created_at=datetime(2026, 3, 4, 11, 5)))
+    await db.commit()
+
+    series = await get_event_series(db, profile.id, datetime(2026, 3, 4), datetime(2026, 3, 5), "hour")
+
+    assert sorted(series, key=lambda row: row[0]) == [
+        (datetime(2026, 3, 4, 10), "link_click", link.id, 3),
+        (datetime(2026, 3, 4, 11), "page_view", None, 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_daily_series_reads_rolled_up_days_from_rollups(db):
+    profile, page, link = await _owner(db)
+    db.add(EventRollup(owner_id=profile.id, page_id=page.id, link_id=link.id, type="link_click",
+                       day=date(2026, 3, 1), count=40))
+    db.add(Event(owner_id=profile.id, page_id=page.id, type="link_click", link_id=link.id,
+                 created_at=datetime(2026, 3, 2, 8)))
+    await db.commit()
+
+    series = await get_event_series(db, profile.id, datetime(2026, 2, 28), datetime(2026, 3, 3), "day")
+
+    assert sorted(series, key=lambda row: row[0]) == [
+        (datetime(2026, 3, 1), "link_click", link.id, 40),
+        (datetime(2026, 3, 2), "link_click", link.id, 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_series_without_a_link_page_is_not_found(db):
+    profile = Profile(email="owner@example.com", handle="owner", password_hash="x")
+    db.add(profile)
+    await db.flush()
+
+    with pytest.raises(HTTPException) as error:
+        await analytics_series(start=None, end=None, granularity="day", db=db, current_user=profile)
+    assert error.value.status_code == 404
@@ -0,0 +1,95 @@
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.crud import leads, profiles
+from app.deps import get_db
+from app.main import app
+from app.schemas import LeadCreate
+from app.security import create_session_token, generate_csrf_token
+
+
+@pytest_asyncio.fixture
+async def api(engine):
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def test_db():
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+
+    async with session_factory() as db:
+        profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+        other = await profiles.create_profile_with_password(db, "john@example.com", "john", "x")
+        for n in range(5):
+            await leads.submit_lead(db, profile.id, LeadCreate(name=f"Lead {n}", email=f"lead{n}@example.com"))
+        await db.commit()
+
+    app.dependency_overrides[get_db] = test_db
+    headers = {"Authorization": f"Bearer {create_session_token(str(profile.id))}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", headers=headers) as client:
+        client.other_token = create_session_token(str(other.id))
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_links_crud(api):
+    assert (await api.get("/api/v1/links", headers={"Authorization": ""})).status_code == 401
+
+    first = (await api.post("/api/v1/links", json={"title": "Listings", "url": "https://example.com/a"})).json()
+    second = (await api.post("/api/v1/links", json={"title": "Reviews", "url": "https://example.com/b"})).json()
+    assert (first["position"], second["position"], second["url"]) == (0, 1, "https://example.com/b")
+
+    response = await api.patch(f"/api/v1/links/{second['id']}", json={"title": "Testimonials", "is_active": False})
+    assert response.json()["title"] == "Testimonials" and response.json()["is_active"] is False
+    assert (await api.post("/api/v1/links/reorder", json={"link_ids": [second["id"], first["id"]]})).status_code == 204
+    assert [link["title"] for link in (await api.get("/api/v1/links")).json()] == ["Testimonials", "Listings"]
+
+    # Another account sees 404s, and its own empty list
+    other = {"Authorization": f"Bearer {api.other_token}"}
+    assert (await api.patch(f"/api/v1/links/{first['id']}", json={"title": "x"}, headers=other)).status_code == 404
+    assert (await api.delete(f"/api/v1/links/{first['id']}", headers=other)).status_code == 404
+    assert (await api.get("/api/v1/links", headers=other)).json() == []
+
+    assert (await api.delete(f"/api/v1/links/{first['id']}")).status_code == 204
+    assert len((await api.get("/api/v1/links")).json()) == 1
+
+    # Free plan: three links
+    for n in range(2):
+        await api.post("/api/v1/links", json={"title": f"Link {n}", "url": "https://example.com"})
+    assert (await api.post("/api/v1/links", json={"title": "One more", "url": "https://example.com"})).status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_cookie_auth_needs_csrf(api):
+    api.cookies.set("session", api.headers.pop("Authorization").split()[1])
+    assert (await api.get("/api/v1/links")).status_code == 200
+    response = await api.post("/api/v1/links", json={"title": "Listings", "url": "https://example.com"})
+    assert response.status_code == 403
+    # Any other Authorization scheme still authenticates by cookie
+    response = await api.post("/api/v1/links", json={"title": "Listings", "url": "https://example.com"},
+                              headers={"Authorization": "Basic eDp5"})
+    assert response.status_code == 403
+
+    csrf = {"X-CSRF-Token": generate_csrf_token()}
+    link = (await api.post("/api/v1/links", json={"title": "Listings", "url": "https://example.com"},
+                           headers=csrf)).json()
+    assert (await api.patch(f"/api/v1/links/{link['id']}", json={"title": "x"})).status_code == 403
+    assert (await api.patch(f"/api/v1/links/{link['id']}", json={"title": "x"}, headers=csrf)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_leads_pages_and_stats(api):
+    page = (await api.get("/api/v1/leads", params={"limit": 2})).json()
+    assert set(page["leads"][0]) == {"id", "name", "email", "message", "created_at", "submission_count",
+                                     "last_submitted_at"}
+    seen = [lead["email"] for lead in page["leads"]]
+    while page["next_cursor"]:
+        page = (await api.get("/api/v1/leads", params={"limit": 2, "cursor": page["next_cursor"]})).json()
+        seen += [lead["email"] for lead in page["leads"]]
+    assert sorted(seen) == [f"lead{n}@example.com" for n in range(5)]
+
+    assert (await api.get("/api/v1/leads", params={"cursor": "nope"})).status_code == 400
+    stats = (await api.get("/api/v1/stats")).json()
+    assert (stats["leads"], stats["page_views"], stats["clicks_per_link"]) == (5, 0, {})
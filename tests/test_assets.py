@@ -0,0 +1,28 @@
+import json
+from app.assets import FINGERPRINT_RE, _accepted_encodings, build, fingerprinted_name
+
+
+def test_fingerprinted_name_changes_with_content():
+    first = fingerprinted_name("css/style.css", b"body{}")
+    assert FINGERPRINT_RE.search(first)
+    assert first != fingerprinted_name("css/style.css", b"body{color:red}")
+
+
+def test_build_writes_manifest_and_compressed_variants(tmp_path):
+    static_dir = tmp_path / "static"
+    (static_dir / "css").mkdir(parents=True)
+    (static_dir / "css" / "site.css").write_text("body { margin: 0; }\n" * 50)
+    dist_dir = static_dir / "dist"
+
+    manifest = build(static_dir, dist_dir)
+
+    built = dist_dir / manifest["css/site.css"]
+    assert built.read_text() == (static_dir / "css" / "site.css").read_text()
+    assert built.with_name(built.name + ".gz").exists()
+    assert json.loads((dist_dir / "manifest.json").read_text()) == manifest
+    # Rebuilding never fingerprints the previous output
+    assert list(build(static_dir, dist_dir)) == ["css/site.css"]
+
+
+def test_accepted_encodings_skips_refused_codings():
+    assert _accepted_encodings("br;q=0, gzip;q=0.8, deflate") == {"gzip", "deflate"}
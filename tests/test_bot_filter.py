@@ -0,0 +1,68 @@
+import pytest
+from starlette.requests import Request
+from app import bot_filter
+from app.bot_filter import classify_request, is_bot_user_agent
+from app.config import settings
+from app.shared_state import SlidingWindowCounter
+
+BROWSER_UA = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Version/17.4 Mobile/15E148 Safari/604.1"
+
+
+def _request(method="GET", ip="203.0.113.7", **headers) -> Request:
+    raw_headers = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": method, "path": "/r/x", "headers": raw_headers,
+                    "client": (ip, 1234), "query_string": b""})
+
+
+def test_known_crawlers_and_libraries_are_bots():
+    for user_agent in [
+        "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+        "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+        "Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)",
+        "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+        "Mozilla/5.0 (Linux; Android 7.0;) AppleWebKit/537.36 (KHTML, like Gecko) Mobile Safari/537.36 (compatible; PetalBot;+https://webmaster.petalsearch.com/site/petalbot)",
+        "Twitterbot/1.0",
+        "TelegramBot (like TwitterBot)",
+        "Mozilla/5.0+(compatible; UptimeRobot/2.0; http://www.uptimerobot.com/)",
+        "Site24x7",
+        "python-requests/2.31.0",
+        "",
+    ]:
+        assert is_bot_user_agent(user_agent), user_agent
+
+
+def test_people_are_not_bots():
+    for user_agent in [
+        BROWSER_UA,
+        # A phone brand, not a crawler
+        "Mozilla/5.0 (Linux; Android 12; CUBOT KINGKONG 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+        "Mozilla/5.0 (Linux; Android 10; CUBOT_X30) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Mobile Safari/537.36",
+        # An app's in-app browser that happens to say "monitor"
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 HeartMonitor/3.2",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    ]:
+        assert not is_bot_user_agent(user_agent), user_agent
+
+
+@pytest.mark.asyncio
+async def test_head_and_prefetch_requests_are_not_counted():
+    assert await classify_request(_request(method="HEAD", user_agent=BROWSER_UA), None) == "head"
+    assert await classify_request(_request(user_agent=BROWSER_UA, sec_purpose="prefetch;prerender"), None) == "prefetch"
+    assert await classify_request(_request(user_agent=BROWSER_UA, ip="198.51.100.1"), None) is None
+
+
+def test_burst_detector_flags_ips_over_the_window_limit():
+    detector = SlidingWindowCounter(max_requests=3, window_seconds=10)
+    assert [detector.hit("1.2.3.4", now=t) for t in (0, 1, 2, 3)] == [False, False, False, True]
+    # Old hits fall out of the window
+    assert detector.hit("1.2.3.4", now=30) is False
+    assert detector.hit("5.6.7.8", now=3) is False
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_counted_in_memory_whatever_the_rate_limit_backend(monkeypatch):
+    # No database session needed: public hits stay read-only
+    monkeypatch.setattr(settings, "BOT_BURST_MAX_REQUESTS", 2)
+    assert bot_filter.burst_state.name == "memory"
+    results = [await classify_request(_request(user_agent=BROWSER_UA, ip="198.51.100.9"), None) for _ in range(3)]
+    assert results == [None, None, "burst"]
@@ -0,0 +1,112 @@
+"""Each CRUD write is a fixed number of statements: no refresh() or
+read-before-write round trips."""
+import pytest
+from app.crud import events, leads, links, profiles, subs
+from app.schemas import EventCreate, LeadCreate, LinkCreate, LinkUpdate, ProfileUpdate
+
+
+def _writes(statements):
+    return [statement.split()[0].upper() for statement in statements]
+
+
+@pytest.mark.asyncio
+async def test_profile_writes(db, statements):
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    assert _writes(statements) == ["INSERT", "INSERT"]
+    assert profile.link_page.owner_id == profile.id and profile.created_at is not None
+
+    statements.clear()
+    profile = await profiles.update_profile(db, profile, ProfileUpdate(bio="Realtor"))
+    assert _writes(statements) == ["UPDATE"]
+    assert profile.bio == "Realtor"
+
+
+@pytest.mark.asyncio
+async def test_link_writes(db, statements):
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    other = await profiles.create_profile_with_password(db, "john@example.com", "john", "x")
+
+    statements.clear()
+    first = await links.create_link(db, profile.link_page, LinkCreate(title="Listings", url="https://example.com/a"))
+    second = await links.create_link(db, profile.link_page, LinkCreate(title="Reviews", url="https://example.com/b"))
+    assert _writes(statements) == ["INSERT", "UPDATE"] * 2
+    assert (first.position, second.position, second.clicks, second.is_active) == (0, 1, 0, True)
+    assert second.owner_id == profile.id
+
+    # Ownership is part of each write's WHERE clause: one statement, no lookup
+    statements.clear()
+    updated = await links.update_link(db, profile.id, second.id, LinkUpdate(title="Testimonials"))
+    assert _writes(statements) == ["UPDATE", "UPDATE"]
+    assert updated.title == "Testimonials"
+
+    statements.clear()
+    assert await links.update_link(db, other.id, second.id, LinkUpdate(title="Mine now")) is None
+    assert not await links.delete_link(db, other.id, first.id)
+    await links.reorder_links(db, other.id, [second.id, first.id])
+    # Nothing matched, so the profile isn't touched either
+    assert _writes(statements) == ["UPDATE", "DELETE", "UPDATE"]
+
+    statements.clear()
+    await links.reorder_links(db, profile.id, [second.id, first.id])
+    assert _writes(statements) == ["UPDATE", "UPDATE"]
+    assert [(link.title, link.position) for link in await links.get_links(db, profile.link_page.id)] == [
+        ("Testimonials", 0), ("Listings", 1)]
+
+    statements.clear()
+    assert await links.delete_link(db, profile.id, first.id)
+    assert _writes(statements) == ["DELETE", "UPDATE"]
+
+
+@pytest.mark.asyncio
+async def test_event_lead_and_subscription_writes(db, statements):
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+
+    statements.clear()
+    event = await events.create_event(db, profile.id, EventCreate(type="page_view", page_id=profile.link_page.id))
+    assert _writes(statements) == ["INSERT"]
+    assert event.id is not None and event.created_at is not None
+
+    statements.clear()
+    lead = await leads.submit_lead(db, profile.id, LeadCreate(name="Bob", email="bob@example.com"))
+    # Lead upsert, submission, webhook job
+    assert _writes(statements) == ["INSERT", "INSERT", "INSERT"]
+    assert lead.submission_count == 1
+
+    statements.clear()
+    await subs.upsert_subscription(db, profile.id, "active", "starter")
+    subscription = await subs.upsert_subscription(db, profile.id, "cancelled", "pro")
+    assert _writes(statements) == ["INSERT", "INSERT"]
+    assert (subscription.status, subscription.plan, subscription.provider) == ("cancelled", "pro", "lemonsqueezy")
+
+
+@pytest.mark.asyncio
+async def test_request_session_commits_once_or_rolls_back(engine, monkeypatch):
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from app import deps
+
+    monkeypatch.setattr(deps, "AsyncSessionLocal", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    commits = []
+    event.listen(engine.sync_engine, "commit", lambda conn: commits.append(conn))
+
+    request = deps.get_db()
+    db = await anext(request)
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    await links.create_link(db, profile.link_page, LinkCreate(title="Listings", url="https://example.com/a"))
+    await events.create_event(db, profile.id, EventCreate(type="page_view", page_id=profile.link_page.id))
+    with pytest.raises(StopAsyncIteration):
+        await anext(request)
+    assert len(commits) == 1
+
+    failing = deps.get_db()
+    db = await anext(failing)
+    await profiles.create_profile_with_password(db, "john@example.com", "john", "x")
+    with pytest.raises(RuntimeError):
+        await failing.athrow(RuntimeError("endpoint failed"))
+    assert len(commits) == 1
+
+    check = deps.get_db()
+    db = await anext(check)
+    assert await profiles.get_profile_by_handle(db, "jane") is not None
+    assert await profiles.get_profile_by_handle(db, "john") is None
+    await check.aclose()
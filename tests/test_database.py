@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.crud import profiles
+from app.database import SerializedWriteSession, configure_sqlite
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}")
+    configure_sqlite(engine)
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+        assert (await conn.execute(text("PRAGMA cache_size"))).scalar() == -65536
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_writers_queue_and_readers_do_not(engine):
+    session_factory = async_sessionmaker(engine, class_=SerializedWriteSession, expire_on_commit=False)
+    async with session_factory() as first, session_factory() as second, session_factory() as reader:
+        await profiles.create_profile_with_password(first, "jane@example.com", "jane", "x")
+
+        # Reads go straight through while a write transaction is open
+        assert await profiles.get_profile_by_handle(reader, "john") is None
+
+        queued = asyncio.create_task(profiles.create_profile_with_password(second, "john@example.com", "john", "x"))
+        await asyncio.sleep(0.05)
+        assert not queued.done()
+
+        await first.commit()
+        await queued
+        await second.commit()
+        assert await profiles.get_profile_by_handle(reader, "john") is not None
+
+        # A failed writer releases the lock on rollback
+        await profiles.create_profile_with_password(first, "ann@example.com", "ann", "x")
+        await first.rollback()
+        await profiles.create_profile_with_password(second, "bob@example.com", "bob", "x")
+        await second.commit()
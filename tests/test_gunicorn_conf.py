@@ -0,0 +1,30 @@
+from app import gunicorn_conf
+from app.config import settings
+
+
+def test_cpu_quota_reads_cgroup_v2(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert gunicorn_conf.cpu_quota(tmp_path) == 1.5
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert gunicorn_conf.cpu_quota(tmp_path) is None
+
+
+def test_cpu_quota_reads_cgroup_v1(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("300000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert gunicorn_conf.cpu_quota(tmp_path) == 3.0
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert gunicorn_conf.cpu_quota(tmp_path) is None
+
+
+def test_worker_count_follows_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr(gunicorn_conf.os, "sched_getaffinity", lambda pid: set(range(16)))
+    (tmp_path / "cpu.max").write_text("300000 100000\n")
+    assert gunicorn_conf.worker_count(tmp_path) == 3
+
+    (tmp_path / "cpu.max").write_text("50000 100000\n")
+    assert gunicorn_conf.worker_count(tmp_path) == 2
+
+    monkeypatch.setattr(settings, "GUNICORN_WORKERS", 5)
+    assert gunicorn_conf.worker_count(tmp_path) == 5
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import date
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.hll import HyperLogLog
+from app.models import Profile
+from app.visitors import VisitorSketchBuffer
+from app.crud.visitors import get_unique_visitors_count
+
+
+def _sketch(values) -> HyperLogLog:
+    sketch = HyperLogLog()
+    for value in values:
+        sketch.add(str(value).encode())
+    return sketch
+
+
+def test_count_is_within_error_bounds():
+    assert _sketch(range(50)).count() == 50
+    estimate = _sketch(range(200_000)).count()
+    assert abs(estimate - 200_000) / 200_000 < 0.05
+
+
+def test_merge_counts_the_union():
+    merged = _sketch(range(0, 60_000)).merge(_sketch(range(40_000, 100_000)))
+    assert abs(merged.count() - 100_000) / 100_000 < 0.05
+
+
+def test_serialized_sketch_stays_a_few_kilobytes():
+    sketch = _sketch(range(1_000_000))
+    data = sketch.to_bytes()
+    assert len(data) <= 4096 + 64
+    assert HyperLogLog.from_bytes(data).registers == sketch.registers
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_mergeable_sketches(db):
+    profile = Profile(email="owner@example.com", handle="owner", password_hash="x")
+    db.add(profile)
+    await db.commit()
+
+    # Two workers see overlapping visitors on the same day
+    for worker_visitors in (range(0, 300), range(200, 500)):
+        buffer = VisitorSketchBuffer(flush_interval=60)
+        for n in worker_visitors:
+            buffer.add(profile.id, f"10.0.{n // 256}.{n % 256}", "Mozilla/5.0")
+        await buffer.flush(db)
+        await db.commit()
+        assert buffer.pending == {}
+
+    assert abs(await get_unique_visitors_count(db, profile.id) - 500) <= 15
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_from_its_own_task(db, engine):
+    profile = Profile(email="owner@example.com", handle="owner", password_hash="x")
+    db.add(profile)
+    await db.commit()
+
+    buffer = VisitorSketchBuffer(flush_interval=0.05)
+    await buffer.start(async_sessionmaker(engine, expire_on_commit=False))
+    buffer.add(profile.id, "10.0.0.1", "Mozilla/5.0")
+    for _ in range(100):
+        if await get_unique_visitors_count(db, profile.id):
+            break
+        await asyncio.sleep(0.01)
+    assert await get_unique_visitors_count(db, profile.id) == 1
+    assert buffer.pending == {}
+
+    # Whatever is left when the worker stops is flushed on the way out
+    buffer.add(profile.id, "10.0.0.2", "Mozilla/5.0")
+    await buffer.stop()
+    assert await get_unique_visitors_count(db, profile.id) == 2
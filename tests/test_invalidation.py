@@ -0,0 +1,71 @@
+import asyncio
+import socket
+import pytest
+from app.config import settings
+from app.crud import links, profiles
+from app.invalidation import InvalidationBus
+from app.routers import public
+from app.schemas import LinkCreate, LinkUpdate, ProfileUpdate
+
+
+@pytest.mark.asyncio
+async def test_local_transport_reaches_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INVALIDATION_SOCKET_DIR", str(tmp_path))
+    sender, receiver = InvalidationBus(), InvalidationBus()
+    received = []
+    receiver.subscribe("link", received.append)
+    await sender.start("local")
+    await receiver.start("local")
+    # Left behind by a worker that died without cleaning up
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    dead.bind(str(tmp_path / "1-dead.sock"))
+    dead.close()
+
+    sender.publish("link", "a", "b")
+    for _ in range(100):
+        if received:
+            break
+        await asyncio.sleep(0.01)
+    await sender.stop()
+    await receiver.stop()
+
+    assert received == ["a", "b"]
+    assert not (tmp_path / "1-dead.sock").exists()
+    stats = receiver.stats()
+    assert stats["transport"] == "none" and stats["received"] == 1 and stats["latency_p99_ms"] < 1000
+
+
+@pytest.mark.asyncio
+async def test_link_writes_drop_cached_targets_on_commit(db):
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    link = await links.create_link(db, profile.link_page, LinkCreate(title="Listings", url="https://example.com/a"))
+    owner_id, link_id = profile.id, link.id
+    await db.commit()
+    assert (await links.get_link_target(db, link_id)).url == "https://example.com/a"
+    assert links.link_targets.get(str(link_id)) is not None
+
+    await links.delete_link(db, owner_id, link_id)
+    await db.rollback()
+    assert links.link_targets.get(str(link_id)) is not None
+
+    await links.update_link(db, owner_id, link_id, LinkUpdate(url="https://example.com/b"))
+    assert links.link_targets.get(str(link_id)) is not None
+    await db.commit()
+    assert links.link_targets.get(str(link_id)) is None
+    assert (await links.get_link_target(db, link_id)).url == "https://example.com/b"
+
+
+@pytest.mark.asyncio
+async def test_profile_writes_drop_public_pages(db):
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    await db.commit()
+    public.page_owners.set("jane", (profile.id, profile.link_page.id))
+    public.rendered_pages.set(str(profile.id), "<html>")
+
+    await links.create_link(db, profile.link_page, LinkCreate(title="Listings", url="https://example.com/a"))
+    await db.commit()
+    assert public.rendered_pages.get(str(profile.id)) is None and public.page_owners.get("jane") is not None
+
+    await profiles.update_profile(db, profile, ProfileUpdate(handle="jane-doe"))
+    await db.commit()
+    assert public.page_owners.get("jane") is None
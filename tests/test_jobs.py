@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app import jobs
+from app.models import Job
+
+ran = []
+in_flight = {"now": 0, "max": 0}
+
+
+@jobs.job("test.record", queue="test")
+async def record(db, payload):
+    ran.append(payload["n"])
+    in_flight["now"] += 1
+    in_flight["max"] = max(in_flight["max"], in_flight["now"])
+    await asyncio.sleep(payload.get("sleep", 0))
+    in_flight["now"] -= 1
+
+
+@jobs.job("test.broken", queue="test", max_attempts=3, backoff=0.0)
+async def broken(db, payload):
+    raise RuntimeError("receiver down")
+
+
+@jobs.job("test.later", queue="test")
+async def later(db, payload):
+    raise jobs.RetryJob("rate limited", 60)
+
+
+@jobs.job("test.periodic", queue="test", every=3600)
+async def periodic(db, payload):
+    ran.append("periodic")
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    ran.clear()
+    in_flight.update(now=0, max=0)
+
+
+def _worker(engine, concurrency=1, **options):
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return jobs.JobWorker({"test": concurrency}, session_factory=sessions, **options)
+
+
+@pytest.mark.asyncio
+async def test_runs_by_priority_then_due_time(db, engine):
+    await jobs.enqueue(db, "test.record", {"n": 1})
+    await jobs.enqueue(db, "test.record", {"n": 2}, priority=10)
+    await jobs.enqueue(db, "test.record", {"n": 3}, run_at=datetime.utcnow() + timedelta(hours=1))
+    await jobs.enqueue(db, "test.record", {"n": 4})
+    await db.commit()
+
+    await _worker(engine).run_until_idle()
+    assert ran == [2, 1, 4]
+    [job] = (await db.execute(select(Job))).scalars()
+    assert job.payload == {"n": 3} and job.status == "queued"
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_then_stay_failed(db, engine):
+    await jobs.enqueue(db, "test.broken", {})
+    await jobs.enqueue(db, "test.later", {})
+    await db.commit()
+
+    worker = _worker(engine)
+    await worker.run_until_idle()
+    assert worker.failed == 1
+    rows = {job.name: job for job in (await db.execute(select(Job))).scalars()}
+    assert rows["test.broken"].status == "failed" and rows["test.broken"].attempts == 3
+    assert rows["test.broken"].last_error == "RuntimeError: receiver down"
+    assert rows["test.later"].status == "queued" and rows["test.later"].attempts == 1
+    assert rows["test.later"].run_at > datetime.utcnow() + timedelta(seconds=55)
+
+
+@pytest.mark.asyncio
+async def test_workers_share_a_queue_without_running_a_job_twice(db, engine):
+    for n in range(40):
+        await jobs.enqueue(db, "test.record", {"n": n, "sleep": 0.01})
+    await db.commit()
+
+    first, second = _worker(engine, concurrency=3), _worker(engine, concurrency=3)
+    await asyncio.gather(first.run_until_idle(), second.run_until_idle())
+    assert sorted(ran) == list(range(40))
+    assert first.completed > 0 and second.completed > 0
+    # Each worker keeps to its own cap
+    assert in_flight["max"] <= 6
+
+
+@pytest.mark.asyncio
+async def test_periodic_jobs_are_scheduled_once_and_commits_wake_workers(db, engine):
+    workers = [_worker(engine, poll_interval=30), _worker(engine, poll_interval=30)]
+    for worker in workers:
+        await worker.start()
+    [job] = (await db.execute(select(Job))).scalars()
+    assert job.name == "test.periodic" and job.run_at.minute == 0 and job.run_at > datetime.utcnow()
+
+    # Woken by the commit rather than the 30 second poll
+    await jobs.enqueue(db, "test.record", {"n": 1})
+    await db.commit()
+    for _ in range(100):
+        if ran:
+            break
+        await asyncio.sleep(0.01)
+    assert ran == [1]
+
+    # A worker that died mid-job leaves it to be picked up again
+    await db.execute(update(Job).values(status="running", locked_at=datetime.utcnow() - timedelta(hours=1)))
+    assert await jobs.requeue_stale_jobs(db, lock_timeout=600) == 1
+    await db.commit()
+    for worker in workers:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_stale_jobs_on_their_last_attempt_fail(db):
+    await jobs.enqueue(db, "test.broken", {})
+    await jobs.enqueue(db, "test.record", {"n": 1})
+    await jobs.enqueue(db, "test.periodic", {})
+    await db.execute(update(Job).values(status="running", attempts=3, locked_at=datetime.utcnow() - timedelta(hours=1)))
+    await db.execute(update(Job).where(Job.name == "test.periodic").values(attempts=Job.max_attempts))
+    await db.commit()
+
+    assert await jobs.requeue_stale_jobs(db, lock_timeout=600) == 3
+    await db.commit()
+    db.expire_all()
+    rows = sorted((job.name, job.status) for job in (await db.execute(select(Job))).scalars())
+    # test.record allows the default JOB_MAX_ATTEMPTS; the periodic job's
+    # next occurrence is still scheduled
+    assert rows == [("test.broken", "failed"), ("test.periodic", "failed"), ("test.periodic", "queued"),
+                    ("test.record", "queued")]
+    errors = (await db.execute(select(Job.last_error).where(Job.status == "failed"))).scalars().all()
+    assert errors == ["Worker stopped responding"] * 2
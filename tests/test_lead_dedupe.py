@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+import pytest
+from sqlalchemy import insert, select, text
+from app.crud import leads, profiles
+from app.lead_dedupe import dedupe_leads
+from app.models import Lead, LeadSubmission
+from app.schemas import LeadCreate
+
+
+@pytest.mark.asyncio
+async def test_repeat_submissions_merge_into_one_lead(db):
+    profile = await profiles.create_profile_with_password(db, "agent@example.com", "agent", "x")
+    first = await leads.submit_lead(db, profile.id, LeadCreate(name="Jane", email="jane@example.com", message="Hi"))
+    again = await leads.submit_lead(db, profile.id, LeadCreate(name="Jane Doe", email=" JANE@example.com"))
+
+    assert again.id == first.id
+    assert (again.name, again.message, again.submission_count) == ("Jane Doe", "Hi", 2)
+    assert len(await leads.get_leads(db, profile.id)) == 1
+    history = (await db.execute(select(LeadSubmission.name).where(LeadSubmission.lead_id == first.id))).scalars().all()
+    assert sorted(history) == ["Jane", "Jane Doe"]
+
+
+@pytest.mark.asyncio
+async def test_dedupe_job_merges_existing_duplicates(engine, db):
+    profile = await profiles.create_profile_with_password(db, "agent@example.com", "agent", "x")
+    other = await profiles.create_profile_with_password(db, "other@example.com", "other", "x")
+    await db.commit()
+    # Data from before the unique index existed
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX uq_leads_owner_id_email_normalized"))
+    start = datetime(2026, 1, 1)
+    rows = [(profile.id, "Jane", "jane@example.com", "First", 0), (profile.id, "Jane D", "Jane@Example.com", None, 1),
+            (profile.id, "Jane Doe", "jane@example.com", "Latest", 2), (other.id, "Jane", "jane@example.com", None, 0)]
+    for owner_id, name, email, message, day in rows:
+        created_at = start + timedelta(days=day)
+        lead_id = uuid4()
+        await db.execute(insert(Lead).values(
+            id=lead_id, owner_id=owner_id, name=name, email=email, email_normalized=leads.normalize_email(email),
+            message=message, submission_count=1, created_at=created_at, last_submitted_at=created_at))
+        await db.execute(insert(LeadSubmission).values(
+            id=lead_id, lead_id=lead_id, name=name, message=message, created_at=created_at))
+    await db.commit()
+
+    stats = await dedupe_leads(engine, batch_size=1)
+
+    assert stats == {"normalized": 0, "groups": 1, "removed": 2}
+    profile_id, other_id = profile.id, other.id
+    db.expire_all()
+    merged = (await leads.get_leads(db, profile_id))[0]
+    assert (merged.name, merged.message, merged.submission_count) == ("Jane Doe", "Latest", 3)
+    assert merged.created_at == start and merged.last_submitted_at == start + timedelta(days=2)
+    assert len((await db.execute(select(LeadSubmission).where(LeadSubmission.lead_id == merged.id))).all()) == 3
+    assert len(await leads.get_leads(db, other_id)) == 1
@@ -0,0 +1,117 @@
+import json
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import leads, profiles
+from app.lead_import import csv_records, import_leads, json_records
+from app.models import LeadSubmission
+from app.schemas import LeadCreate
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _collect(records):
+    return [record async for record in records]
+
+
+@pytest.mark.asyncio
+async def test_csv_rows_survive_chunk_boundaries_and_quoted_newlines():
+    data = ('﻿Full Name,E-mail,Notes,Ignored\r\n'
+            'Jane Doe,jane@example.com,"Call me,\r\nafter 5 ""please""",x\r\n'
+            '\r\n'
+            'John,john@example.com,,y').encode()
+
+    rows = await _collect(csv_records(_chunks(data)))
+
+    assert rows == [
+        (2, {"name": "Jane Doe", "email": "jane@example.com", "message": 'Call me,\r\nafter 5 "please"'}),
+        (4, {"name": "John", "email": "john@example.com", "message": ""}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_json_array_and_ndjson_are_streamed():
+    objects = [{"name": "Jane", "email": "jane@example.com"}, {"First Name": "John", "Last Name": "Roe", "email": "j@x.io"}]
+    array = json.dumps(objects, indent=2).encode()
+    ndjson = "\n".join(map(json.dumps, objects)).encode()
+
+    assert await _collect(json_records(_chunks(array))) == await _collect(json_records(_chunks(ndjson, 3)))
+    assert (await _collect(json_records(_chunks(ndjson))))[1] == (2, {"first_name": "John", "last_name": "Roe", "email": "j@x.io"})
+
+
+@pytest.mark.asyncio
+async def test_import_dedupes_reports_errors_and_commits_batches(db, monkeypatch):
+    monkeypatch.setattr("app.lead_import.IMPORT_BATCH_SIZE", 2)
+    profile = await profiles.create_profile_with_password(db, "agent@example.com", "agent", "x")
+    await leads.submit_lead(db, profile.id, LeadCreate(name="Existing", email="Jane@Example.com"))
+    data = ("name,email,created_at\n"
+            "Jane,jane@example.com,\n"
+            "Bob,bob@example.com,2024-01-02T03:04:05+01:00\n"
+            "Nobody,not-an-email,\n"
+            "Bobby,BOB@example.com,\n"
+            "Ann,ann@example.com,\n").encode()
+
+    updates = await _collect(import_leads(db, profile.id, csv_records(_chunks(data))))
+
+    assert [update["type"] for update in updates] == ["progress", "error", "progress", "done"]
+    assert updates[1]["row"] == 4
+    assert updates[-1] == {"type": "done", "rows": 5, "imported": 2, "duplicates": 2, "errors": 1}
+    by_email = {lead.email: lead for lead in await leads.get_leads(db, profile.id)}
+    assert set(by_email) == {"Jane@example.com", "bob@example.com", "ann@example.com"}
+    assert by_email["bob@example.com"].created_at.isoformat() == "2024-01-02T02:04:05"
+
+
+@pytest.mark.asyncio
+async def test_malformed_file_fails_after_keeping_valid_rows(db):
+    profile = await profiles.create_profile_with_password(db, "agent@example.com", "agent", "x")
+    data = b'[{"name": "Jane", "email": "jane@example.com"}, {"name": "Broken", '
+
+    updates = await _collect(import_leads(db, profile.id, json_records(_chunks(data))))
+
+    assert updates[-1]["type"] == "failed"
+    assert updates[-1]["imported"] == 1
+    assert [lead.email for lead in await leads.get_leads(db, profile.id)] == ["jane@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_leads_submitted_during_an_import_are_counted_as_duplicates(db, engine, monkeypatch):
+    profile = await profiles.create_profile_with_password(db, "agent@example.com", "agent", "x")
+    await db.commit()
+    lookup = leads.get_existing_emails
+
+    async def submitted_after_lookup(session, owner_id, emails):
+        existing = await lookup(session, owner_id, emails)
+        async with AsyncSession(engine) as other:
+            await leads.submit_lead(other, owner_id, LeadCreate(name="Form", email="jane@example.com"))
+            await other.commit()
+        return existing
+
+    monkeypatch.setattr(leads, "get_existing_emails", submitted_after_lookup)
+    data = b"name,email\nJane,jane@example.com\nBob,bob@example.com\n"
+
+    updates = await _collect(import_leads(db, profile.id, csv_records(_chunks(data))))
+
+    assert updates[-1] == {"type": "done", "rows": 2, "imported": 1, "duplicates": 1, "errors": 0}
+    by_email = {lead.email: lead for lead in await leads.get_leads(db, profile.id)}
+    assert by_email["jane@example.com"].name == "Form"
+    history = await db.execute(select(LeadSubmission.name).where(LeadSubmission.lead_id == by_email["jane@example.com"].id))
+    assert history.scalars().all() == ["Form"]
+
+
+@pytest.mark.asyncio
+async def test_database_errors_end_the_import_with_a_failure(db, monkeypatch):
+    profile = await profiles.create_profile_with_password(db, "agent@example.com", "agent", "x")
+    await db.commit()
+
+    async def broken(*args):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(leads, "bulk_create_leads", broken)
+    updates = await _collect(import_leads(db, profile.id, csv_records(_chunks(b"name,email\nJane,jane@example.com\n"))))
+
+    assert updates == [{"type": "failed", "error": "A batch of leads could not be saved",
+                        "rows": 1, "imported": 0, "duplicates": 0, "errors": 0}]
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from uuid import uuid4
+import pytest
+from app.config import settings
+from app.crud import events, leads, profiles
+from app.live import LiveFeed, live_feed
+from app.schemas import EventCreate, LeadCreate
+
+
+def _messages(subscriber) -> list[dict]:
+    messages = [json.loads(data.split(b"\ndata: ")[1]) for data in subscriber.pending]
+    subscriber.pending.clear()
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_committed_leads_and_counts_reach_subscribers(db):
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    owner_id, page_id = profile.id, profile.link_page.id
+    await db.commit()
+    subscriber = live_feed.subscribe(owner_id)
+    stream = live_feed.stream(subscriber)
+    assert await anext(stream) == b"retry: 5000\n\n"
+
+    await leads.submit_lead(db, owner_id, LeadCreate(name="Nobody", email="nobody@example.com"))
+    await events.create_event(db, owner_id, EventCreate(type="page_view", page_id=page_id))
+    await db.rollback()
+    live_feed.flush_counts()
+    assert not subscriber.pending
+
+    await leads.submit_lead(db, owner_id, LeadCreate(name="Bob", email="bob@example.com"))
+    for event_type in ["page_view", "page_view", "link_click"]:
+        await events.create_event(db, owner_id, EventCreate(type=event_type, page_id=page_id))
+    assert not subscriber.pending
+    await db.commit()
+    live_feed.flush_counts()
+
+    assert (await anext(stream)).startswith(b"event: lead\ndata: ")
+    assert (await anext(stream)).startswith(b"event: counts\ndata: ")
+    await stream.aclose()
+    assert owner_id not in live_feed.subscribers
+
+
+@pytest.mark.asyncio
+async def test_stop_ends_open_streams():
+    feed = LiveFeed(flush_interval=0.01, heartbeat_interval=0.02, max_subscribers=10)
+    await feed.start()
+    subscriber = feed.subscribe(uuid4())
+    chunks = []
+
+    async def read():
+        async for chunk in feed.stream(subscriber):
+            chunks.append(chunk)
+
+    reader = asyncio.create_task(read())
+    await asyncio.sleep(0.05)
+    await feed.stop()
+    await asyncio.wait_for(reader, 1)
+    assert chunks[0] == b"retry: 5000\n\n" and b": ping\n\n" in chunks
+
+
+@pytest.mark.asyncio
+async def test_counts_are_coalesced_and_slow_subscribers_resync(db):
+    feed = LiveFeed(flush_interval=1, heartbeat_interval=15, max_subscribers=1)
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    subscriber = feed.subscribe(profile.id)
+    assert feed.subscribe(profile.id) is None
+
+    for _ in range(3):
+        feed.count_on_commit(db, profile.id, "page_view")
+    await db.commit()
+    feed.flush_counts()
+    assert _messages(subscriber) == [{"type": "counts", "page_view": 3}]
+
+    for n in range(settings.LIVE_MAX_PENDING + 1):
+        feed.publish(profile.id, {"type": "lead", "n": n})
+    assert _messages(subscriber) == [{"type": "resync"}] and subscriber.closed
+    chunks = [chunk async for chunk in feed.stream(subscriber)]
+    assert chunks == [b"retry: 5000\n\n"] and feed.subscriber_count == 0
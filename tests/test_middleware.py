@@ -0,0 +1,114 @@
+import gzip
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, Response, StreamingResponse
+from starlette.routing import Route
+from app.middleware import CompressionMiddleware
+
+PAGE = "<html><body>" + "<p>Hello from the bio page</p>" * 100 + "</body></html>"
+chunks_sent = []
+
+
+async def page(request):
+    return HTMLResponse(PAGE)
+
+
+async def tiny(request):
+    return HTMLResponse("<p>ok</p>")
+
+
+async def export(request):
+    async def rows():
+        for i in range(3):
+            chunks_sent.append(i)
+            yield f"row {i}," * 200 + "\n"
+    return StreamingResponse(rows(), media_type="text/csv")
+
+
+async def precompressed(request):
+    return Response(gzip.compress(b"body{}" * 200), media_type="text/css", headers={"Content-Encoding": "gzip"})
+
+
+app = Starlette(routes=[Route("/", page), Route("/tiny", tiny), Route("/export", export), Route("/style.css", precompressed)])
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+
+def client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_compresses_html_and_sets_weak_etag():
+    async with client() as http:
+        response = await http.get("/", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(PAGE)
+    assert response.headers["etag"].startswith('W/"')
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == PAGE
+
+
+@pytest.mark.asyncio
+async def test_small_bodies_and_identity_clients_are_not_compressed():
+    async with client() as http:
+        small = await http.get("/tiny", headers={"accept-encoding": "gzip"})
+        identity = await http.get("/", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in identity.headers
+    assert identity.text == PAGE
+
+
+@pytest.mark.asyncio
+async def test_matching_if_none_match_returns_304():
+    async with client() as http:
+        first = await http.get("/", headers={"accept-encoding": "gzip"})
+        etag = first.headers["etag"]
+        repeat = await http.get("/", headers={"accept-encoding": "gzip", "if-none-match": etag})
+        strong = await http.get("/", headers={"if-none-match": etag.removeprefix("W/")})
+        stale = await http.get("/", headers={"if-none-match": 'W/"stale"'})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["etag"] == etag
+    assert strong.status_code == 304
+    assert stale.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_streaming_responses_are_compressed_without_buffering():
+    chunks_sent.clear()
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            # Each row reaches the client before the next one is produced
+            messages.append((len(chunks_sent), message))
+        else:
+            messages.append((None, message))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "method": "GET", "path": "/export", "raw_path": b"/export", "root_path": "",
+        "query_string": b"", "headers": [(b"accept-encoding", b"gzip")], "http_version": "1.1",
+        "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1234),
+    }
+    await app(scope, receive, send)
+
+    start = messages[0][1]
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"etag" not in headers
+    bodies = [(produced, message) for produced, message in messages[1:] if message["body"]]
+    assert [produced for produced, _ in bodies[:3]] == [1, 2, 3]
+    body = gzip.decompress(b"".join(message["body"] for _, message in messages[1:]))
+    assert body.decode().count("\n") == 3
+
+
+@pytest.mark.asyncio
+async def test_precompressed_responses_pass_through():
+    async with client() as http:
+        response = await http.get("/style.css", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"body{}" * 200
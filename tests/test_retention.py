@@ -0,0 +1,106 @@
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from app.models import Event, EventRollup, LinkPage, Profile
+from app.retention import add_months, ensure_partitions, partition_month, purge_events
+
+TODAY = date(2026, 6, 15)
+
+
+async def _seed(db):
+    profile = Profile(email="owner@example.com", handle="owner", password_hash="x")
+    db.add(profile)
+    await db.flush()
+    page = LinkPage(owner_id=profile.id)
+    db.add(page)
+    await db.flush()
+    old = datetime(2025, 1, 10, 12, 0)
+    for _ in range(7):
+        db.add(Event(owner_id=profile.id, page_id=page.id, type="page_view", created_at=old))
+    for _ in range(3):
+        db.add(Event(owner_id=profile.id, page_id=page.id, type="link_click", created_at=old + timedelta(days=1)))
+    db.add(Event(owner_id=profile.id, page_id=page.id, type="page_view", created_at=datetime(2026, 6, 1)))
+    await db.commit()
+
+
+def test_month_helpers():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_month("events_p202602") == date(2026, 2, 1)
+    assert partition_month("events_default") is None
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+        self.rowcount = len(rows)
+
+    def scalars(self):
+        return [row[0] for row in self.rows]
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class PartitionedEvents:
+    """Stands in for a Postgres connection: events_p202606 exists and the
+    default partition already holds July events."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if "FROM pg_inherits" in sql:
+            return FakeResult([("events_default",), ("events_p202606",)])
+        if sql.startswith("SELECT 1 FROM events_default"):
+            return FakeResult([(1,)] if "created_at >= '2026-07-01'" in sql else [])
+        if sql.startswith("INSERT"):
+            return FakeResult([(1,), (1,)])
+        return FakeResult([])
+
+
+@pytest.mark.asyncio
+async def test_new_partitions_take_their_rows_from_the_default_partition():
+    conn = PartitionedEvents()
+    assert await ensure_partitions(conn, 2, today=TODAY) == {"events_p202607": 2, "events_p202608": 0}
+    writes = [sql for sql in conn.statements if not sql.startswith("SELECT")]
+    assert writes == [
+        "ALTER TABLE events DETACH PARTITION events_default",
+        "CREATE TABLE events_p202607 PARTITION OF events FOR VALUES FROM ('2026-07-01') TO ('2026-08-01')",
+        "INSERT INTO events_p202607 SELECT * FROM events_default "
+        "WHERE created_at >= '2026-07-01' AND created_at < '2026-08-01'",
+        "DELETE FROM events_default WHERE created_at >= '2026-07-01' AND created_at < '2026-08-01'",
+        "ALTER TABLE events ATTACH PARTITION events_default DEFAULT",
+        # Nothing stranded for August: created directly
+        "CREATE TABLE events_p202608 PARTITION OF events FOR VALUES FROM ('2026-08-01') TO ('2026-09-01')",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_purge_rolls_up_exports_then_deletes_in_batches(engine, db, tmp_path):
+    await _seed(db)
+
+    stats = await purge_events(engine, retention_days=90, archive_dir=str(tmp_path / "archive"), batch_size=2, today=TODAY)
+
+    assert stats["exported_rows"] == 10
+    assert (tmp_path / "archive" / "events-before-2026-03-17.csv.gz").exists()
+    assert stats["deleted_rows"] == 10
+    assert (await db.execute(select(func.count(Event.id)))).scalar() == 1
+    rollups = (await db.execute(select(EventRollup.day, EventRollup.type, EventRollup.count).order_by(EventRollup.day))).all()
+    assert [tuple(row) for row in rollups] == [
+        (date(2025, 1, 10), "page_view", 7),
+        (date(2025, 1, 11), "link_click", 3),
+    ]
+
+    # A second run must not recount days that were already rolled up
+    stats = await purge_events(engine, retention_days=90, archive_dir="", batch_size=2, today=TODAY)
+    assert stats["rollup_rows"] == 0
+    assert stats["deleted_rows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_rejects_retention_shorter_than_dashboard_window(engine):
+    with pytest.raises(ValueError):
+        await purge_events(engine, retention_days=7, today=TODAY)
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+import pytest
+from app import shared_state
+from app.crud import profiles
+from app.shared_state import DatabaseState, MemoryState
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_database_counts_roll_over_windows(db, monkeypatch):
+    # 1_000_020 starts a 60 second window
+    clock = Clock(1_000_030.0)
+    monkeypatch.setattr(shared_state, "time", clock)
+    state = DatabaseState()
+
+    assert [await state.hit(db, "lead:1.2.3.4", 3, 60) for _ in range(4)] == [False, False, False, True]
+    assert await state.hit(db, "lead:5.6.7.8", 3, 60) is False
+    await db.rollback()
+    assert await state.hit(db, "lead:1.2.3.4", 3, 60) is False
+
+    # Early in the next window the previous window still weighs in
+    await state.hit(db, "lead:1.2.3.4", 3, 60)
+    await state.hit(db, "lead:1.2.3.4", 3, 60)
+    clock.now = 1_000_090.0
+    assert await state.hit(db, "lead:1.2.3.4", 3, 60) is True
+    # Two windows later it has aged out
+    clock.now = 1_000_210.0
+    assert await state.hit(db, "lead:1.2.3.4", 3, 60) is False
+
+
+@pytest.mark.asyncio
+async def test_memory_state_separates_limits():
+    state = MemoryState()
+    assert [await state.hit(None, "ip", 2, 60) for _ in range(3)] == [False, False, True]
+    assert await state.hit(None, "ip", 10, 60) is False
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(client: httpx.AsyncClient, base_url: str):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f"{base_url}/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"{base_url} did not start")
+
+
+@pytest.mark.asyncio
+async def test_instances_on_one_database_share_rate_limits(db, tmp_path):
+    await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    await db.commit()
+    env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'test.db'}",
+           "SHARED_STATE_BACKEND": "database", "INVALIDATION_TRANSPORT": "none"}
+    ports = [_free_port() for _ in range(3)]
+    servers = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+                         cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for port in ports
+    ]
+    try:
+        async with httpx.AsyncClient(timeout=30) as client:
+            for port in ports:
+                await _wait_ready(client, f"http://127.0.0.1:{port}")
+            statuses = []
+            # The lead form allows 5 submissions per IP per 5 minutes, across all instances
+            for n in range(9):
+                response = await client.post(
+                    f"http://127.0.0.1:{ports[n % 3]}/u/jane/lead",
+                    data={"name": f"Lead {n}", "email": f"lead{n}@example.com"},
+                    headers={"x-forwarded-for": "203.0.113.9"},
+                )
+                statuses.append(response.status_code)
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait()
+    assert statuses == [200] * 5 + [429] * 4
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+LAZY_MODULES = ["aiosmtplib"]
+# Used on every authenticated request, so loaded before gunicorn forks (preload_app)
+EAGER_MODULES = ["jose.jwt", "passlib.context"]
+
+
+def test_app_import_defers_rarely_used_modules(tmp_path):
+    env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"}
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys, app.main; print([m for m in {LAZY_MODULES + EAGER_MODULES!r} if m in sys.modules])"],
+        cwd=API_DIR, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == repr(EAGER_MODULES)
@@ -0,0 +1,60 @@
+import pytest
+from app.crud import links, profiles
+from app.schemas import LinkCreate, ProfileUpdate
+from app.static_export import export_pages, page_dir
+
+
+async def _profile(db, handle):
+    profile = await profiles.create_profile_with_password(db, f"{handle}@example.com", handle, "x")
+    link_page = await links.get_link_page(db, profile.id)
+    await links.create_link(db, link_page, LinkCreate(title="My listings", url="https://example.com/listings"))
+    return profile, link_page
+
+
+@pytest.mark.asyncio
+async def test_export_renders_tracking_links_and_beacon(db, tmp_path):
+    profile, link_page = await _profile(db, "jane")
+
+    stats = await export_pages(db, tmp_path, app_url="https://app.example.com")
+
+    html = (page_dir(tmp_path, "jane") / "index.html").read_text()
+    link = (await links.get_links(db, link_page.id))[0]
+    assert stats == {"rendered": 1, "removed": 0, "skipped": 0}
+    assert f'href="https://app.example.com/r/{link.id}"' in html
+    assert f'"https://app.example.com/b/{link_page.id}"' in html
+    assert (page_dir(tmp_path, "jane") / "index.html.gz").exists()
+
+
+@pytest.mark.asyncio
+async def test_incremental_export_only_renders_changed_profiles(db, tmp_path):
+    jane, _ = await _profile(db, "jane")
+    await _profile(db, "john")
+    await export_pages(db, tmp_path)
+
+    assert await export_pages(db, tmp_path) == {"rendered": 0, "removed": 0, "skipped": 0}
+
+    await profiles.update_profile(db, jane, ProfileUpdate(handle="jane-realty", bio="Now with a bio"))
+    stats = await export_pages(db, tmp_path)
+
+    assert stats == {"rendered": 1, "removed": 1, "skipped": 0}
+    assert not page_dir(tmp_path, "jane").exists()
+    assert "Now with a bio" in (page_dir(tmp_path, "jane-realty") / "index.html").read_text()
+
+
+@pytest.mark.asyncio
+async def test_link_changes_mark_the_page_for_export(db, tmp_path):
+    profile, link_page = await _profile(db, "jane")
+    await export_pages(db, tmp_path)
+
+    await links.create_link(db, link_page, LinkCreate(title="Open house", url="https://example.com/open-house"))
+
+    assert (await export_pages(db, tmp_path))["rendered"] == 1
+    assert "Open house" in (page_dir(tmp_path, "jane") / "index.html").read_text()
+
+
+@pytest.mark.asyncio
+async def test_unsafe_handles_are_skipped(db, tmp_path):
+    await _profile(db, "../escape")
+
+    assert (await export_pages(db, tmp_path))["skipped"] == 1
+    assert not (tmp_path.parent / "escape").exists()
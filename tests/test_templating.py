@@ -0,0 +1,21 @@
+from app.templating import create_environment, load_all, templates
+
+
+def test_routers_share_one_environment():
+    from app.routers import auth, dashboard, leads, links, profile, public
+    assert {id(module.templates) for module in (auth, dashboard, leads, links, profile, public)} == {id(templates)}
+    assert "asset_url" in templates.env.globals
+
+
+def test_load_all_fills_bytecode_cache(tmp_path):
+    env = create_environment(cache_dir=tmp_path, auto_reload=False)
+    count = load_all(env)
+
+    assert count == len(env.list_templates(extensions=["html"]))
+    assert len(list(tmp_path.glob("__jinja2_*.cache"))) == count
+    # A fresh environment (a new worker) renders from the cached bytecode
+    fresh = create_environment(cache_dir=tmp_path, auto_reload=False)
+    assert not fresh.auto_reload
+    source, filename, _ = fresh.loader.get_source(fresh, "layout.html")
+    bucket = fresh.bytecode_cache.get_bucket(fresh, "layout.html", filename, source)
+    assert bucket.code is not None
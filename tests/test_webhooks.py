@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import socket
+import httpx
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app import jobs, webhooks
+from app.crud import leads, profiles
+from app.crud.webhooks import create_webhook_endpoint
+from app.models import Job
+from app.schemas import LeadCreate
+
+
+class Receiver:
+    """Local stand-in for a customer's webhook endpoint."""
+
+    def __init__(self, statuses=(), delay=0.0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.requests = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        self.requests.append(({k.decode(): v.decode() for k, v in scope["headers"]}, body))
+        status = self.statuses.pop(0) if self.statuses else 200
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def _worker(engine, monkeypatch, receiver, **options) -> jobs.JobWorker:
+    monkeypatch.setattr(webhooks, "webhook_sender",
+                        webhooks.WebhookSender(transport=httpx.ASGITransport(app=receiver), **options))
+    monkeypatch.setattr(jobs.handlers["webhooks.deliver"], "backoff", 0.0)
+    return jobs.JobWorker({"webhooks": 8},
+                          session_factory=async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+
+
+@pytest.mark.asyncio
+async def test_committed_leads_are_batched_and_signed(db, engine, monkeypatch):
+    receiver = Receiver()
+    worker = _worker(engine, monkeypatch, receiver)
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    profile_id = profile.id
+    endpoint = await create_webhook_endpoint(db, profile_id, "https://hooks.example.com/leads")
+    secret = endpoint.secret
+    await db.commit()
+
+    # Rolled back: never sent
+    await leads.submit_lead(db, profile_id, LeadCreate(name="Nobody", email="nobody@example.com"))
+    await db.rollback()
+
+    for n in range(3):
+        await leads.submit_lead(db, profile_id, LeadCreate(name=f"Lead {n}", email=f"lead{n}@example.com"))
+    await db.commit()
+    # Nothing is sent on the submission path
+    assert receiver.requests == []
+
+    await worker.run_until_idle()
+    await webhooks.webhook_sender.stop()
+    [(headers, body)] = receiver.requests
+    assert [lead["email"] for lead in json.loads(body)["leads"]] == [f"lead{n}@example.com" for n in range(3)]
+    expected = hmac.new(secret.encode(), headers["x-linkcrm-timestamp"].encode() + b"." + body,
+                        hashlib.sha256).hexdigest()
+    assert headers["x-linkcrm-signature"] == f"sha256={expected}"
+    assert (await db.execute(select(Job))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_retries_failed_deliveries_and_caps_concurrency_per_host(db, engine, monkeypatch):
+    receiver = Receiver(statuses=[503, 503], delay=0.02)
+    worker = _worker(engine, monkeypatch, receiver, concurrency_per_host=2)
+    profile = await profiles.create_profile_with_password(db, "jane@example.com", "jane", "x")
+    profile_id = profile.id
+    await create_webhook_endpoint(db, profile_id, "https://hooks.example.com/a")
+    await leads.submit_lead(db, profile_id, LeadCreate(name="Lead", email="lead@example.com"))
+    await db.commit()
+    await worker.run_until_idle()
+    assert len(receiver.requests) == 3
+
+    receiver.requests.clear()
+    for n in range(5):
+        await create_webhook_endpoint(db, profile_id, f"https://hooks.example.com/{n}")
+    await leads.submit_lead(db, profile_id, LeadCreate(name="Lead", email="lead@example.com"))
+    await db.commit()
+    await worker.run_until_idle()
+    assert len(receiver.requests) == 6 and receiver.max_in_flight == 2
+
+    # Gone for good: dropped without retrying
+    receiver.requests.clear()
+    receiver.statuses = [410] * 6
+    await leads.submit_lead(db, profile_id, LeadCreate(name="Lead", email="lead@example.com"))
+    await db.commit()
+    await worker.run_until_idle()
+    await webhooks.webhook_sender.stop()
+    assert len(receiver.requests) == 6
+    assert (await db.execute(select(Job))).first() is None
+
+
+def _fake_dns(monkeypatch, names: dict):
+    """Resolve `names` without a network; numeric hosts go to the real resolver."""
+    real = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host in names:
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (names[host], port))]
+        return real(host, port, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+
+@pytest.mark.asyncio
+async def test_endpoint_urls_must_be_public(monkeypatch):
+    _fake_dns(monkeypatch, {"hooks.example.com": "93.184.215.14", "127.0.0.1.nip.io": "127.0.0.1",
+                            "169.254.169.254.nip.io": "169.254.169.254"})
+    await webhooks.check_endpoint_url("https://hooks.example.com/leads")
+    for url in ["ftp://example.com", "http://localhost:8000/x", "http://127.0.0.1/x", "http://10.0.0.5/x",
+                "http://[::1]/x", "http://169.254.169.254/latest", "http://2130706433/", "http://0x7f000001/",
+                "http://127.0.0.1.nip.io/", "http://169.254.169.254.nip.io/"]:
+        with pytest.raises(ValueError):
+            await webhooks.check_endpoint_url(url)
+
+
+@pytest.mark.asyncio
+async def test_deliveries_refuse_hosts_rebound_to_private_addresses(monkeypatch):
+    # Public when the endpoint was registered, internal by delivery time
+    _fake_dns(monkeypatch, {"hooks.example.com": "127.0.0.1"})
+    sender = webhooks.WebhookSender()
+    with pytest.raises(httpx.ConnectError, match="public host"):
+        await sender.post("http://hooks.example.com/leads", "secret", b"{}")
+    await sender.stop()